@@ -1,6 +1,13 @@
+from typing import Callable
+from unittest.mock import MagicMock
+
 import pytest
 
+import yumex.backend.dnf5daemon as dnf5daemon
+import yumex.backend.dnf5daemon.client as dnf5daemon_client
 from yumex.backend.dnf import YumexPackage
+from yumex.backend.dnf5daemon import YumexPackageBackend
+from yumex.backend.dnf5daemon.client import Dnf5DbusClient
 
 
 def pytest_addoption(parser):
@@ -87,3 +94,42 @@ def pkg_other(pkg_other_dict) -> YumexPackage:
 @pytest.fixture
 def pkg_upd(pkg_dict_upd) -> YumexPackage:
     return YumexPackage(**pkg_dict_upd)
+
+
+@pytest.fixture
+def make_client(monkeypatch) -> Callable[..., Dnf5DbusClient]:
+    """factory for Dnf5DbusClient with an open session, the dbus interfaces is mocked
+
+    The transaction session is /main and the read-only sessions is /read0, /read1 ...
+    """
+    monkeypatch.setattr(dnf5daemon_client, "get_dnfdaemon_bus", MagicMock)
+    monkeypatch.setattr(dnf5daemon_client.dbus, "Interface", lambda *args, **kwargs: MagicMock())
+    monkeypatch.setattr(dnf5daemon_client, "DBusDispatcher", MagicMock)
+
+    def make(read_sessions: int = 0) -> Dnf5DbusClient:
+        client = Dnf5DbusClient(read_sessions=read_sessions)
+        client.iface_session.open_session.side_effect = ["/main", *(f"/read{ndx}" for ndx in range(read_sessions))]
+        client.open_session({})
+        client.dispatcher.cancel_all.return_value = 0
+        return client
+
+    return make
+
+
+@pytest.fixture
+def backend(monkeypatch, make_client) -> YumexPackageBackend:
+    """YumexPackageBackend with 2 read-only sessions, a mocked snapshot and no packages"""
+    monkeypatch.setattr(dnf5daemon, "get_read_sessions", lambda: 2)
+    monkeypatch.setattr(dnf5daemon, "Dnf5DbusClient", make_client)
+    monkeypatch.setattr(dnf5daemon, "PackageSnapshot", lambda: MagicMock(**{"get.return_value": None}))
+    monkeypatch.setattr(dnf5daemon, "PREFETCH_SCOPES", [])
+    monkeypatch.setattr(YumexPackageBackend, "get_snapshot_key", lambda self: "key")
+    monkeypatch.setattr(Dnf5DbusClient, "repo_list", lambda self: ([], None))
+    monkeypatch.setattr(Dnf5DbusClient, "package_list_fd_iter", lambda self, *args, **kwargs: iter([]))
+    backend = YumexPackageBackend(MagicMock())
+    # forget the (empty) installed packages fetched at startup
+    backend._fetched.clear()
+    backend.snapshot.reset_mock()
+    # the search index is build by the tests there use it
+    backend.schedule_search_index = MagicMock()
+    return backend
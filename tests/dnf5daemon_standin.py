@@ -0,0 +1,414 @@
+"""
+A stand-in for dnf5daemon-server on the session bus, serving a synthetic dataset (tests/standin_data.py)
+
+It implements the subset of org.rpm.dnf.v0 used by yumex: SessionManager, rpm.Rpm list/list_fd and
+the goal methods, rpm.Repo list, Goal resolve/do_transaction, Advisory list, Base reset/clean and
+Offline get_status, with the download and transaction signals. No root and no real repositories
+is needed, so the backend and the updater service can be benchmarked and load tested on any Linux.
+
+Run the stand-in and point yumex at it with YUMEX_DNF5DAEMON_BUS=session:
+
+dbus-run-session -- sh -c "YUMEX_STANDIN_PACKAGES=50000 python -m tests.dnf5daemon_standin & \\
+    sleep 2; YUMEX_DNF5DAEMON_BUS=session pytest tests/dont_test_bench_standin.py -s"
+
+"""
+
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+import dbus
+import dbus.service
+from dbus.mainloop.glib import DBusGMainLoop
+from gi.repository import GLib
+
+from tests.standin_data import Pkg, StandinData
+
+DNFDAEMON_BUS_NAME = "org.rpm.dnf.v0"
+DNFDAEMON_OBJECT_PATH = "/" + DNFDAEMON_BUS_NAME.replace(".", "/")
+
+IFACE_SESSION_MANAGER = "{}.SessionManager".format(DNFDAEMON_BUS_NAME)
+IFACE_REPO = "{}.rpm.Repo".format(DNFDAEMON_BUS_NAME)
+IFACE_RPM = "{}.rpm.Rpm".format(DNFDAEMON_BUS_NAME)
+IFACE_GOAL = "{}.Goal".format(DNFDAEMON_BUS_NAME)
+IFACE_BASE = "{}.Base".format(DNFDAEMON_BUS_NAME)
+IFACE_ADVISORY = "{}.Advisory".format(DNFDAEMON_BUS_NAME)
+IFACE_OFFLINE = "{}.Offline".format(DNFDAEMON_BUS_NAME)
+
+# transaction actions (yumex.utils.enums.TransactionAction)
+ACTIONS = {"Install": 1, "Upgrade": 2, "Downgrade": 3, "Reinstall": 4, "Remove": 5}
+# dbus signatures for the list attributes, the others can be guessed by dbus-python
+ARRAY_SIGNATURES = {
+    "files": "s",
+    "provides": "s",
+    "requires": "s",
+    "recommends": "s",
+    "suggests": "s",
+    "conflicts": "s",
+    "obsoletes": "s",
+    "changelogs": "(xss)",
+    "references": "(ssss)",
+    "packages": "s",
+}
+# time between the progress signals in a transaction (ms)
+SIGNAL_INTERVAL = 5
+
+logger = logging.getLogger(__name__)
+
+
+def to_dbus(attrs: dict) -> dbus.Dictionary:
+    """the attributes as a{sv}, with the types dnf5daemon uses"""
+    values = {}
+    for attr, value in attrs.items():
+        if attr in ARRAY_SIGNATURES:
+            value = dbus.Array(value, signature=ARRAY_SIGNATURES[attr])
+        elif attr in ("install_size", "download_size", "package_size"):
+            value = dbus.UInt64(value)
+        elif attr == "buildtime":
+            value = dbus.Int64(value)
+        elif attr == "collections":
+            value = dbus.Array(
+                [
+                    dbus.Dictionary(
+                        {"packages": dbus.Array([dbus.Dictionary(pkg, signature="ss") for pkg in coll["packages"]], signature="a{ss}")},
+                        signature="sv",
+                    )
+                    for coll in value
+                ],
+                signature="a{sv}",
+            )
+        values[attr] = value
+    return dbus.Dictionary(values, signature="sv")
+
+
+class RepoInterface(dbus.service.Object):
+    """org.rpm.dnf.v0.rpm.Repo"""
+
+    @dbus.service.method(IFACE_REPO, in_signature="a{sv}", out_signature="aa{sv}")
+    def list(self, options):
+        attrs = ["id", *(str(attr) for attr in options.get("repo_attrs", []))]
+        match str(options.get("enable_disable", "enabled")):
+            case "enabled":
+                repos = [repo for repo in self.data.repos if repo["enabled"]]
+            case "disabled":
+                repos = [repo for repo in self.data.repos if not repo["enabled"]]
+            case _:
+                repos = self.data.repos
+        return dbus.Array([to_dbus({attr: repo[attr] for attr in attrs if attr in repo}) for repo in repos], signature="a{sv}")
+
+    @dbus.service.method(IFACE_REPO, in_signature="sb", out_signature="")
+    def confirm_key(self, key_id, confirmed):
+        logger.debug(f"confirm_key({key_id}, {confirmed})")
+
+
+class RpmInterface(dbus.service.Object):
+    """org.rpm.dnf.v0.rpm.Rpm"""
+
+    @dbus.service.method(IFACE_RPM, in_signature="a{sv}", out_signature="aa{sv}")
+    def list(self, options):
+        attrs = [str(attr) for attr in options.get("package_attrs", ["nevra"])]
+        pkgs = [to_dbus(self.data.package_attrs(pkg, attrs)) for pkg in self.data.list_packages(options)]
+        return dbus.Array(pkgs, signature="a{sv}")
+
+    @dbus.service.method(IFACE_RPM, in_signature="a{sv}h", out_signature="s")
+    def list_fd(self, options, file_descriptor):
+        transfer_id = f"{self.path}/transfer/{next(self.transfer_ids)}"
+        fd = file_descriptor.take()
+        pkgs = self.data.list_packages(options)
+        attrs = [str(attr) for attr in options.get("package_attrs", ["nevra"])]
+        # the packages is written in a thread like dnf5daemon does, and the signal is emitted when done
+        threading.Thread(target=self._write_packages, args=(fd, pkgs, attrs, transfer_id), daemon=True).start()
+        return transfer_id
+
+    def _write_packages(self, fd: int, pkgs: list[Pkg], attrs: list[str], transfer_id: str) -> None:
+        success, error = True, ""
+        try:
+            with os.fdopen(fd, "wb", buffering=65536) as pipe:
+                for pkg in pkgs:
+                    pipe.write(json.dumps(self.data.package_attrs(pkg, attrs), ensure_ascii=False).encode() + b"\n")
+        except BrokenPipeError:
+            success, error = False, "the client closed the pipe"
+        except Exception as e:
+            success, error = False, str(e)
+        GLib.idle_add(self.write_to_fd_finished, success, transfer_id, error)
+
+    @dbus.service.signal(IFACE_RPM, signature="bss")
+    def write_to_fd_finished(self, success, transfer_id, error_msg):
+        pass
+
+    def _add_to_goal(self, action: str, specs) -> None:
+        self.goal.extend((action, str(spec)) for spec in specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="asa{sv}", out_signature="")
+    def install(self, specs, options):
+        self._add_to_goal("Install", specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="asa{sv}", out_signature="")
+    def remove(self, specs, options):
+        self._add_to_goal("Remove", specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="asa{sv}", out_signature="")
+    def upgrade(self, specs, options):
+        self._add_to_goal("Upgrade", specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="asa{sv}", out_signature="")
+    def downgrade(self, specs, options):
+        self._add_to_goal("Downgrade", specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="asa{sv}", out_signature="")
+    def reinstall(self, specs, options):
+        self._add_to_goal("Reinstall", specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="asa{sv}", out_signature="")
+    def distro_sync(self, specs, options):
+        self._add_to_goal("Upgrade", specs)
+
+    @dbus.service.method(IFACE_RPM, in_signature="a{sv}", out_signature="")
+    def system_upgrade(self, options):
+        self._add_to_goal("Upgrade", (pkg.name for pkg in self.data.upgrades().values()))
+
+    @dbus.service.signal(IFACE_RPM, signature="ot")
+    def transaction_before_begin(self, session, total):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="ob")
+    def transaction_after_complete(self, session, success):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="osut")
+    def transaction_action_start(self, session, package_id, action, total):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="ostt")
+    def transaction_action_progress(self, session, package_id, amount, total):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="ost")
+    def transaction_action_stop(self, session, package_id, total):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="osu")
+    def transaction_script_start(self, session, package_id, script_type):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="osuu")
+    def transaction_script_stop(self, session, package_id, script_type, return_code):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="ot")
+    def transaction_verify_start(self, session, total):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="ott")
+    def transaction_verify_progress(self, session, amount, total):
+        pass
+
+    @dbus.service.signal(IFACE_RPM, signature="ot")
+    def transaction_verify_stop(self, session, total):
+        pass
+
+
+class GoalInterface(dbus.service.Object):
+    """org.rpm.dnf.v0.Goal"""
+
+    @dbus.service.method(IFACE_GOAL, in_signature="a{sv}", out_signature="a(sssa{sv}a{sv})u")
+    def resolve(self, options):
+        self.resolved = self.data.resolve(self.goal)
+        attrs = ["name", "epoch", "version", "release", "arch", "repo_id", "evr", "package_size", "install_size"]
+        items = [
+            ("Package", action, reason, dbus.Dictionary({}, signature="sv"), to_dbus(self.data.package_attrs(pkg, attrs)))
+            for action, pkg, reason in self.resolved
+        ]
+        rc = 0 if self.resolved or not self.goal else 2
+        return dbus.Array(items, signature="(sssa{sv}a{sv})"), dbus.UInt32(rc)
+
+    @dbus.service.method(IFACE_GOAL, in_signature="", out_signature="as")
+    def get_transaction_problems_string(self):
+        if self.goal and not self.resolved:
+            return dbus.Array(["No match for the packages in the goal"], signature="s")
+        return dbus.Array([], signature="s")
+
+    @dbus.service.method(IFACE_GOAL, in_signature="", out_signature="")
+    def reset(self):
+        self.goal = []
+        self.resolved = []
+
+    @dbus.service.method(IFACE_GOAL, in_signature="a{sv}", out_signature="", async_callbacks=("reply_handler", "error_handler"))
+    def do_transaction(self, options, reply_handler, error_handler):
+        """emit the download and transaction signals from the main loop, and reply when done"""
+        items = list(self.resolved)
+        offline = bool(options.get("offline", False))
+        signals = self._transaction_signals(items, offline)
+
+        def next_signal():
+            try:
+                emit, args = next(signals)
+            except StopIteration:
+                if not offline:
+                    self.data.apply(items)
+                self.goal = []
+                self.resolved = []
+                reply_handler()
+                return GLib.SOURCE_REMOVE
+            emit(*args)
+            return GLib.SOURCE_CONTINUE
+
+        GLib.timeout_add(SIGNAL_INTERVAL, next_signal)
+
+    def _transaction_signals(self, items, offline: bool):
+        path = dbus.ObjectPath(self.path)
+        for action, pkg, _ in items:
+            if action == "Remove":
+                continue
+            download_id = f"package:{pkg.id}"
+            size = dbus.Int64(pkg.download_size)
+            yield self.download_add_new, (path, download_id, pkg.nevra, size)
+            for step in (1, 2, 3):
+                yield self.download_progress, (path, download_id, size, dbus.Int64(pkg.download_size * step // 4))
+            yield self.download_end, (path, download_id, dbus.UInt32(0), "")
+        if offline:
+            return
+        total = dbus.UInt64(len(items))
+        yield self.transaction_before_begin, (path, total)
+        yield self.transaction_verify_start, (path, total)
+        yield self.transaction_verify_stop, (path, total)
+        for action, pkg, _ in items:
+            size = dbus.UInt64(pkg.install_size)
+            yield self.transaction_action_start, (path, pkg.full_nevra, dbus.UInt32(ACTIONS.get(action, 1)), size)
+            yield self.transaction_action_progress, (path, pkg.full_nevra, dbus.UInt64(pkg.install_size // 2), size)
+            yield self.transaction_action_stop, (path, pkg.full_nevra, size)
+        yield self.transaction_after_complete, (path, True)
+
+
+class BaseInterface(dbus.service.Object):
+    """org.rpm.dnf.v0.Base"""
+
+    @dbus.service.method(IFACE_BASE, in_signature="", out_signature="bs")
+    def reset(self):
+        self.goal = []
+        self.resolved = []
+        return True, ""
+
+    @dbus.service.method(IFACE_BASE, in_signature="s", out_signature="bs")
+    def clean(self, cache_type):
+        logger.debug(f"clean({cache_type})")
+        return True, ""
+
+    @dbus.service.method(IFACE_BASE, in_signature="", out_signature="b")
+    def read_all_repos(self):
+        return True
+
+    @dbus.service.signal(IFACE_BASE, signature="ossx")
+    def download_add_new(self, session, download_id, description, total_to_download):
+        pass
+
+    @dbus.service.signal(IFACE_BASE, signature="osxx")
+    def download_progress(self, session, download_id, total_to_download, downloaded):
+        pass
+
+    @dbus.service.signal(IFACE_BASE, signature="osus")
+    def download_end(self, session, download_id, transfer_status, message):
+        pass
+
+    @dbus.service.signal(IFACE_BASE, signature="osss")
+    def download_mirror_failure(self, session, download_id, message, url):
+        pass
+
+    @dbus.service.signal(IFACE_BASE, signature="osassx")
+    def repo_key_import_request(self, session, key_id, user_ids, key_fingerprint, key_url, timestamp):
+        pass
+
+
+class AdvisoryInterface(dbus.service.Object):
+    """org.rpm.dnf.v0.Advisory"""
+
+    @dbus.service.method(IFACE_ADVISORY, in_signature="a{sv}", out_signature="aa{sv}")
+    def list(self, options):
+        return dbus.Array([to_dbus(advisory) for advisory in self.data.list_advisories(options)], signature="a{sv}")
+
+
+class OfflineInterface(dbus.service.Object):
+    """org.rpm.dnf.v0.Offline"""
+
+    @dbus.service.method(IFACE_OFFLINE, in_signature="", out_signature="ba{sv}")
+    def get_status(self):
+        return False, dbus.Dictionary({}, signature="sv")
+
+    @dbus.service.method(IFACE_OFFLINE, in_signature="", out_signature="bs")
+    def clean(self):
+        return True, ""
+
+    @dbus.service.method(IFACE_OFFLINE, in_signature="s", out_signature="bs")
+    def set_finish_action(self, action):
+        return True, ""
+
+
+class StandinSession(RepoInterface, RpmInterface, GoalInterface, BaseInterface, AdvisoryInterface, OfflineInterface):
+    """A session object with all the session interfaces
+
+    Methods with the same name in more interfaces (list, reset, clean) is found by dbus-python
+    in the interface class matching the called interface
+    """
+
+    def __init__(self, service: "StandinService", path: str, options: dict) -> None:
+        super().__init__(service.bus, path)
+        self.service = service
+        self.path = path
+        self.options = options
+        self.goal: list[tuple[str, str]] = []
+        self.resolved: list[tuple[str, Pkg, str]] = []
+        self.transfer_ids = itertools.count(1)
+
+    @property
+    def data(self) -> StandinData:
+        return self.service.data
+
+
+class StandinService(dbus.service.Object):
+    """org.rpm.dnf.v0.SessionManager"""
+
+    def __init__(self, bus: dbus.Bus, data: StandinData) -> None:
+        self.bus = bus
+        self.data = data
+        self.sessions: dict[str, StandinSession] = {}
+        self.session_ids = itertools.count(1)
+        super().__init__(bus, DNFDAEMON_OBJECT_PATH)
+
+    @dbus.service.method(IFACE_SESSION_MANAGER, in_signature="a{sv}", out_signature="o")
+    def open_session(self, options):
+        path = f"{DNFDAEMON_OBJECT_PATH}/standin/{next(self.session_ids)}"
+        self.sessions[path] = StandinSession(self, path, dict(options))
+        logger.debug(f"open_session: {path} ({len(self.sessions)} sessions)")
+        return dbus.ObjectPath(path)
+
+    @dbus.service.method(IFACE_SESSION_MANAGER, in_signature="o", out_signature="b")
+    def close_session(self, path):
+        if (session := self.sessions.pop(str(path), None)) is None:
+            return False
+        session.remove_from_connection()
+        logger.debug(f"close_session: {path} ({len(self.sessions)} sessions)")
+        return True
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.DEBUG if os.environ.get("YUMEX_STANDIN_DEBUG") else logging.INFO)
+    DBusGMainLoop(set_as_default=True)
+    t_start = time.perf_counter()
+    data = StandinData()
+    logger.info(
+        f"dataset: {len(data.available)} available, {len(data.installed)} installed, "
+        f"{len(data.upgrades())} upgrades, {len(data.advisories)} advisories, {len(data.repos)} repos "
+        f"({time.perf_counter() - t_start:.1f}s)"
+    )
+    bus = dbus.SessionBus()
+    name = dbus.service.BusName(DNFDAEMON_BUS_NAME, bus, do_not_queue=True)  # noqa: F841
+    StandinService(bus, data)
+    logger.info(f"{DNFDAEMON_BUS_NAME} stand-in is running on the session bus")
+    GLib.MainLoop().run()
+
+
+if __name__ == "__main__":
+    main()
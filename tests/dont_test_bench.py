@@ -0,0 +1,761 @@
+"""
+Benchmarks for the package backend and the package views, they print timings and must be run
+manually with -s, a single benchmark can be selected with -k.
+
+The synthetic list_fd payloads is generated, the stand-in dataset (tests/standin_data.py) is
+configured by the YUMEX_STANDIN_* variables. The benchmarks using the dnf5daemon stand-in on the
+session bus is skipped without a session bus, the select_all benchmark needs a display and the
+ui files from the local build (like tests/test_package_view.py).
+
+use:
+
+pytest tests/dont_test_bench.py -s
+pytest tests/dont_test_bench.py -s -k decoder
+YUMEX_STANDIN_PACKAGES=80000 pytest tests/dont_test_bench.py -s -k search_index
+dbus-run-session -- pytest tests/dont_test_bench.py -s -k standin
+
+"""
+
+import builtins
+import gc
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from collections import OrderedDict
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+import yumex.utils.progress as progress
+from yumex.backend.cache import YumexPackageCache
+from yumex.backend.dnf import YumexPackage
+from yumex.backend.dnf5daemon import (
+    ADVISOR_ATTRS,
+    PACKAGE_ATTRS,
+    DownloadQueue,
+    YumexPackageBackend,
+    create_package,
+    refine_search,
+)
+from yumex.backend.dnf5daemon.client import Dnf5DbusClient
+from yumex.backend.dnf5daemon.decoder import JsonStreamDecoder
+from yumex.backend.dnf5daemon.filter import FilterUpdates
+from yumex.backend.search_index import PackageIndex
+from yumex.backend.snapshot import PackageSnapshot
+from yumex.utils.columns import PackageColumns
+from yumex.utils.enums import AdvisoryFilter, InfoType, PackageFilter, PackageState, SortType
+from yumex.utils.evr import compare_many, evr_key, rpmvercmp, version_key
+from yumex.utils.progress import ProgressThrottle
+from yumex.utils.storage import PackageListModel, PackageStorage
+
+from .standin_data import STEMS, StandinConfig, StandinData
+
+builtins.__dict__.setdefault("_", lambda text: text)
+
+# simulated dnf5daemon throughput (MB/s) and DBus round trip (ms)
+THROUGHPUT = float(os.environ.get("YUMEX_BENCH_THROUGHPUT", "20")) * 2**20
+LATENCY = float(os.environ.get("YUMEX_BENCH_LATENCY", "20")) / 1000
+READ_SESSIONS = int(os.environ.get("YUMEX_BENCH_READ_SESSIONS", "2"))
+CHUNK = 65536
+
+
+# helpers
+
+
+def timed_ms(func, *args, **kwargs):
+    """run func, return the time (ms) and the result"""
+    t_start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return (time.perf_counter() - t_start) * 1000, result
+
+
+def percentiles(latencies: list[float]) -> str:
+    latencies = sorted(latencies)
+    return f"p50 {latencies[len(latencies) // 2]:7.2f} ms, p95 {latencies[int(len(latencies) * 0.95)]:7.2f} ms"
+
+
+def rss() -> int:
+    """the resident memory of the process (bytes)"""
+    gc.collect()
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def make_packages(num: int, **attrs) -> list[YumexPackage]:
+    pkg_attrs = {
+        "version": "1.0",
+        "release": "1.fc42",
+        "epoch": "",
+        "arch": "x86_64",
+        "repo": "fedora",
+        "description": "A package summary",
+        "size": 1024,
+    }
+    return [YumexPackage(name=f"package-{ndx}", **(pkg_attrs | attrs)) for ndx in range(num)]
+
+
+def synthetic_payload(num: int) -> bytes:
+    """a list_fd payload with num packages"""
+    rnd = random.Random(1)
+    lines = []
+    for ndx in range(num):
+        pkg = {
+            "name": f"package-{ndx}",
+            "evr": f"{rnd.randint(0, 3)}:{rnd.randint(1, 20)}.{rnd.randint(0, 99)}-{rnd.randint(1, 9)}.fc42",
+            "arch": rnd.choice(["x86_64", "noarch", "i686"]),
+            "repo_id": rnd.choice(["fedora", "updates", "updates-testing"]),
+            "summary": rnd.choice(["A package summary", "Ein Paket für Grüße", "日本語のパッケージ"]),
+            "install_size": rnd.randint(1000, 10**8),
+            "is_installed": rnd.random() < 0.1,
+        }
+        lines.append(json.dumps(pkg, ensure_ascii=False))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def payload_chunks(payload: bytes, seed: int | None = None):
+    """the payload in chunks, in random sizes like os.read() on a pipe returns them, if a seed is given"""
+    rnd = random.Random(seed)
+    pos = 0
+    while pos < len(payload):
+        size = rnd.randint(512, CHUNK) if seed is not None else CHUNK
+        yield payload[pos : pos + size]
+        pos += size
+
+
+def decode(chunks) -> list[dict]:
+    decoder = JsonStreamDecoder()
+    pkgs = []
+    for chunk in chunks:
+        pkgs.extend(decoder.feed(chunk))
+    pkgs.extend(decoder.close())
+    return pkgs
+
+
+class Frames:
+    """replacement for GLib.timeout_add in the progress throttle, fired by the benchmark"""
+
+    def __init__(self) -> None:
+        self.pending = None
+
+    def timeout_add(self, delay, func):
+        self.pending = func
+        return 1
+
+    def source_remove(self, source):
+        self.pending = None
+
+    def fire(self) -> None:
+        if (func := self.pending) is not None:
+            self.pending = None
+            func()
+
+
+@pytest.fixture(scope="module")
+def standin_data() -> StandinData:
+    return StandinData(StandinConfig.from_env())
+
+
+@pytest.fixture(scope="module")
+def standin_lists(standin_data) -> dict[str, list[dict]]:
+    """the installed and available package lists from the stand-in dataset, like list_fd returns them"""
+    data = standin_data
+    return {
+        "installed": [data.package_attrs(pkg, PACKAGE_ATTRS) for pkg in data.list_packages({"scope": "installed"})],
+        "available": [data.package_attrs(pkg, PACKAGE_ATTRS) for pkg in data.list_packages({"scope": "available", "latest-limit": 1})],
+    }
+
+
+@pytest.fixture(scope="module")
+def standin():
+    """the dnf5daemon stand-in (tests/dnf5daemon_standin.py) on the session bus"""
+    if "DBUS_SESSION_BUS_ADDRESS" not in os.environ:
+        pytest.skip("no session bus, run with dbus-run-session")
+    import dbus
+    from gi.repository import GLib
+
+    os.environ["YUMEX_DNF5DAEMON_BUS"] = "session"
+    proc = subprocess.Popen([sys.executable, "-m", "tests.dnf5daemon_standin"], cwd=Path(__file__).parent.parent)
+    # the signals from the stand-in (like write_to_fd_finished) is handled by a main loop
+    loop = GLib.MainLoop()
+    threading.Thread(target=loop.run, daemon=True).start()
+    try:
+        bus = dbus.SessionBus()
+        deadline = time.monotonic() + 60
+        while not bus.name_has_owner("org.rpm.dnf.v0"):
+            if time.monotonic() > deadline:
+                raise TimeoutError("the dnf5daemon stand-in is not started")
+            time.sleep(0.1)
+        yield proc
+    finally:
+        loop.quit()
+        proc.terminate()
+        proc.wait()
+
+
+@pytest.fixture
+def standin_backend(standin, tmp_path, monkeypatch):
+    """a YumexPackageBackend using the stand-in, a cold start without snapshot and Gio settings"""
+    import yumex.backend.dnf5daemon as dnf5daemon
+
+    from .mock import mock_presenter
+
+    monkeypatch.setattr(dnf5daemon, "PackageSnapshot", lambda: PackageSnapshot(tmp_path / "packages.snapshot"))
+    monkeypatch.setattr(dnf5daemon, "get_read_sessions", lambda: READ_SESSIONS)
+    monkeypatch.setattr(dnf5daemon, "get_metadata_timestamp", lambda: 0)
+    elapsed, backend = timed_ms(dnf5daemon.YumexPackageBackend, presenter=mock_presenter())
+    print(f"\n  backend started      : {elapsed:8.0f} ms ({READ_SESSIONS} read sessions)")
+    yield backend
+    backend.close()
+
+
+# list_fd decoding, package lists & snapshot
+
+
+def test_decoder():
+    """the list_fd payload fed to the decoder in random chunk sizes"""
+    if path := os.environ.get("YUMEX_BENCH_PAYLOAD"):
+        payload = Path(path).read_bytes()
+    else:
+        payload = synthetic_payload(80_000)
+    size_mb = len(payload) / 2**20
+    best = min(timed_ms(decode, list(payload_chunks(payload, seed)))[0] for seed in range(3))
+    print(f"\n  {size_mb:.1f} MB in {best:.0f} ms ({size_mb / best * 1000:.1f} MB/s)")
+
+
+def test_snapshot(tmp_path):
+    """the time until the 6000 installed packages is ready to be shown, from list_fd and from the snapshot"""
+    payload = synthetic_payload(6000)
+    elapsed, pkgs = timed_ms(lambda: [create_package(pkg) for pkg in decode(payload_chunks(payload))])
+    print(f"\n  from list_fd   : {elapsed:6.1f} ms ({len(pkgs)} packages)")
+    path = tmp_path / "packages.snapshot"
+    PackageSnapshot(path).save("key", {"installed": decode(payload_chunks(payload))})
+
+    def from_snapshot():
+        snapshot = PackageSnapshot(path)
+        assert snapshot.load("key")
+        return [create_package(pkg) for pkg in snapshot.get("installed")]
+
+    elapsed, pkgs = timed_ms(from_snapshot)
+    print(f"  from snapshot  : {elapsed:6.1f} ms ({path.stat().st_size / 1024:.0f} KB)")
+
+
+@pytest.mark.parametrize("num", [10_000, 50_000, 100_000])
+def test_columns_memory(num):
+    """the memory used by a package list, as YumexPackage objects and as PackageColumns"""
+
+    def as_columns(pkgs):
+        columns = PackageColumns()
+        for pkg in pkgs:
+            columns.append_dict(pkg)
+        return columns
+
+    pkgs = decode(payload_chunks(synthetic_payload(num)))
+    print(f"\n  {num} packages")
+    for label, build in (("YumexPackage objects", lambda pkgs: [create_package(pkg) for pkg in pkgs]), ("PackageColumns", as_columns)):
+        rss_start = rss()
+        tracemalloc.start()
+        elapsed, result = timed_ms(build, pkgs)
+        heap, _peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {label:20} : heap {heap / 2**20:6.1f} MB, rss {(rss() - rss_start) / 2**20:6.1f} MB, build {elapsed:6.0f} ms")
+        del result
+    columns = as_columns(pkgs)
+    elapsed, _pkgs = timed_ms(lambda: [columns.get_package(row) for row in range(50)])
+    print(f"  first 50 rows        : {elapsed:.2f} ms")
+
+
+def test_stream(tmp_path, monkeypatch):
+    """the time to the first row of the available packages, loaded with and without streaming"""
+
+    class Client:
+        """writes the list_fd payload in chunks, with the simulated throughput"""
+
+        def __init__(self, payload: bytes) -> None:
+            self.payload = payload
+
+        def package_list_fd_iter(self, *args, **kwargs):
+            decoder = JsonStreamDecoder()
+            for chunk in payload_chunks(self.payload):
+                time.sleep(len(chunk) / THROUGHPUT)
+                yield from decoder.feed(chunk)
+            yield from decoder.close()
+
+    monkeypatch.setattr(YumexPackageBackend, "package_attr", [])
+    monkeypatch.setattr(YumexPackageBackend, "get_snapshot_key", lambda self: "key")
+    backend = YumexPackageBackend.__new__(YumexPackageBackend)
+    backend.client = Client(synthetic_payload(80_000))
+    backend.snapshot = PackageSnapshot(tmp_path / "packages.snapshot")
+    backend._repositories = []
+    backend._from_snapshot = set()
+    backend._fetched = set()
+    backend._prefetch = {}
+    backend._snapshot_lock = threading.Lock()
+    backend.search_index = None
+    backend._index_generation = 0
+    backend.schedule_search_index = lambda: None
+    print(f"\n  80000 packages at {THROUGHPUT / 2**20:.0f} MB/s")
+    elapsed, columns = timed_ms(backend.get_packages, PackageFilter.AVAILABLE)
+    print(f"  without streaming : first row after {elapsed:7.0f} ms")
+    backend.snapshot.invalidate()
+    backend._fetched.clear()
+    first_row = None
+    t_start = time.perf_counter()
+    for chunk in backend.stream_packages(PackageFilter.AVAILABLE):
+        if first_row is None and len(chunk):
+            first_row = (time.perf_counter() - t_start) * 1000
+    print(f"  with streaming    : first row after {first_row:7.0f} ms, all loaded after {(time.perf_counter() - t_start) * 1000:.0f} ms")
+
+
+# package storage & queue
+
+
+@pytest.mark.parametrize("attr", [SortType.NAME, SortType.ARCH, SortType.SIZE, SortType.REPO])
+def test_sort(attr):
+    """sort 80k packages, the first sort and a re-sort with the cached sort order"""
+    rnd = random.Random(1)
+    pkgs = make_packages(80_000)
+    rnd.shuffle(pkgs)
+    for pkg in pkgs:
+        pkg.name = f"{rnd.choice(['lib', 'python3-', 'Perl-', ''])}{pkg.name}"
+        pkg.arch = rnd.choice(["x86_64", "noarch", "i686"])
+        pkg.repo = rnd.choice(["fedora", "updates", "updates-testing"])
+        pkg.size = rnd.randint(1000, 10**8)
+    print(f"\n  sort by {attr.name} ({len(pkgs)} packages)")
+    storage = PackageStorage()
+    storage.add_packages(pkgs)
+    columnar = PackageStorage(columnar=True)
+    columnar.add_columns(PackageColumns.from_packages(pkgs))
+    for label, store in (("ListStore", storage), ("columnar", columnar)):
+        print(f"  {label:9} : first sort {timed_ms(store.sort_by, attr)[0]:7.1f} ms, re-sort {timed_ms(store.sort_by, attr)[0]:7.1f} ms")
+
+
+@pytest.mark.parametrize("queue_size", [30, 300, 3000])
+@pytest.mark.parametrize("store_size", [10_000, 80_000])
+def test_storage_overlay(store_size, queue_size):
+    """show a package list, using the queued package objects"""
+    pkgs = make_packages(store_size)
+    queue = PackageStorage()
+    queue.add_packages(pkgs[:: store_size // queue_size][:queue_size])
+    storage = PackageStorage()
+    elapsed, _result = timed_ms(lambda: storage.add_packages(queue.overlay(pkgs)))
+    print(f"\n  store: {store_size:6} queue: {queue_size:5} : overlay {elapsed:7.1f} ms")
+    assert sum(1 for pkg in queue if storage.find_by_nevra(pkg.nevra) is pkg) == queue_size
+
+
+@pytest.mark.parametrize("size", [500, 2000, 5000])
+def test_queue(size):
+    """grow the queue to size packages (500 at a time), and remove them again (half first) like YumexQueueView"""
+
+    def queue_order(pkg: YumexPackage) -> int:
+        return pkg.state + pkg.action
+
+    states = itertools.cycle([PackageState.UPDATE, PackageState.AVAILABLE, PackageState.INSTALLED])
+    pkgs = make_packages(size)
+    for pkg in pkgs:
+        pkg.state = next(states)
+    queue = PackageStorage()
+    t_start = time.perf_counter()
+    for ndx in range(0, size, 500):
+        added = [pkg for pkg in pkgs[ndx : ndx + 500] if pkg not in queue]
+        queue.replace(sorted([*queue, *added], key=queue_order))
+    add_ms = (time.perf_counter() - t_start) * 1000
+    t_start = time.perf_counter()
+    for to_remove in (set(pkgs[::2]), set(pkgs)):
+        queue.replace([pkg for pkg in queue if pkg not in to_remove])
+    remove_ms = (time.perf_counter() - t_start) * 1000
+    print(f"\n  queue size {size:5} : add {add_ms:7.1f} ms, remove {remove_ms:7.1f} ms")
+    assert len(queue) == 0
+
+
+def test_package_cache(standin_data):
+    """10k random searches, the cached packages and the RSS should stay bounded"""
+
+    class Backend:
+        def __init__(self, data: StandinData) -> None:
+            self.data = data
+            self.names = [(pkg.name, pkg) for pkg in data.available]
+
+        def create(self, pkg) -> YumexPackage:
+            return create_package(self.data.package_attrs(pkg, PACKAGE_ATTRS))
+
+        def get_packages(self, pkg_filter: PackageFilter) -> list[YumexPackage]:
+            return [self.create(pkg) for pkg in self.data.installed.values()]
+
+        def search(self, txt: str) -> list[YumexPackage]:
+            return [self.create(pkg) for name, pkg in self.names if txt in name]
+
+    backend = Backend(standin_data)
+    cache = YumexPackageCache(backend, max_entries=5000)
+    installed = cache.get_packages_by_filter(PackageFilter.INSTALLED)
+    rnd = random.Random(1)
+    for pkg in rnd.sample(installed, 50):
+        pkg.queued = True
+    rss_warm = 0
+    t_start = time.perf_counter()
+    for ndx in range(10_000):
+        list(cache.get_packages(backend.search(f"{rnd.choice(STEMS)}{rnd.randint(1, 99)}"), visible=True))
+        if ndx + 1 == 2000:
+            rss_warm = rss()
+    growth = rss() - rss_warm
+    print(f"\n  10000 searches in {time.perf_counter() - t_start:.1f}s, RSS growth after warmup {growth / 2**20:.1f} MiB, {cache.stats()}")
+    assert cache.stats()["evictions"] > 0
+    assert growth < 32 * 2**20
+
+
+# searches
+
+
+def test_search_index(standin_lists, tmp_path):
+    """build, save & load the search index, the queries should be answered in under 10 ms"""
+    print(f"\n  {len(standin_lists['installed'])} installed, {len(standin_lists['available'])} available packages")
+    elapsed, index = timed_ms(PackageIndex.build, standin_lists)
+    path = tmp_path / "packages.index"
+    save_ms, _result = timed_ms(index.save, path, "key")
+    load_ms, index = timed_ms(PackageIndex.load, path, "key", standin_lists)
+    print(f"  build {elapsed:.0f} ms, save {save_ms:.0f} ms ({path.stat().st_size} bytes), load {load_ms:.0f} ms")
+    rnd = random.Random(1)
+    queries = [
+        rnd.choice([stem, f"{stem}{rnd.randint(1, 99)}", f"{stem}{rnd.randint(100, 999)}", f"python3-{stem}"]) for stem in rnd.choices(STEMS, k=1000)
+    ]
+    # a few broad queries, matching a quarter of the packages
+    queries[::50] = ["lib"] * len(queries[::50])
+    latencies = [timed_ms(index.search, query)[0] for query in queries]
+    print(f"  {len(queries)} queries : {percentiles(latencies)}")
+    assert sorted(latencies)[int(len(latencies) * 0.95)] < 10
+
+
+# the queries searched while typing, from the 3rd character
+TYPED = ["firefox", "python3-fire", "python3-gtk12", "libssl-devel", "rust-json", "gnome-sound", "texlive-font", "kf6-qt", "perl-yaml-doc"]
+KEYSTROKES = [[typed[:ndx] for ndx in range(3, len(typed) + 1)] for typed in TYPED]
+
+
+def test_search_refine(standin_data):
+    """a new search for each keystroke, and refining the last search result"""
+
+    def nevras(pkgs):
+        return {f"{pkg['name']}-{pkg['evr']}.{pkg['arch']}" for pkg in pkgs}
+
+    def daemon_search(query: str) -> list[dict]:
+        pkgs = standin_data.list_packages({"patterns": [f"*{query}*"], "scope": "all", "latest-limit": 1})
+        return [standin_data.package_attrs(pkg, PACKAGE_ATTRS) for pkg in pkgs]
+
+    new_ms = []
+    refined_ms = []
+    for queries in KEYSTROKES:
+        last = daemon_search(queries[0])
+        for query in queries[1:]:
+            elapsed, result = timed_ms(daemon_search, query)
+            new_ms.append(elapsed)
+            elapsed, last = timed_ms(refine_search, last, query)
+            refined_ms.append(elapsed)
+            assert nevras(last) == nevras(result)
+    print(f"\n  new search     : {percentiles(new_ms)}\n  refined search : {percentiles(refined_ms)}")
+
+
+def test_search_refine_model(standin_lists, monkeypatch):
+    """the rows signalled by items_changed, when only the packages not found is removed from the view"""
+    signalled = [0]
+    items_changed = PackageListModel.items_changed
+
+    def count_items_changed(model, position, removed, added):
+        signalled[0] += removed + added
+        items_changed(model, position, removed, added)
+
+    monkeypatch.setattr(PackageListModel, "items_changed", count_items_changed)
+    index = PackageIndex.build(standin_lists)
+    results = {query: [create_package(pkg) for pkg in index.search(query)] for queries in KEYSTROKES for query in queries}
+    storage = PackageStorage(columnar=True)
+    t_start = time.perf_counter()
+    for queries in KEYSTROKES:
+        storage.clear()
+        for query in queries:
+            if not (len(storage) and storage.retain(results[query])):
+                storage.clear()
+                storage.add_packages(results[query])
+                storage.sort_by(SortType.NAME)
+    print(f"\n  {(time.perf_counter() - t_start) * 1000:.1f} ms, {signalled[0]} rows signalled")
+
+
+def test_search_cancel(monkeypatch):
+    """the decoded bytes, when a query is typed every 80 ms and each search cancels the search in progress"""
+    # typed query -> number of matching packages
+    queries = {"fir": 40_000, "fire": 20_000, "firef": 5_000, "firefo": 500, "firefox": 20}
+
+    class Rpm:
+        """writes the list_fd payload to the pipe in a thread, with the simulated throughput"""
+
+        def __init__(self, client: Dnf5DbusClient) -> None:
+            self.client = client
+            self.payloads = {query: synthetic_payload(num) for query, num in queries.items()}
+            self.ids = itertools.count()
+
+        def list_fd(self, options, pipe_w):
+            transfer_id = f"transfer-{next(self.ids)}"
+            payload = self.payloads[options["patterns"][0].strip("*")]
+            threading.Thread(target=self.write, args=(os.dup(pipe_w), payload, transfer_id)).start()
+            return transfer_id
+
+        def write(self, fd: int, payload: bytes, transfer_id: str) -> None:
+            try:
+                for chunk in payload_chunks(payload):
+                    time.sleep(len(chunk) / THROUGHPUT)
+                    os.write(fd, chunk)
+            except BrokenPipeError:
+                pass
+            finally:
+                os.close(fd)
+            self.client.on_write_to_fd_finished(True, transfer_id, "")
+
+    monkeypatch.setattr(YumexPackageBackend, "package_attr", [])
+    client = Dnf5DbusClient.__new__(Dnf5DbusClient)
+    client._read_pool = []
+    client._main_session = type("Session", (), {"rpm": Rpm(client)})()
+    client._transfers = {}
+    client._finished_transfers = OrderedDict()
+    client._ended_transfers = OrderedDict()
+    client._transfer_lock = threading.Lock()
+    backend = YumexPackageBackend.__new__(YumexPackageBackend)
+    backend.client = client
+    backend._installed_evr = {}
+    backend._search_transfer = None
+    backend._search_lock = threading.Lock()
+    backend._last_search = None
+    backend.search_index = None
+    transfers = []
+    unregister = client._unregister_transfer
+    monkeypatch.setattr(client, "_unregister_transfer", lambda transfer: transfers.append(transfer) or unregister(transfer))
+    results = {}
+    threads = []
+    t_start = time.perf_counter()
+    for query in queries:
+        thread = threading.Thread(target=lambda q=query: results.update({q: backend.search(q)}))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.08)
+    for thread in threads:
+        thread.join()
+    # the counters is updated, when the transfer is closed
+    time.sleep(0.1)
+    decoded = sum(transfer.bytes_decoded for transfer in transfers)
+    print(f"\n  {len(queries)} queries at {THROUGHPUT / 2**20:.0f} MB/s : {decoded / 2**20:.1f} MB decoded in {time.perf_counter() - t_start:.2f}s")
+    print(f"  shown results : {[query for query, pkgs in results.items() if pkgs is not None]}")
+    assert results["firefox"] is not None
+
+
+# updates
+
+
+@pytest.mark.parametrize("num", [10, 100, 1000])
+def test_filter_updates(num):
+    """the repo priority filtering of the updates, each lookup is a simulated DBus round trip"""
+    repo_priority = {"fedora": 99, "updates": 99, "copr": 50}
+    calls = [0]
+
+    def available(name: str) -> list[dict]:
+        return [
+            {"name": name, "arch": "x86_64", "evr": f"1.{ndx}-1.fc42", "repo_id": repo, "summary": "", "install_size": 1, "is_installed": False}
+            for ndx, repo in enumerate(repo_priority)
+        ]
+
+    def lookup(pkgs: list[YumexPackage]) -> list[YumexPackage]:
+        calls[0] += 1
+        found = [pkg for update in pkgs for pkg in available(update.name)]
+        time.sleep(LATENCY + 0.00005 * len(found))
+        return [create_package(pkg) for pkg in found]
+
+    filter_updates = FilterUpdates(repo_priority, lambda pkg: lookup([pkg]), lookup)
+    pkgs = [create_package(pkg) for ndx in range(num) for pkg in available(f"package-{ndx}")]
+    elapsed, result = timed_ms(filter_updates.get_updates, pkgs)
+    print(f"\n  {num:5} updates : {calls[0]} DBus calls in {elapsed:.0f} ms")
+    assert {pkg.repo for pkg in result} == {"copr"}
+
+
+def test_evr():
+    """compare 100k evr pairs, like the (available, installed) pairs compared by check_for_installed"""
+    rnd = random.Random(1)
+
+    def random_evr() -> str:
+        version = ".".join(str(rnd.randint(0, 20)) for _ in range(rnd.randint(1, 4)))
+        if rnd.random() < 0.05:
+            version += rnd.choice(["~rc1", "^git20250101", "a", "p2"])
+        epoch = f"{rnd.randint(1, 3)}:" if rnd.random() < 0.05 else ""
+        return f"{epoch}{version}-{rnd.randint(1, 30)}.fc{rnd.choice([41, 42, 43])}"
+
+    def rpmvercmp_evr(one: str, two: str) -> int:
+        epoch_one, _, vr_one = one.rpartition(":")
+        epoch_two, _, vr_two = two.rpartition(":")
+        if epoch := (int(epoch_one or 0) > int(epoch_two or 0)) - (int(epoch_one or 0) < int(epoch_two or 0)):
+            return epoch
+        version_one, _, release_one = vr_one.rpartition("-")
+        version_two, _, release_two = vr_two.rpartition("-")
+        return rpmvercmp(version_one, version_two) or rpmvercmp(release_one, release_two)
+
+    evrs = [random_evr() for _ in range(25_000)]
+    pairs = [(rnd.choice(evrs), rnd.choice(evrs)) for _ in range(100_000)]
+    elapsed, expected = timed_ms(lambda: [rpmvercmp_evr(one, two) for one, two in pairs])
+    print(f"\n  rpmvercmp           : {elapsed:7.1f} ms")
+    evr_key.cache_clear()
+    version_key.cache_clear()
+    for label in ("compare_many (cold)", "compare_many (warm)"):
+        elapsed, result = timed_ms(compare_many, pairs)
+        print(f"  {label} : {elapsed:7.1f} ms")
+        assert result == expected
+
+
+def test_standin_advisories(standin_backend):
+    """the advisory lookup for 500 updates, with an advisory list call per update and with the advisory index"""
+    backend = standin_backend
+    updates = list(backend.get_packages(PackageFilter.UPDATES))[:500]
+    elapsed, per_package = timed_ms(lambda: {pkg.name: backend.client.advisory_list(pkg.name, advisor_attrs=ADVISOR_ATTRS)[0] for pkg in updates})
+    print(f"  per package          : {elapsed:8.0f} ms ({len(updates)} calls)")
+    elapsed, backend.advisory_index = timed_ms(backend._get_advisory_index, updates)
+    print(f"  advisory index       : {elapsed:8.0f} ms (1 call)")
+
+    def from_index():
+        for pkg in updates:
+            assert len(backend._get_update_info(pkg)) == len(per_package[pkg.name])
+        return [pkg for pkg in updates if backend.match_advisory(pkg, AdvisoryFilter.SECURITY)]
+
+    elapsed, security = timed_ms(from_index)
+    print(f"  update info + filter : {elapsed:8.0f} ms ({len(security)} security)")
+
+
+# dnf5daemon stand-in
+
+
+def test_standin_package_lists(standin_backend):
+    backend = standin_backend
+    for label, func, *args in (
+        ("installed", backend.get_packages, PackageFilter.INSTALLED),
+        ("available", backend.get_packages, PackageFilter.AVAILABLE),
+        ("updates", backend.get_packages, PackageFilter.UPDATES),
+        ("reset", backend.reset),
+        ("installed (reset)", backend.get_packages, PackageFilter.INSTALLED),
+    ):
+        print(f"  {label:<21}: {timed_ms(func, *args)[0]:8.0f} ms")
+
+
+def test_standin_search_and_info(standin_backend):
+    backend = standin_backend
+    elapsed, pkgs = timed_ms(backend.search, "fire")
+    print(f"  search               : {elapsed:8.0f} ms ({len(pkgs)} packages)")
+    for info_type in InfoType:
+        print(f"  {info_type.name.lower():<21}: {timed_ms(backend.get_package_info, pkgs[0], info_type)[0]:8.0f} ms")
+    print(f"  depsolve             : {timed_ms(backend.depsolve, pkgs[:1])[0]:8.0f} ms")
+
+
+def test_standin_search_load(standin_backend):
+    """searches from 8 threads at the same time"""
+    backend = standin_backend
+    searches = ["fire", "gtk", "python3-", "lib", "devel", "sound1", "qt2", "json"]
+    latencies = []
+
+    def worker(ndx: int):
+        for query in searches[ndx:] + searches[:ndx]:
+            latencies.append(timed_ms(backend.client.package_list_fd, f"*{query}*", package_attrs=backend.package_attr, scope="all")[0])
+
+    threads = [threading.Thread(target=worker, args=(ndx,)) for ndx in range(8)]
+    t_start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"  {len(latencies)} searches in {time.perf_counter() - t_start:.2f}s : {percentiles(latencies)}")
+
+
+def test_standin_updater_service(standin):
+    from yumex.service.dnf5daemon import Dnf5UpdateChecker
+
+    with Dnf5UpdateChecker() as checker:
+        elapsed, updates = timed_ms(checker.check_updates)
+    print(f"\n  updater check        : {elapsed:8.0f} ms ({len(updates)} updates)")
+
+
+# ui
+
+
+def test_progress(monkeypatch):
+    """replay 100k progress signals (2000 package downloads and the rpm actions) through the signal handlers
+
+    The progress throttle timer is fired once per 80 signals (like a 16 ms frame, when the signals come at ~5000/s)
+    """
+    frames = Frames()
+    monkeypatch.setattr(progress.GLib, "timeout_add", frames.timeout_add)
+    monkeypatch.setattr(progress.GLib, "source_remove", frames.source_remove)
+    backend = YumexPackageBackend.__new__(YumexPackageBackend)
+    backend.presenter = MagicMock()
+    dialog = MagicMock()
+    backend.presenter.progress = ProgressThrottle(dialog)
+    backend.download_queue = DownloadQueue()
+    backend._offline = False
+    size = 64 * 1024 * 40
+    signals = [("on_download_add_new", (f"package:{ndx}", f"package-{ndx}", size)) for ndx in range(2000)]
+    signals += [("on_download_progress", (f"package:{ndx}", size, chunk * size // 40)) for ndx in range(2000) for chunk in range(1, 41)]
+    signals += [("on_transaction_action_progress", (f"package-{ndx}", amount, 10)) for ndx in range(2000) for amount in range(1, 11)]
+    t_start = time.perf_counter()
+    for ndx, (name, args) in enumerate(signals):
+        getattr(backend, name)(None, *args)
+        if ndx % 80 == 0:
+            frames.fire()
+    frames.fire()
+    elapsed = (time.perf_counter() - t_start) * 1000
+    updates = dialog.set_progress.call_count + dialog.set_subtitle.call_count
+    print(f"\n  {len(signals)} signals in {elapsed:.0f} ms, {updates} progress dialog updates")
+    assert dialog.set_progress.call_args.args[0] == 1.0
+
+
+@pytest.mark.parametrize("rows", [1_000, 5_000])
+def test_select_all(rows, monkeypatch):
+    """the select_all time and the longest frame, when all packages in the view is selected and deselected"""
+    import gi
+
+    gi.require_version("Gtk", "4.0")
+    from gi.repository import GLib, Gtk
+
+    import yumex.utils
+
+    from .mock import TemplateUIFromFile
+
+    monkeypatch.setattr(Gtk, "Template", TemplateUIFromFile)
+    monkeypatch.setattr(yumex.utils, "RunAsync", lambda func, callback, *args: callback(func(*args), None))
+    from yumex.ui.package_view import YumexPackageView
+    from yumex.ui.queue_view import YumexQueueView
+
+    def wait(seconds: float) -> None:
+        end = time.perf_counter() + seconds
+        GLib.timeout_add(int(seconds * 1000), lambda: False)
+        while time.perf_counter() < end:
+            GLib.MainContext.default().iteration(True)
+
+    presenter = MagicMock()
+    presenter.get_packages.side_effect = lambda pkgs, visible=False: pkgs
+    presenter.depsolve.return_value = []
+    presenter.can_stream_packages.return_value = False
+    presenter.has_snapshot_data.return_value = False
+    presenter.package_settings.get_sort_attr.return_value = SortType.NAME
+    presenter.get_packages_by_filter.return_value = make_packages(rows, state=PackageState.UPDATE)
+    view = YumexPackageView(presenter=presenter, qview=YumexQueueView(presenter))
+    window = Gtk.Window(default_width=1000, default_height=800, child=Gtk.ScrolledWindow(child=view))
+    window.present()
+    view.get_packages(PackageFilter.UPDATES)
+    wait(0.5)
+    frames = []
+    clock = view.get_frame_clock()
+    handler = clock.connect("after-paint", lambda clock: frames.append(clock.get_frame_time() / 1000))
+    clock.begin_updating()
+    call_ms = 0.0
+    for state in (True, False):
+        call_ms += timed_ms(view.select_all, state)[0]
+        wait(0.5)
+    clock.end_updating()
+    clock.disconnect(handler)
+    window.destroy()
+    longest = max((b - a for a, b in zip(frames, frames[1:])), default=0.0)
+    print(f"\n  {rows} rows : select_all {call_ms:7.1f} ms, longest frame {longest:7.1f} ms")
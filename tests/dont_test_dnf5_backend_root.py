@@ -18,6 +18,7 @@ from dataclasses import fields
 from yumex.backend.dnf import YumexPackage
 from yumex.backend.dnf5daemon import UpdateInfo, YumexPackageBackend, create_package
 from yumex.utils import setup_logging
+from yumex.utils.columns import PackageColumns
 from yumex.utils.enums import InfoType, PackageFilter, PackageState
 from yumex.utils.exceptions import YumexException
 
@@ -165,7 +166,7 @@ def test_get_repositories(backend):
 def test_get_packages_installed(backend):
     """test get_packages for installed packages"""
     pkgs = backend.get_packages(PackageFilter.INSTALLED)
-    assert isinstance(pkgs, list)
+    assert isinstance(pkgs, PackageColumns)
     assert len(pkgs) > 0
     print(f"\n# of packages : {len(pkgs)}")
     pkg = pkgs[0]
@@ -176,7 +177,7 @@ def test_get_packages_installed(backend):
 def test_get_packages_available(backend):
     """test get_packages for availabe packages"""
     pkgs = backend.get_packages(PackageFilter.AVAILABLE)
-    assert isinstance(pkgs, list)
+    assert isinstance(pkgs, PackageColumns)
     assert len(pkgs) > 0
     print(f"\n# of packages : {len(pkgs)}")
     pkg = pkgs[0]
@@ -187,7 +188,7 @@ def test_get_packages_available(backend):
 def test_get_packages_updates(backend):
     """test get_packages for upgradable"""
     pkgs = backend.get_packages(PackageFilter.UPDATES)
-    assert isinstance(pkgs, list)
+    assert isinstance(pkgs, PackageColumns)
     if len(pkgs) > 0:
         print(f"\n# of packages : {len(pkgs)}")
         pkg = pkgs[0]
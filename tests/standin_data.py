@@ -0,0 +1,324 @@
+"""
+Synthetic package dataset for the dnf5daemon stand-in (tests/dnf5daemon_standin.py)
+
+The dataset is generated from a seed, so the same configuration always gives the same
+packages, repositories and advisories. The size is configured by environment variables:
+
+YUMEX_STANDIN_PACKAGES   number of available packages (default 10000)
+YUMEX_STANDIN_REPOS      number of extra repositories (default 2)
+YUMEX_STANDIN_INSTALLED  ratio of packages there is installed (default 0.15)
+YUMEX_STANDIN_UPDATES    ratio of installed packages with an update (default 0.2)
+YUMEX_STANDIN_ADVISORIES ratio of updates with an advisory (default 0.6)
+YUMEX_STANDIN_SEED       seed for the generator (default 1)
+
+"""
+
+import fnmatch
+import os
+import random
+import re
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, NamedTuple
+
+PREFIXES = ["", "", "", "lib", "python3-", "perl-", "golang-", "rust-", "gnome-", "kf6-", "texlive-", "ghc-"]
+STEMS = ["fire", "fox", "zip", "gtk", "qt", "ssl", "xml", "yaml", "json", "dnf", "rpm", "font", "sound", "video", "net", "cloud"]
+SUFFIXES = ["", "", "", "", "-devel", "-libs", "-doc", "-common", "-tools", "-data"]
+ARCHS = ["x86_64"] * 6 + ["noarch"] * 3 + ["i686"]
+SUMMARIES = ["A package summary", "Library for handling things", "Command line tool", "Ein Paket für Grüße", "日本語のパッケージ"]
+ADVISORY_TYPES = ["bugfix", "bugfix", "enhancement", "security", "newpackage"]
+SEVERITIES = ["None", "Low", "Moderate", "Important", "Critical"]
+DIST = "fc42"
+
+
+@dataclass
+class StandinConfig:
+    packages: int = 10_000
+    repos: int = 2
+    installed: float = 0.15
+    updates: float = 0.2
+    advisories: float = 0.6
+    seed: int = 1
+
+    @classmethod
+    def from_env(cls) -> "StandinConfig":
+        env = os.environ
+        return cls(
+            packages=int(env.get("YUMEX_STANDIN_PACKAGES", cls.packages)),
+            repos=int(env.get("YUMEX_STANDIN_REPOS", cls.repos)),
+            installed=float(env.get("YUMEX_STANDIN_INSTALLED", cls.installed)),
+            updates=float(env.get("YUMEX_STANDIN_UPDATES", cls.updates)),
+            advisories=float(env.get("YUMEX_STANDIN_ADVISORIES", cls.advisories)),
+            seed=int(env.get("YUMEX_STANDIN_SEED", cls.seed)),
+        )
+
+
+class Pkg(NamedTuple):
+    id: int
+    name: str
+    epoch: str
+    version: str
+    release: str
+    arch: str
+    repo_id: str
+    summary: str
+    install_size: int
+    download_size: int
+
+    @property
+    def na(self) -> tuple[str, str]:
+        return self.name, self.arch
+
+    @property
+    def evr(self) -> str:
+        if self.epoch != "0":
+            return f"{self.epoch}:{self.version}-{self.release}"
+        return f"{self.version}-{self.release}"
+
+    @property
+    def nevra(self) -> str:
+        return f"{self.name}-{self.evr}.{self.arch}"
+
+    @property
+    def full_nevra(self) -> str:
+        return f"{self.name}-{self.epoch}:{self.version}-{self.release}.{self.arch}"
+
+    @property
+    def evr_key(self) -> tuple:
+        return int(self.epoch), tuple(int(part) for part in self.version.split(".")), int(self.release.split(".")[0])
+
+
+def compile_patterns(patterns: Iterable[str], icase: bool = True) -> re.Pattern | None:
+    """compile the package patterns to a regex matching the name or the nevra, None matches everything"""
+    patterns = [str(pattern) for pattern in patterns]
+    if not patterns or "*" in patterns:
+        return None
+    regex = "|".join(fnmatch.translate(pattern) for pattern in patterns)
+    return re.compile(regex, re.IGNORECASE if icase else 0)
+
+
+class StandinData:
+    """The packages, repositories and advisories served by the stand-in"""
+
+    def __init__(self, config: StandinConfig | None = None) -> None:
+        self.config = config or StandinConfig.from_env()
+        self.repos: list[dict[str, Any]] = []
+        # available packages in the repositories
+        self.available: list[Pkg] = []
+        # installed packages by (name, arch)
+        self.installed: dict[tuple[str, str], Pkg] = {}
+        self.advisories: list[dict[str, Any]] = []
+        self._generate()
+
+    def _generate(self) -> None:
+        config = self.config
+        rnd = random.Random(config.seed)
+        self.repos = [
+            {"id": "fedora", "name": "Fedora 42 - x86_64", "enabled": True, "priority": 99},
+            {"id": "updates", "name": "Fedora 42 - x86_64 - Updates", "enabled": True, "priority": 99},
+            {"id": "updates-testing", "name": "Fedora 42 - x86_64 - Test Updates", "enabled": False, "priority": 99},
+        ]
+        for ndx in range(config.repos):
+            self.repos.append({"id": f"extra-{ndx}", "name": f"Extra repository {ndx}", "enabled": True, "priority": 10 * (ndx + 1)})
+        repo_ids = ["fedora"] * 8 + [repo["id"] for repo in self.repos[3:]]
+        pkg_id = 0
+        for ndx in range(config.packages):
+            name = f"{rnd.choice(PREFIXES)}{rnd.choice(STEMS)}{ndx}{rnd.choice(SUFFIXES)}"
+            version = f"{rnd.randint(0, 9)}.{rnd.randint(0, 30)}.{rnd.randint(0, 9)}"
+            release = rnd.randint(2, 9)
+            epoch = "0" if rnd.random() < 0.9 else str(rnd.randint(1, 3))
+            pkg = Pkg(
+                pkg_id,
+                name,
+                epoch,
+                version,
+                f"{release}.{DIST}",
+                rnd.choice(ARCHS),
+                rnd.choice(repo_ids),
+                rnd.choice(SUMMARIES),
+                rnd.randint(1000, 10**8),
+                rnd.randint(1000, 10**7),
+            )
+            pkg_id += 1
+            self.available.append(pkg)
+            if rnd.random() >= config.installed:
+                continue
+            self.installed[pkg.na] = pkg._replace(repo_id="@System")
+            if rnd.random() >= config.updates:
+                continue
+            # the repo has a newer release in the updates repository
+            update = pkg._replace(id=pkg_id, release=f"{release + 1}.{DIST}", repo_id="updates")
+            pkg_id += 1
+            self.available.append(update)
+            if rnd.random() < config.advisories:
+                self.advisories.append(self._make_advisory(rnd, update))
+
+    def _make_advisory(self, rnd: random.Random, pkg: Pkg) -> dict[str, Any]:
+        advisory_id = f"FEDORA-2025-{rnd.getrandbits(40):010x}"
+        typ = rnd.choice(ADVISORY_TYPES)
+        return {
+            "advisoryid": advisory_id,
+            "name": advisory_id,
+            "title": f"{pkg.name}-{pkg.version}-{pkg.release}",
+            "type": typ,
+            "severity": rnd.choice(SEVERITIES) if typ == "security" else "None",
+            "status": "stable",
+            "description": f"Update of {pkg.name} to {pkg.evr}",
+            "buildtime": 1735689600 + rnd.randint(0, 365 * 86400),
+            "references": [(f"{rnd.randint(100000, 999999)}", "bugzilla", f"Bug in {pkg.name}", "https://bugzilla.redhat.com")],
+            "packages": [pkg.nevra],
+        }
+
+    def is_installed(self, pkg: Pkg) -> bool:
+        installed = self.installed.get(pkg.na)
+        return installed is not None and installed.evr == pkg.evr
+
+    @property
+    def enabled_repos(self) -> set[str]:
+        return {repo["id"] for repo in self.repos if repo["enabled"]}
+
+    def upgrades(self) -> dict[tuple[str, str], Pkg]:
+        """the newest available package for installed packages, where it is newer than the installed"""
+        upgrades = {}
+        enabled = self.enabled_repos
+        for pkg in self.available:
+            installed = self.installed.get(pkg.na)
+            if installed is None or pkg.repo_id not in enabled or pkg.evr_key <= installed.evr_key:
+                continue
+            current = upgrades.get(pkg.na)
+            if current is None or pkg.evr_key > current.evr_key:
+                upgrades[pkg.na] = pkg
+        return upgrades
+
+    def _scope(self, scope: str) -> Iterable[Pkg]:
+        enabled = self.enabled_repos
+        match scope:
+            case "installed":
+                return self.installed.values()
+            case "available":
+                return (pkg for pkg in self.available if pkg.repo_id in enabled)
+            case "upgrades":
+                return self.upgrades().values()
+            case "upgradable":
+                return [self.installed[na] for na in self.upgrades()]
+            case "all":
+                return [*self.installed.values(), *(pkg for pkg in self.available if pkg.repo_id in enabled)]
+            case other:
+                raise ValueError(f"unknown scope: {other}")
+
+    def list_packages(self, options: dict[str, Any]) -> list[Pkg]:
+        """the packages matching the list / list_fd options (patterns, scope, repo, arch, latest-limit, icase)"""
+        regex = compile_patterns(options.get("patterns", []), bool(options.get("icase", True)))
+        repos = set(options.get("repo", []))
+        arch = options.get("arch", [])
+        archs = {str(arch)} if isinstance(arch, str) else {str(a) for a in arch}
+        pkgs = []
+        for pkg in self._scope(str(options.get("scope", "all"))):
+            if regex is not None and not (regex.match(pkg.name) or regex.match(pkg.nevra)):
+                continue
+            if repos and pkg.repo_id not in repos:
+                continue
+            if archs and pkg.arch not in archs:
+                continue
+            pkgs.append(pkg)
+        return self._latest(pkgs, int(options.get("latest-limit", 0)))
+
+    @staticmethod
+    def _latest(pkgs: list[Pkg], limit: int) -> list[Pkg]:
+        """keep the <limit> newest packages of each name.arch"""
+        if limit <= 0:
+            return pkgs
+        by_na: dict[tuple[str, str], list[Pkg]] = {}
+        for pkg in pkgs:
+            by_na.setdefault(pkg.na, []).append(pkg)
+        result = []
+        for same_na in by_na.values():
+            if len(same_na) > 1:
+                same_na.sort(key=lambda pkg: pkg.evr_key, reverse=True)
+            result.extend(same_na[:limit])
+        return result
+
+    def package_attrs(self, pkg: Pkg, attrs: Iterable[str]) -> dict[str, Any]:
+        """the attributes of a package, as dnf5daemon returns them"""
+        return {attr: self.package_attr(pkg, attr) for attr in attrs}
+
+    def package_attr(self, pkg: Pkg, attr: str) -> Any:
+        match attr:
+            case "id":
+                return pkg.id
+            case "name" | "epoch" | "version" | "release" | "arch" | "repo_id" | "summary" | "install_size" | "download_size":
+                return getattr(pkg, attr)
+            case "evr" | "nevra" | "full_nevra":
+                return getattr(pkg, attr)
+            case "package_size":
+                return pkg.download_size
+            case "is_installed":
+                return pkg.repo_id == "@System" or self.is_installed(pkg)
+            case "description":
+                return f"{pkg.summary}.\n\nThe {pkg.name} package is generated by the dnf5daemon stand-in."
+            case "url":
+                return f"https://example.org/{pkg.name}"
+            case "license":
+                return "GPL-3.0-or-later"
+            case "files":
+                return [f"/usr/bin/{pkg.name}", f"/usr/share/doc/{pkg.name}/README"]
+            case "changelogs":
+                return [(1735689600, "Packager <packager@example.org> - " + pkg.evr, "- Update to " + pkg.version)]
+            case "provides":
+                return [pkg.name, f"{pkg.name}({pkg.arch}) = {pkg.evr}"]
+            case "requires" | "recommends" | "suggests" | "conflicts" | "obsoletes":
+                return ["glibc"] if attr == "requires" else []
+            case other:
+                raise ValueError(f"unknown package attribute: {other}")
+
+    def list_advisories(self, options: dict[str, Any]) -> list[dict[str, Any]]:
+        """the advisories for the packages in contains_pkgs (all advisories without contains_pkgs)"""
+        names = {str(name) for name in options.get("contains_pkgs", [])}
+        attrs = [str(attr) for attr in options.get("advisory_attrs", ["advisoryid", "name", "title", "type", "severity"])]
+        result = []
+        for advisory in self.advisories:
+            if names and not any(nevra.rsplit("-", 2)[0] in names for nevra in advisory["packages"]):
+                continue
+            values = {attr: advisory[attr] for attr in attrs if attr in advisory}
+            if "collections" in attrs:
+                values["collections"] = [{"packages": [self._advisory_package(nevra) for nevra in advisory["packages"]]}]
+            result.append(values)
+        return result
+
+    @staticmethod
+    def _advisory_package(nevra: str) -> dict[str, str]:
+        """the package in an advisory collection, as dnf5daemon returns it"""
+        name, version, release_arch = nevra.rsplit("-", 2)
+        release, arch = release_arch.rsplit(".", 1)
+        epoch, _, version = version.rpartition(":")
+        return {"n": name, "e": epoch or "0", "v": version, "r": release, "a": arch}
+
+    def find(self, spec: str, scope: str) -> Pkg | None:
+        """the newest package matching a name or nevra in a scope"""
+        pkgs = self.list_packages({"patterns": [spec], "scope": scope, "latest-limit": 1})
+        exact = [pkg for pkg in pkgs if pkg.name == spec or pkg.nevra == spec] or pkgs
+        return max(exact, key=lambda pkg: pkg.evr_key, default=None)
+
+    def resolve(self, goal: list[tuple[str, str]]) -> list[tuple[str, Pkg, str]]:
+        """resolve the goal (action, spec) to transaction items (action, package, reason)
+
+        Every installed package gets one not installed dependency, so depsolving has something to find
+        """
+        items = []
+        for action, spec in goal:
+            scope = "installed" if action in ("Remove", "Reinstall") else "upgrades" if action == "Upgrade" else "available"
+            if (pkg := self.find(spec, scope)) is None:
+                continue
+            items.append((action, pkg, "User"))
+            if action == "Install":
+                dep = self.available[(pkg.id * 7919 + 1) % len(self.available)]
+                if not self.is_installed(dep) and dep.na != pkg.na:
+                    items.append(("Install", dep, "Dependency"))
+        return items
+
+    def apply(self, items: Iterator[tuple[str, Pkg, str]]) -> None:
+        """update the installed packages, when a transaction is run"""
+        for action, pkg, _ in items:
+            if action == "Remove":
+                self.installed.pop(pkg.na, None)
+            else:
+                self.installed[pkg.na] = pkg._replace(repo_id="@System")
@@ -0,0 +1,70 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from yumex.backend.dnf5daemon.advisory import AdvisoryIndex, AdvisorySummary
+from yumex.utils.enums import AdvisoryFilter, InfoType
+
+
+def advisory(name: str, typ: str, severity: str, *pkg_names: str) -> dict:
+    packages = [{"n": pkg_name, "e": "0", "v": "1", "r": "1", "a": "noarch"} for pkg_name in pkg_names]
+    return {"name": name, "type": typ, "severity": severity, "collections": [{"packages": packages}]}
+
+
+@pytest.fixture
+def index() -> AdvisoryIndex:
+    advisories = [
+        advisory("FEDORA-1", "bugfix", "None", "foo", "bar"),
+        advisory("FEDORA-2", "security", "Important", "foo"),
+        advisory("FEDORA-3", "security", "Critical", "baz", "other"),
+    ]
+    return AdvisoryIndex(advisories, ["foo", "bar", "baz", "noadv"])
+
+
+def test_index(index):
+    """should index the advisories by the package names, there is in the index"""
+    assert len(index) == 3
+    assert [adv["name"] for adv in index.get("foo")] == ["FEDORA-1", "FEDORA-2"]
+    assert index.get("noadv") == []
+    assert "noadv" in index
+    assert "other" not in index
+    assert index.get("other") == []
+
+
+def test_summary(index):
+    """should summarize the most important advisory type and severity"""
+    assert index.summary("foo") == AdvisorySummary("security", "Important")
+    assert index.summary("bar") == AdvisorySummary("bugfix", "")
+    assert index.summary("baz") == AdvisorySummary("security", "Critical")
+    assert index.summary("noadv") is None
+
+
+def test_match(index):
+    """should match the packages by the advisory filter"""
+    names = ["foo", "bar", "baz", "noadv"]
+    assert [name for name in names if index.match(name, AdvisoryFilter.ALL)] == names
+    assert [name for name in names if index.match(name, AdvisoryFilter.SECURITY)] == ["foo", "baz"]
+    assert [name for name in names if index.match(name, AdvisoryFilter.CRITICAL)] == ["baz"]
+
+
+def test_advisory_index(backend, pkg, pkg_other):
+    """should get the advisories for all the updates in one call, and use them for the update info"""
+    advisory = {
+        "name": "FEDORA-2025-1",
+        "title": "update",
+        "description": "update",
+        "type": "security",
+        "severity": "Critical",
+        "buildtime": 1735689600,
+        "references": [],
+        "collections": [{"packages": [{"n": pkg.name, "e": "0", "v": "1", "r": "1", "a": "noarch"}]}],
+    }
+    backend.client.advisory_list = MagicMock(return_value=([advisory], None))
+    backend.advisory_index = backend._get_advisory_index([pkg, pkg_other])
+    assert backend.client.advisory_list.call_count == 1
+    assert backend.get_package_info(pkg, InfoType.UPDATE_INFO)[0]["id"] == "FEDORA-2025-1"
+    assert backend.get_package_info(pkg_other, InfoType.UPDATE_INFO) == []
+    assert backend.client.advisory_list.call_count == 1
+    assert backend.get_advisory_summary(pkg).severity == "Critical"
+    assert backend.match_advisory(pkg, AdvisoryFilter.CRITICAL)
+    assert not backend.match_advisory(pkg_other, AdvisoryFilter.SECURITY)
@@ -1,12 +1,15 @@
 import pytest
 
 from typing import Generator
+from unittest.mock import MagicMock
 
 from tests.mock import mock_package_backend
 
-from yumex.backend.cache import YumexPackageCache
+from yumex.backend.cache import PackageInfoCache, YumexPackageCache, package_size
+from yumex.backend.dnf5daemon import InfoStats
 from yumex.backend.dnf import YumexPackage
-from yumex.utils.enums import PackageFilter, PackageState
+from yumex.utils.columns import PackageColumns
+from yumex.utils.enums import InfoType, PackageFilter, PackageState
 
 
 def test_get_package(pkg, pkg_dict):
@@ -92,3 +95,209 @@ def test_get_packages_by_filter_reset():
     assert id(po1) == id(po2)
     # on reset the packages is reloaded from backend
     assert backend.get_packages.call_count == 2
+
+
+def test_get_packages_by_filter_columns(pkg, pkg_other, pkg_dict):
+    """should use the cached package objects in columns from the backend"""
+    backend = mock_package_backend()
+    cache = YumexPackageCache(backend)
+    pkg.state = PackageState.INSTALLED
+    cached = cache.get_package(pkg)
+    update = YumexPackage(**pkg_dict)
+    update.set_state(PackageState.UPDATE)
+    backend.get_packages.return_value = PackageColumns.from_packages([update, pkg_other])
+    res = cache.get_packages_by_filter(PackageFilter.UPDATES)
+    assert isinstance(res, PackageColumns)
+    assert res[0] is cached
+    assert cached.state == PackageState.UPDATE
+
+
+def test_stream_packages_by_filter(pkg, pkg_other, pkg_upd, monkeypatch):
+    """should add the chunks from the backend in the main thread and cache the packages at the end"""
+    from yumex.backend import cache as cache_module
+
+    idle = []
+    monkeypatch.setattr(cache_module.GLib, "idle_add", lambda func, *args: idle.append((func, args)))
+    backend = mock_package_backend()
+    chunks = [PackageColumns.from_packages([pkg, pkg_other]), PackageColumns.from_packages([pkg_upd])]
+    backend.stream_packages.return_value = iter(chunks)
+    backend.can_stream_packages.return_value = True
+    cache = YumexPackageCache(backend)
+    cached = cache.get_package(pkg_upd)
+    assert cache.can_stream_packages(PackageFilter.AVAILABLE)
+    stream = cache.stream_packages_by_filter(PackageFilter.AVAILABLE)
+    columns = next(stream)
+    # nothing is changed in the thread
+    assert len(columns) == 0
+    assert list(stream) == [columns]
+    assert cache.can_stream_packages(PackageFilter.AVAILABLE)
+    for func, args in idle:
+        func(*args)
+    assert [p.nevra for p in columns] == [pkg.nevra, pkg_other.nevra, pkg_upd.nevra]
+    assert columns[2] is cached
+    assert not cache.can_stream_packages(PackageFilter.AVAILABLE)
+    assert cache.get_packages_by_filter(PackageFilter.AVAILABLE) is columns
+    backend.get_packages.assert_not_called()
+
+
+def test_forget(pkg, pkg_other, pkg_upd, pkg_dict, pkg_other_dict):
+    """should forget the package lists and the packages changed by a transaction"""
+    backend = mock_package_backend()
+    cache = YumexPackageCache(backend)
+    backend.get_packages.return_value = [pkg, pkg_other]
+    cache.get_packages_by_filter(PackageFilter.INSTALLED)
+    queued = cache.get_package(pkg_upd)
+    queued.queued = True
+    cache.forget({(pkg.name, pkg.arch)})
+    assert len(cache) == 1
+    assert cache.size == package_size(pkg_other)
+    assert cache.stats()["pinned"] == 0
+    # the package lists is fetched again, the unchanged packages is kept
+    backend.get_packages.return_value = [YumexPackage(**pkg_dict), YumexPackage(**pkg_other_dict)]
+    res = cache.get_packages_by_filter(PackageFilter.INSTALLED)
+    assert res[0] is not pkg
+    assert res[1] is pkg_other
+
+
+def make_packages(pkg_dict: dict, prefix: str, count: int) -> list[YumexPackage]:
+    return [YumexPackage(**(pkg_dict | {"name": f"{prefix}{ndx}"})) for ndx in range(count)]
+
+
+def test_package_cache_eviction(pkg_dict):
+    """should evict the least recently used packages, there is not queued, listed or visible"""
+    backend = mock_package_backend()
+    listed = make_packages(pkg_dict, "listed", 5)
+    backend.get_packages.return_value = listed
+    cache = YumexPackageCache(backend, max_entries=10)
+    cache.get_packages_by_filter(PackageFilter.UPDATES)
+    queued = cache.get_package(YumexPackage(**(pkg_dict | {"name": "queued"})))
+    cache.set_queued([queued])
+    visible = list(cache.get_packages(make_packages(pkg_dict, "visible", 3), visible=True))
+    first = list(cache.get_packages(make_packages(pkg_dict, "search0-", 4)))
+    for ndx in range(1, 5):
+        searched = list(cache.get_packages(make_packages(pkg_dict, f"search{ndx}-", 4)))
+    assert len(cache) <= 10 + len(listed) + len(visible) + 1
+    assert all(cache.get_package(pkg) is pkg for pkg in [*listed, queued, *visible])
+    # the newest search result is still cached
+    assert cache.get_package(YumexPackage(**(pkg_dict | {"name": "search4-3"}))) is searched[-1]
+    # the oldest search result is evicted
+    assert cache.get_package(YumexPackage(**(pkg_dict | {"name": "search0-0"}))) is not first[0]
+    stats = cache.stats()
+    assert stats["evictions"] > 0
+    assert stats["hits"] == len(listed) + 1 + len(visible) + 1
+    assert stats["misses"] == len(listed) + 1 + len(visible) + 5 * 4 + 1
+
+
+def test_package_cache_pinned(pkg_dict):
+    """should count the pinned packages, when they are pinned and unpinned"""
+    cache = YumexPackageCache(None, max_entries=10)
+    visible = list(cache.get_packages(make_packages(pkg_dict, "visible", 3), visible=True))
+    cache.set_queued(visible[:1])
+    assert cache.stats()["pinned"] == 3
+    assert cache._pinned_size == sum(package_size(pkg) for pkg in visible)
+    # the view shows other packages, the queued package is still pinned
+    shown = list(cache.get_packages(make_packages(pkg_dict, "search", 2), visible=True))
+    assert cache.stats()["pinned"] == 3
+    cache.set_queued([])
+    assert cache.stats()["pinned"] == 2
+    assert cache._pinned_size == sum(package_size(pkg) for pkg in shown)
+
+
+def test_package_cache_unbounded(pkg_dict, monkeypatch):
+    """should not evict packages by the number of packages, when max_entries is 0"""
+    cache = YumexPackageCache(None, max_entries=0)
+    monkeypatch.setattr(cache, "_evict", lambda: pytest.fail("evicted"))
+    list(cache.get_packages(make_packages(pkg_dict, "search", 100)))
+    assert len(cache) == 100
+
+
+def test_package_cache_bytes(pkg_dict):
+    """should evict packages, when the estimated size is too big"""
+    cache = YumexPackageCache(None, max_entries=1000, max_bytes=package_size(YumexPackage(**pkg_dict)) * 10)
+    list(cache.get_packages(make_packages(pkg_dict, "search", 50)))
+    assert len(cache) <= 11
+    assert cache.size <= cache.max_bytes + package_size(YumexPackage(**pkg_dict))
+
+
+def test_info_cache_lru():
+    """should evict the least recently used package info"""
+    cache = PackageInfoCache(max_entries=2)
+    cache.put("a-1-1.noarch", InfoType.DESCRIPTION, "a")
+    cache.put("b-1-1.noarch", InfoType.DESCRIPTION, "b")
+    assert cache.get("a-1-1.noarch", InfoType.DESCRIPTION) == "a"
+    cache.put("c-1-1.noarch", InfoType.DESCRIPTION, "c")
+    assert ("b-1-1.noarch", InfoType.DESCRIPTION) not in cache
+    assert cache.get("b-1-1.noarch", InfoType.DESCRIPTION) is None
+    assert len(cache) == 2
+    assert cache.missing(["a-1-1.noarch", "b-1-1.noarch"], InfoType.DESCRIPTION) == ["b-1-1.noarch"]
+    assert cache.missing(["a-1-1.noarch"], InfoType.FILES) == ["a-1-1.noarch"]
+
+
+def test_info_cache_size():
+    """should evict package info when the estimated size is too big, and not cache too big values"""
+    cache = PackageInfoCache(max_entries=100, max_bytes=4000)
+    for ndx in range(10):
+        cache.put(f"pkg{ndx}-1-1.noarch", InfoType.FILES, [f"/usr/bin/file{ndx}"] * 5)
+    assert cache.size <= 4000
+    assert ("pkg9-1-1.noarch", InfoType.FILES) in cache
+    assert ("pkg0-1-1.noarch", InfoType.FILES) not in cache
+    cache.put("big-1-1.noarch", InfoType.FILES, ["/usr/share/file"] * 1000)
+    assert ("big-1-1.noarch", InfoType.FILES) not in cache
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.size == 0
+
+
+def test_prefetch_package_info(backend, pkg, pkg_other):
+    """should fetch the description and update info for all the packages in one call each"""
+    backend.client.package_list_fd = MagicMock(return_value=[{"name": pkg.name, "evr": pkg.evr, "arch": pkg.arch, "description": "the description"}])
+    advisory = {
+        "name": "FEDORA-2025-1",
+        "title": "update",
+        "description": "update",
+        "severity": "None",
+        "buildtime": 1735689600,
+        "references": [],
+        "collections": [{"packages": [{"n": pkg_other.name, "e": "0", "v": "1", "r": "1", "a": "noarch"}]}],
+    }
+    backend.client.advisory_list = MagicMock(return_value=([advisory], None))
+    backend.prefetch_package_info([pkg, pkg_other])
+    assert backend.client.package_list_fd.call_count == 1
+    assert backend.client.advisory_list.call_count == 1
+    assert backend.get_cached_package_info(pkg, InfoType.DESCRIPTION) == "the description"
+    assert backend.get_cached_package_info(pkg_other, InfoType.DESCRIPTION) is None
+    assert backend.get_cached_package_info(pkg, InfoType.UPDATE_INFO) == []
+    assert backend.get_cached_package_info(pkg_other, InfoType.UPDATE_INFO)[0]["id"] == "FEDORA-2025-1"
+    # the cached info is used, without calling dnf5daemon again
+    assert backend.get_package_info(pkg, InfoType.DESCRIPTION) == "the description"
+    backend.prefetch_package_info([pkg])
+    assert backend.client.package_list_fd.call_count == 1
+
+
+def test_package_info_one_call(backend, pkg):
+    """should get all the package info attributes in one call, and format the changelog when it is used"""
+    info = {
+        "nevra": pkg.nevra,
+        "description": "the description",
+        "files": ["/usr/bin/mypkg"],
+        "changelogs": [(1735689600, "Joe <joe@example.com> - 1-1.0", "- first build")],
+        "provides": [],
+    }
+
+    def package_list_fd(*args, **kwargs):
+        kwargs["transfer"].bytes_decoded = 100
+        return [info]
+
+    backend.client.package_list_fd = MagicMock(side_effect=package_list_fd)
+    assert backend.get_package_info(pkg, InfoType.FILES) == ["/usr/bin/mypkg"]
+    backend.client.package_list_fd.assert_called_once()
+    attrs = backend.client.package_list_fd.call_args.kwargs["package_attrs"]
+    assert set(attrs) == {"nevra", "files", "description", "changelogs", "provides", "requires"}
+    assert backend.get_package_info(pkg, InfoType.DESCRIPTION) == "the description"
+    assert backend.get_package_info(pkg, InfoType.REQUIRES) == []
+    assert backend.info_cache.get(pkg.nevra, InfoType.CHANGELOG) == info["changelogs"]
+    changelog = backend.get_package_info(pkg, InfoType.CHANGELOG)
+    assert len(changelog) == 1
+    assert changelog[0].startswith("* ") and changelog[0].endswith("Joe <joe@example.com> - 1-1.0\n- first build")
+    assert backend.client.package_list_fd.call_count == 1
+    assert backend.info_stats == InfoStats(calls=1, bytes=100)
@@ -0,0 +1,139 @@
+import gc
+
+import pytest
+
+from yumex.backend.dnf import YumexPackage
+from yumex.utils.columns import PackageColumns
+from yumex.utils.enums import PackageState, SortType
+
+
+@pytest.fixture
+def daemon_pkg() -> dict:
+    return {
+        "name": "mypkg",
+        "evr": "2:1.2-3.fc42",
+        "arch": "x86_64",
+        "repo_id": "fedora",
+        "summary": "desc",
+        "install_size": 2048,
+        "is_installed": True,
+    }
+
+
+@pytest.fixture
+def columns(pkg, pkg_other) -> PackageColumns:
+    return PackageColumns.from_packages([pkg, pkg_other])
+
+
+def test_columns_from_packages(columns: PackageColumns, pkg, pkg_other):
+    """should create equal package objects for the rows"""
+    assert len(columns) == 2
+    assert list(columns) == [pkg, pkg_other]
+    po = columns[1]
+    assert isinstance(po, YumexPackage)
+    assert po is not pkg_other
+    assert (po.repo, po.size, po.description) == (pkg_other.repo, pkg_other.size, pkg_other.description)
+
+
+def test_columns_append_dict(daemon_pkg):
+    """should split the evr and set the state like create_package"""
+    columns = PackageColumns()
+    row = columns.append_dict(daemon_pkg)
+    po = columns.get_package(row)
+    assert (po.epoch, po.version, po.release) == ("2", "1.2", "3.fc42")
+    assert po.nevra == "mypkg-2:1.2-3.fc42.x86_64"
+    assert po.repo == "fedora"
+    assert po.size == 2048
+    assert po.state == PackageState.INSTALLED
+    assert columns.nevra(row) == po.nevra
+
+
+def test_columns_intern_strings(pkg, pkg_other):
+    """should only store each string once"""
+    columns = PackageColumns.from_packages([pkg, pkg_other, pkg])
+    assert columns.name[0] == columns.name[2]
+    assert columns.version[0] == columns.version[1]
+    assert len(columns._strings) == len(set(columns._strings))
+
+
+def test_columns_same_object_while_in_use(columns: PackageColumns):
+    """should return the same object for a row, as long as it is in use"""
+    po = columns[0]
+    po.queued = True
+    assert columns[0] is po
+    del po
+    gc.collect()
+    assert columns[0].queued is False
+
+
+def test_columns_keep(pkg, pkg_other):
+    """should use the given package objects, when they are kept"""
+    columns = PackageColumns.from_packages([pkg, pkg_other], keep=True)
+    assert columns[0] is pkg
+    assert columns[1] is pkg_other
+
+
+def test_columns_find(columns: PackageColumns, pkg, pkg_other, pkg_upd):
+    """should find the row of a package by nevra"""
+    assert columns.find(pkg_other.nevra) == 1
+    assert columns.find(pkg_upd.nevra) is None
+    row = columns.append_package(pkg_upd)
+    assert columns.find(pkg_upd.nevra) == row
+
+
+def test_columns_set_package(columns: PackageColumns, pkg_dict):
+    """should use a shared package object for a row"""
+    shared = YumexPackage(**pkg_dict)
+    shared.state = PackageState.INSTALLED
+    columns.set_package(0, shared)
+    assert columns[0] is shared
+    assert columns.state[0] == PackageState.INSTALLED
+
+
+def test_columns_copy(columns: PackageColumns, pkg_upd):
+    """should not change the original columns, when adding to a copy"""
+    copy = columns.copy()
+    copy.append_package(pkg_upd)
+    assert len(copy) == 3
+    assert len(columns) == 2
+    assert columns.find(pkg_upd.nevra) is None
+
+
+def test_columns_extend(columns: PackageColumns, pkg, pkg_upd):
+    """should add the rows from other columns, with the strings and shared package objects"""
+    assert columns.find(pkg.nevra) == 0
+    assert list(columns.sorted_rows(SortType.NAME)) == [0, 1]
+    chunk = PackageColumns.from_packages([pkg_upd], keep=True)
+    columns.extend(chunk)
+    assert len(columns) == 3
+    assert columns[2] is pkg_upd
+    assert columns.nevra(2) == pkg_upd.nevra
+    assert columns.find(pkg_upd.nevra) == 2
+    assert columns.state[2] == pkg_upd.state
+    assert len(columns.sorted_rows(SortType.NAME)) == 3
+
+
+def test_columns_index_error(columns: PackageColumns):
+    """should raise IndexError for rows out of range"""
+    with pytest.raises(IndexError):
+        columns[2]
+    assert columns[-1].name == "otherpkg"
+
+
+def test_columns_sorted_rows(pkg, pkg_other, pkg_upd):
+    """should sort the rows by the SortType and cache the result until a row is added"""
+    columns = PackageColumns.from_packages([pkg_other, pkg])
+    assert list(columns.sorted_rows(SortType.NAME)) == [1, 0]
+    assert list(columns.sorted_rows(SortType.REPO)) == [0, 1]
+    assert columns.sorted_rows(SortType.NAME) is columns.sorted_rows(SortType.NAME)
+    columns.append_package(pkg_upd)
+    assert list(columns.sorted_rows(SortType.NAME)) == [1, 2, 0]
+    assert list(columns.sorted_rows(SortType.SIZE)) == [0, 2, 1]
+
+
+def test_columns_sorted_rows_casefold():
+    """should sort names without case"""
+    columns = PackageColumns()
+    for name in ("beta", "Alpha", "gamma"):
+        columns.append(name, "", "1", "1", "noarch", "repo", "", 0, PackageState.AVAILABLE)
+    assert list(columns.sorted_rows(SortType.NAME)) == [1, 0, 2]
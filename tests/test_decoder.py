@@ -0,0 +1,97 @@
+import json
+import random
+
+import pytest
+
+from yumex.backend.dnf5daemon.decoder import JsonStreamDecoder
+
+
+@pytest.fixture
+def records() -> list[dict]:
+    return [
+        {"name": "mypkg", "evr": "1-1.0", "arch": "x86_64", "summary": "desc"},
+        {"name": "otherpkg", "evr": "2:1.2-3.fc42", "arch": "noarch", "summary": "Æble grød på dansk"},
+        {"name": "unicode", "evr": "1-1", "arch": "noarch", "summary": "日本語のパッケージ 🚀"},
+    ]
+
+
+def payload(records: list[dict], sep: str = "\n") -> bytes:
+    return "".join(json.dumps(rec, ensure_ascii=False) + sep for rec in records).encode()
+
+
+def decode(data: bytes, chunk_sizes) -> list[dict]:
+    decoder = JsonStreamDecoder()
+    result = []
+    pos = 0
+    for size in chunk_sizes:
+        if pos >= len(data):
+            break
+        result.extend(decoder.feed(data[pos : pos + size]))
+        pos += size
+    result.extend(decoder.feed(data[pos:]))
+    result.extend(decoder.close())
+    return result
+
+
+def test_decode_single_chunk(records):
+    """should decode all records from a single chunk"""
+    assert decode(payload(records), []) == records
+
+
+def test_decode_byte_by_byte(records):
+    """should decode records split in the middle of multibyte characters"""
+    data = payload(records)
+    assert decode(data, [1] * len(data)) == records
+
+
+def test_decode_random_chunks(records):
+    """should decode the same records independent of the chunk sizes"""
+    data = payload(records * 50)
+    rnd = random.Random(42)
+    chunks = [rnd.randint(1, 64) for _ in range(len(data))]
+    assert decode(data, chunks) == records * 50
+
+
+def test_decode_no_trailing_newline(records):
+    """should decode the last record when the stream ends without a newline"""
+    data = payload(records)[:-1]
+    assert decode(data, [7] * len(data)) == records
+
+
+def test_decode_concatenated(records):
+    """should decode objects without line separators"""
+    data = payload(records, sep="")
+    assert decode(data, [5] * len(data)) == records
+
+
+def test_decode_counters(records):
+    """should count the decoded records and bytes"""
+    data = payload(records)
+    decoder = JsonStreamDecoder()
+    list(decoder.feed(data))
+    assert decoder.records == len(records)
+    assert decoder.bytes_decoded == len(data)
+
+
+def test_decode_empty_lines(records):
+    """should skip empty lines"""
+    data = payload(records, sep="\n\n  \n")
+    assert decode(data, [3] * len(data)) == records
+
+
+def test_decode_record_with_line_ends(records):
+    """should decode records with line ends in them, also when split in two chunks"""
+    data = "".join(json.dumps(rec, ensure_ascii=False, indent=2) + "\n" for rec in records).encode()
+    split = data.index(b'"arch"')
+    assert decode(data, [split]) == records
+    assert decode(data, [5] * len(data)) == records
+    decoder = JsonStreamDecoder()
+    assert list(decoder.feed(data[:split])) == []
+    assert list(decoder.feed(data[split:])) == records
+    assert decoder.bytes_decoded == len(data)
+
+
+def test_decode_malformed(records):
+    """should skip a malformed record, and decode the records after it"""
+    data = payload(records[:1]) + b'{"name": "broken", "evr"}\n' + payload(records[1:])
+    assert decode(data, [len(data)]) == records
@@ -0,0 +1,192 @@
+from unittest.mock import MagicMock
+
+from yumex.backend.dnf5daemon import YumexPackageBackend
+from yumex.backend.dnf5daemon.delta import TransactionDelta, checksum, installed_state_matches, nevra
+from yumex.utils.enums import InfoType, PackageFilter
+
+
+def pkg(name: str, evr: str, repo_id: str = "fedora", is_installed: bool = False, arch: str = "x86_64") -> dict:
+    return {
+        "name": name,
+        "evr": evr,
+        "arch": arch,
+        "repo_id": repo_id,
+        "summary": f"{name} summary",
+        "install_size": 1000,
+        "is_installed": is_installed,
+    }
+
+
+def item(action: str, name: str, evr: str, arch: str = "x86_64") -> tuple:
+    attrs = {"name": name, "evr": evr, "arch": arch, "repo_id": "updates", "install_size": 2000, "package_size": 500}
+    return ("Package", action, "User", {}, attrs)
+
+
+INSTALLED = [pkg("foo", "1.0-1", "@System", True), pkg("bar", "2.0-1", "@System", True), pkg("baz", "1.0-1", "@System", True)]
+AVAILABLE = [
+    pkg("foo", "1.0-1", is_installed=True),
+    pkg("foo", "1.10-1", "updates"),
+    pkg("bar", "2.0-1", is_installed=True),
+    pkg("baz", "1.0-1", is_installed=True),
+    pkg("qux", "3.0-1"),
+]
+UPGRADES = [pkg("foo", "1.10-1", "updates")]
+
+
+def test_upgrade():
+    """should replace the installed package and remove the upgrade"""
+    delta = TransactionDelta([item("Upgrade", "foo", "1.10-1"), item("Replaced", "foo", "1.0-1")])
+    assert len(delta) == 2
+    installed = delta.apply_installed(INSTALLED, AVAILABLE)
+    foo = [p for p in installed if p["name"] == "foo"]
+    assert foo == [pkg("foo", "1.10-1", "@System", True) | {"install_size": 2000}]
+    assert len(installed) == 3
+    available = delta.apply_available(AVAILABLE)
+    assert [p["evr"] for p in available if p["name"] == "foo" and p["is_installed"]] == ["1.10-1"]
+    assert delta.apply_upgrades(UPGRADES, installed, available) == []
+    # the package lists is not changed
+    assert INSTALLED[0]["evr"] == "1.0-1" and AVAILABLE[0]["is_installed"]
+
+
+def test_install_and_remove():
+    """should add the installed packages and drop the removed packages"""
+    delta = TransactionDelta([item("Install", "qux", "3.0-1"), item("Remove", "baz", "1.0-1")])
+    installed = delta.apply_installed(INSTALLED, AVAILABLE)
+    assert sorted(p["name"] for p in installed) == ["bar", "foo", "qux"]
+    assert next(p for p in installed if p["name"] == "qux")["summary"] == "qux summary"
+    available = delta.apply_available(AVAILABLE)
+    state = {p["name"]: p["is_installed"] for p in available if p["evr"] != "1.10-1"}
+    assert state == {"foo": True, "bar": True, "baz": False, "qux": True}
+    assert delta.apply_upgrades(UPGRADES, installed, available) == UPGRADES
+
+
+def test_downgrade():
+    """should add an upgrade for a downgraded package"""
+    installed = [pkg("foo", "1.10-1", "@System", True)]
+    available = [pkg("foo", "1.0-1"), pkg("foo", "1.10-1", "updates", True)]
+    delta = TransactionDelta([item("Downgrade", "foo", "1.0-1"), item("Replaced", "foo", "1.10-1")])
+    installed = delta.apply_installed(installed, available)
+    assert [p["evr"] for p in installed] == ["1.0-1"]
+    available = delta.apply_available(available)
+    assert [p["is_installed"] for p in available] == [True, False]
+    assert [p["evr"] for p in delta.apply_upgrades([], installed, available)] == ["1.10-1"]
+
+
+def test_reinstall():
+    """should keep a reinstalled package installed"""
+    delta = TransactionDelta([item("Reinstall", "bar", "2.0-1"), item("Remove", "bar", "2.0-1")])
+    assert len(delta.removed) == 0
+    installed = delta.apply_installed(INSTALLED, None)
+    assert sorted(p["name"] for p in installed) == ["bar", "baz", "foo"]
+    # the summary is not known without the available packages
+    assert next(p for p in installed if p["name"] == "bar")["summary"] == ""
+
+
+def test_ignored_actions():
+    """should ignore actions, there don't change the installed packages"""
+    delta = TransactionDelta([item("Reason Change", "bar", "2.0-1")])
+    assert len(delta) == 0
+
+
+def test_installonly():
+    """should keep the other installed versions of a name.arch"""
+    installed = [pkg("kernel", "6.1-1", "@System", True), pkg("kernel", "6.2-1", "@System", True)]
+    available = [pkg("kernel", "6.2-1", is_installed=True), pkg("kernel", "6.3-1", "updates")]
+    delta = TransactionDelta([item("Install", "kernel", "6.3-1"), item("Remove", "kernel", "6.1-1")])
+    installed = delta.apply_installed(installed, available)
+    assert [p["evr"] for p in installed] == ["6.2-1", "6.3-1"]
+    available = delta.apply_available(available)
+    assert [p["is_installed"] for p in available] == [True, True]
+    assert delta.apply_upgrades([pkg("kernel", "6.3-1", "updates")], installed, available) == []
+
+
+def test_checksum():
+    """should compare the package lists by count and hash of the nevras, in any order"""
+    assert checksum(nevra(p) for p in INSTALLED) == checksum(reversed([nevra(p) for p in INSTALLED]))
+    assert checksum(nevra(p) for p in INSTALLED) != checksum(nevra(p) for p in INSTALLED[1:])
+    installed = {nevra(p) for p in INSTALLED}
+    assert installed_state_matches(AVAILABLE, installed)
+    assert not installed_state_matches(AVAILABLE, installed - {"foo-1.0-1.x86_64"})
+
+
+def transaction_backend(backend, sections: dict) -> YumexPackageBackend:
+    backend.snapshot.get.side_effect = sections.get
+    # a snapshot with a new key has only the saved sections
+    backend.snapshot.save.side_effect = lambda key, saved: sections.clear() or sections.update(saved)
+    backend._installed_evr = {}
+    backend._fetched = {"installed", "available", "upgrades"}
+    backend.info_cache.put("bar-1-1.noarch", InfoType.DESCRIPTION, "bar")
+    backend.prefetch_package_lists = MagicMock()
+    return backend
+
+
+def transaction_content(name: str, evr: str) -> list:
+    pkg_attrs = {"name": name, "evr": evr, "arch": "noarch", "repo_id": "fedora", "install_size": 10, "package_size": 5}
+    return [("Package", "Install", "User", {}, pkg_attrs)]
+
+
+def test_reset_applies_transaction(backend):
+    """should apply the transaction to the package lists, without fetching them again"""
+    installed = [{"name": "foo", "evr": "1-1", "arch": "noarch", "repo_id": "@System", "summary": "", "install_size": 1, "is_installed": True}]
+    available = [{"name": "bar", "evr": "1-1", "arch": "noarch", "repo_id": "fedora", "summary": "bar", "install_size": 10, "is_installed": False}]
+    transaction_backend(backend, {"installed": installed, "available": available, "upgrades": []})
+    backend.client.package_list_fd = MagicMock(return_value=[])
+    backend._transaction_content = transaction_content("bar", "1-1")
+    backend.reset()
+    backend.client.package_list_fd.assert_not_called()
+    backend.client.session_base.reset.assert_called_once()
+    key, sections = backend.snapshot.save.call_args.args
+    assert key == "key"
+    assert [pkg["name"] for pkg in sections["installed"]] == ["foo", "bar"]
+    assert sections["available"][0]["is_installed"]
+    assert backend._transaction_content is None
+    assert backend.applied_delta.touched == {("bar", "noarch")}
+    assert backend._fetched == {"installed", "available", "upgrades"}
+    assert backend._installed_evr == {"foo": "1-1", "bar": "1-1"}
+    assert backend.info_cache.get("bar-1-1.noarch", InfoType.DESCRIPTION) == "bar"
+    # the updated lists is checked with the nevras from dnf5daemon in the background
+    assert backend.has_snapshot_data()
+    nevras = {"installed": [{"nevra": "foo-1-1.noarch"}, {"nevra": "bar-1-1.noarch"}], "upgrades": []}
+    backend.client.package_list_fd.side_effect = lambda *args, scope, **kwargs: nevras[scope]
+    assert backend.reconcile_snapshot() == []
+    assert [call.kwargs["package_attrs"] for call in backend.client.package_list_fd.call_args_list] == [["nevra"], ["nevra"]]
+    assert backend.client.package_list_fd.call_args_list[0].kwargs["latest_limit"] == 0
+    assert not backend.has_snapshot_data()
+
+
+def test_reset_transaction_mismatch(backend):
+    """should reload the packages in the background, if they don't match dnf5daemon after the transaction"""
+    installed = [{"name": "foo", "evr": "1-1", "arch": "noarch", "repo_id": "@System", "summary": "", "install_size": 1, "is_installed": True}]
+    available = [{"name": "bar", "evr": "1-1", "arch": "noarch", "repo_id": "fedora", "summary": "bar", "install_size": 10, "is_installed": False}]
+    transaction_backend(backend, {"installed": installed, "available": available})
+    backend.client.package_list_fd = MagicMock(return_value=[])
+    backend._transaction_content = transaction_content("bar", "1-1")
+    backend.reset()
+    backend.client.package_list_fd.assert_not_called()
+    assert backend.has_snapshot_data()
+    # the transaction has not installed bar
+    assert backend.reconcile_snapshot() == [PackageFilter.INSTALLED, PackageFilter.AVAILABLE]
+    assert backend.installed == []
+    assert backend.available == []
+
+
+def test_verify_available(backend):
+    """should reload the available packages, if their installed state don't match dnf5daemon after the transaction"""
+    installed = [{"name": "foo", "evr": "1-1", "arch": "noarch", "repo_id": "@System", "summary": "", "install_size": 1, "is_installed": True}]
+    available = [{"name": "foo", "evr": "1-1", "arch": "noarch", "repo_id": "fedora", "summary": "", "install_size": 1, "is_installed": False}]
+    transaction_backend(backend, {"installed": installed, "available": available})
+    backend._verify_delta_pending = True
+    nevras = {"installed": [{"nevra": "foo-1-1.noarch"}], "upgrades": []}
+    backend.client.package_list_fd = MagicMock(side_effect=lambda *args, scope, **kwargs: nevras[scope])
+    assert backend._verify_delta() == ["available"]
+
+
+def test_reset_without_transaction(backend):
+    """should reload the package lists, when there is no transaction to apply"""
+    transaction_backend(backend, {"installed": []})
+    backend.applied_delta = MagicMock()
+    backend.reset()
+    assert backend.applied_delta is None
+    backend.snapshot.invalidate.assert_called_once()
+    assert backend._fetched == set()
+    assert backend.info_cache.get("bar-1-1.noarch", InfoType.DESCRIPTION) is None
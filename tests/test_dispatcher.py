@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+
+import pytest
+
+from yumex.backend.dnf5daemon.dispatcher import DBusDispatcher
+
+
+class FakeService:
+    """fake dnf5daemon interface, the methods reply after the given latency"""
+
+    def __init__(self) -> None:
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def echo(self, value, latency: float, timeout=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(latency)
+        with self._lock:
+            self.active -= 1
+        return value
+
+    def fail(self, msg: str, timeout=None):
+        raise RuntimeError(msg)
+
+
+@pytest.fixture
+def dispatcher():
+    dispatcher = DBusDispatcher(max_workers=16)
+    yield dispatcher
+    dispatcher.shutdown()
+
+
+def test_call(dispatcher):
+    """should return the result and no error"""
+    res, err = dispatcher.call(FakeService().echo, (1, "two"), 0)
+    assert res == (1, "two")
+    assert err is None
+
+
+def test_call_error(dispatcher):
+    """should return the exception as error"""
+    res, err = dispatcher.call(FakeService().fail, "something strange")
+    assert res is None
+    assert isinstance(err, RuntimeError)
+
+
+def test_call_timeout(dispatcher):
+    """should return a TimeoutError and cancel the call, when the timeout is reached"""
+    t_start = time.monotonic()
+    res, err = dispatcher.call(FakeService().echo, "slow", 0.5, timeout=0.05)
+    assert time.monotonic() - t_start < 0.4
+    assert res is None
+    assert isinstance(err, TimeoutError)
+
+
+def test_cancel(dispatcher):
+    """should ignore the reply to a cancelled call"""
+    call = dispatcher.submit(FakeService().echo, "cancel me", 0.2)
+    assert dispatcher.pending == 1
+    assert dispatcher.cancel_all() == 1
+    assert call.cancelled()
+    assert dispatcher.pending == 0
+    time.sleep(0.3)
+    assert call.cancelled()
+
+
+def test_concurrent_calls(dispatcher):
+    """should keep the results apart, with hundreds of calls from many threads"""
+    service = FakeService()
+    rnd = random.Random(42)
+    latencies = [rnd.uniform(0, 0.02) for _ in range(400)]
+    results = {}
+    errors = []
+
+    def worker(ndx_list):
+        for ndx in ndx_list:
+            call = dispatcher.submit(service.echo, {"ndx": ndx}, latencies[ndx])
+            try:
+                res = dispatcher.wait(call, timeout=10)
+            except Exception as e:
+                errors.append(e)
+                continue
+            results[ndx] = (res, call.latency)
+
+    threads = [threading.Thread(target=worker, args=(range(start, 400, 40),)) for start in range(40)]
+    t_start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.monotonic() - t_start
+    assert not errors
+    assert len(results) == 400
+    for ndx, (res, latency) in results.items():
+        assert res == {"ndx": ndx}
+        assert latency >= latencies[ndx]
+    # the calls is running concurrently
+    assert service.max_active > 1
+    assert duration < sum(latencies)
+    assert dispatcher.pending == 0
@@ -0,0 +1,176 @@
+import random
+
+import pytest
+
+from yumex.backend.dnf import YumexPackage
+from yumex.utils.enums import PackageState
+from yumex.utils.evr import compare_evr, compare_many, evr_key, rpmvercmp, version_key
+
+# the version comparison test corpus from rpm (tests/rpmvercmp.at)
+VERSIONS = """
+1.0 1.0 0
+1.0 2.0 -1
+2.0 1.0 1
+2.0.1 2.0.1 0
+2.0 2.0.1 -1
+2.0.1 2.0 1
+2.0.1a 2.0.1a 0
+2.0.1a 2.0.1 1
+2.0.1 2.0.1a -1
+5.5p1 5.5p1 0
+5.5p1 5.5p2 -1
+5.5p2 5.5p1 1
+5.5p10 5.5p10 0
+5.5p1 5.5p10 -1
+5.5p10 5.5p1 1
+10xyz 10.1xyz -1
+10.1xyz 10xyz 1
+xyz10 xyz10 0
+xyz10 xyz10.1 -1
+xyz10.1 xyz10 1
+xyz.4 xyz.4 0
+xyz.4 8 -1
+8 xyz.4 1
+xyz.4 2 -1
+2 xyz.4 1
+5.5p2 5.6p1 -1
+5.6p1 5.5p2 1
+5.6p1 6.5p1 -1
+6.5p1 5.6p1 1
+6.0.rc1 6.0 1
+6.0 6.0.rc1 -1
+10b2 10a1 1
+10a2 10b2 -1
+1.0aa 1.0aa 0
+1.0a 1.0aa -1
+1.0aa 1.0a 1
+10.0001 10.0001 0
+10.0001 10.1 0
+10.1 10.0001 0
+10.0001 10.0039 -1
+10.0039 10.0001 1
+4.999.9 5.0 -1
+5.0 4.999.9 1
+20101121 20101121 0
+20101121 20101122 -1
+20101122 20101121 1
+2_0 2_0 0
+2.0 2_0 0
+2_0 2.0 0
+a a 0
+a+ a+ 0
+a+ a_ 0
+a_ a+ 0
++a +a 0
++a _a 0
+_a +a 0
++_ +_ 0
+_+ +_ 0
+_+ _+ 0
++ _ 0
+_ + 0
+1.10 1.9 1
+1.9 1.10 -1
+1b.fc17 1b.fc17 0
+1b.fc17 1.fc17 -1
+1.fc17 1b.fc17 1
+1g.fc17 1g.fc17 0
+1g.fc17 1.fc17 1
+1.fc17 1g.fc17 -1
+1.0~rc1 1.0~rc1 0
+1.0~rc1 1.0 -1
+1.0 1.0~rc1 1
+1.0~rc1 1.0~rc2 -1
+1.0~rc2 1.0~rc1 1
+1.0~rc1~git123 1.0~rc1~git123 0
+1.0~rc1~git123 1.0~rc1 -1
+1.0~rc1 1.0~rc1~git123 1
+1.0^ 1.0^ 0
+1.0^ 1.0 1
+1.0 1.0^ -1
+1.0^git1 1.0^git1 0
+1.0^git1 1.0 1
+1.0 1.0^git1 -1
+1.0^git1 1.0^git2 -1
+1.0^git2 1.0^git1 1
+1.0^git1 1.01 -1
+1.01 1.0^git1 1
+1.0^20160101 1.0^20160101 0
+1.0^20160101 1.0.1 -1
+1.0.1 1.0^20160101 1
+1.0^20160101^git1 1.0^20160101^git1 0
+1.0^20160102 1.0^20160101^git1 1
+1.0^20160101^git1 1.0^20160102 -1
+1.0~rc1^git1 1.0~rc1^git1 0
+1.0~rc1^git1 1.0~rc1 1
+1.0~rc1 1.0~rc1^git1 -1
+1.0^git1~pre 1.0^git1~pre 0
+1.0^git1 1.0^git1~pre 1
+1.0^git1~pre 1.0^git1 -1
+"""
+
+CORPUS = [(one, two, int(result)) for one, two, result in (line.split() for line in VERSIONS.strip().splitlines())]
+
+
+def key_cmp(one: str, two: str) -> int:
+    key_one, key_two = version_key(one), version_key(two)
+    return (key_one > key_two) - (key_one < key_two)
+
+
+@pytest.mark.parametrize("one,two,expected", CORPUS)
+def test_rpmvercmp(one, two, expected):
+    """should compare the versions as rpm does"""
+    assert rpmvercmp(one, two) == expected
+    assert key_cmp(one, two) == expected
+
+
+def test_version_key_random():
+    """should give the same result as rpmvercmp, for random versions"""
+    rnd = random.Random(42)
+    chars = "0012ab.~^_"
+    versions = ["".join(rnd.choices(chars, k=rnd.randint(0, 8))) for _ in range(500)]
+    for one, two in zip(versions, reversed(versions)):
+        assert key_cmp(one, two) == rpmvercmp(one, two), (one, two)
+
+
+@pytest.mark.parametrize(
+    "one,two,expected",
+    [
+        ("1.10-1", "1.9-1", 1),
+        ("1.0-10.fc41", "1.0-9.fc41", 1),
+        ("1:1.0-1", "2.0-1", 1),
+        ("0:1.0-1", "1.0-1", 0),
+        ("1.0-1", "1:0.1-1", -1),
+        ("2.0~rc1-1", "2.0-1", -1),
+        ("2.0-1", "2.0", 1),
+    ],
+)
+def test_compare_evr(one, two, expected):
+    """should compare the epoch, version and release"""
+    assert compare_evr(one, two) == expected
+    assert compare_evr(two, one) == -expected
+
+
+def test_compare_many():
+    """should compare a batch of pairs the same way as one by one"""
+    pairs = [("1.10-1", "1.9-1"), ("1.0-1", "1.0-1"), ("1:1.0-1", "2:0.1-1")]
+    assert compare_many(pairs) == [1, 0, -1]
+    assert compare_many(pairs) == [compare_evr(one, two) for one, two in pairs]
+
+
+def test_evr_key_memoised():
+    """should return the same parsed key object for the same evr"""
+    assert evr_key("1.0-1.fc41") is evr_key("1.0-1.fc41")
+    assert evr_key("1.0-1") == (0, version_key("1.0"), version_key("1"))
+
+
+def test_check_for_installed(backend, pkg_dict):
+    """should compare the versions with the installed versions as rpm does"""
+    backend._installed_evr = {"mypkg": "1.9-1"}
+    newer = YumexPackage(**(pkg_dict | {"version": "1.10", "release": "1"}))
+    older = YumexPackage(**(pkg_dict | {"version": "1.9~rc1", "release": "1"}))
+    same = YumexPackage(**(pkg_dict | {"version": "1.9", "release": "1"}))
+    backend.check_for_installed([newer, older, same])
+    assert newer.state == PackageState.UPDATE
+    assert older.state == PackageState.DOWNGRADE
+    assert same.state == PackageState.AVAILABLE
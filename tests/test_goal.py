@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from yumex.backend.dnf import TransactionOptions
+from yumex.utils.enums import PackageTodo, TransactionCommand
+
+
+@pytest.fixture
+def goal_backend(backend):
+    backend.client.session_goal.get_transaction_problems_string.return_value = []
+    backend.client.resolve = MagicMock(return_value=(([], 0), None))
+    backend.client.do_transaction = MagicMock(return_value=(True, None))
+    return backend
+
+
+def test_run_resolved_goal(goal_backend, pkg, pkg_other):
+    """should run the goal resolved by build_transaction, without resolving it again"""
+    pkg.todo = PackageTodo.INSTALL
+    opts = TransactionOptions()
+    assert goal_backend.build_transaction([pkg, pkg_other], opts).completed
+    # offline is not used for the goal
+    opts.offline = True
+    assert goal_backend.run_transaction(opts).completed
+    goal_backend.client.resolve.assert_called_once()
+    goal_backend.client.do_transaction.assert_called_once_with({"offline": True})
+    assert (goal_backend.goal_stats.resolves, goal_backend.goal_stats.reused) == (1, 1)
+    assert goal_backend._resolved_goal is None
+
+
+def test_run_changed_goal(goal_backend, pkg):
+    """should resolve the goal again, when the packages, the options or the goal is changed since build_transaction"""
+    pkg.todo = PackageTodo.INSTALL
+    goal_backend.build_transaction([pkg], TransactionOptions())
+    pkg.todo = PackageTodo.REINSTALL
+    goal_backend.run_transaction(TransactionOptions())
+    assert goal_backend.client.resolve.call_count == 2
+    goal_backend.system_upgrade = MagicMock(return_value=(None, None))
+    goal_backend.build_transaction([pkg], TransactionOptions())
+    goal_backend.run_transaction(TransactionOptions(command=TransactionCommand.SYSTEM_UPGRADE, parameter="43"))
+    assert goal_backend.client.resolve.call_count == 4
+    # the goal is reset by a depsolve, after build_transaction
+    goal_backend.build_transaction([pkg], TransactionOptions())
+    goal_backend.depsolve([pkg])
+    goal_backend.run_transaction(TransactionOptions())
+    assert goal_backend.client.resolve.call_count == 7
+    assert goal_backend.goal_stats.reused == 0
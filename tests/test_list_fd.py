@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from yumex.backend.dnf5daemon.client import FINISHED_TRANSFERS_MAX, ListTransfer
+from yumex.utils.exceptions import YumexException
+
+
+class FakeRpm:
+    """fake Rpm interface, list_fd writes the records to the pipe in a thread"""
+
+    def __init__(self, client, records: list[bytes], success=True, error="") -> None:
+        self.client = client
+        self.records = records
+        self.success = success
+        self.error = error
+        self.written = 0
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def list_fd(self, options, pipe_w):
+        fd = os.dup(pipe_w)
+        threading.Thread(target=self._write, args=(fd,)).start()
+        return "transfer-1"
+
+    def _write(self, fd):
+        try:
+            for record in self.records:
+                self.proceed.wait()
+                os.write(fd, record)
+                self.written += len(record)
+        except BrokenPipeError:
+            pass
+        finally:
+            os.close(fd)
+        self.client.on_write_to_fd_finished("/read0", self.success, "transfer-1", self.error)
+
+
+def records(n: int) -> list[bytes]:
+    return [json.dumps({"name": f"pkg{i}", "evr": "1-1"}).encode() + b"\n" for i in range(n)]
+
+
+def test_list_fd(make_client):
+    """should yield all records and count the decoded bytes"""
+    client = make_client(1)
+    data = records(100)
+    session = client._read_pool[0]
+    session.rpm = FakeRpm(client, data)
+    transfer = ListTransfer()
+    pkgs = list(client._list_fd({}, transfer=transfer))
+    assert len(pkgs) == 100
+    assert transfer.records == 100
+    assert transfer.bytes_decoded == sum(len(record) for record in data)
+    assert client._transfers == {}
+
+
+def test_list_fd_cancel(make_client):
+    """should stop the transfer without yielding more records, when cancelled"""
+    client = make_client(1)
+    rpm = FakeRpm(client, records(1000))
+    client._read_pool[0].rpm = rpm
+    transfer = ListTransfer()
+    pkgs = []
+    for pkg in client._list_fd({}, transfer=transfer):
+        pkgs.append(pkg)
+        if len(pkgs) == 1:
+            rpm.proceed.clear()
+            transfer.cancel()
+            rpm.proceed.set()
+    assert len(pkgs) < 1000
+    assert transfer.cancelled
+
+
+def test_list_fd_cancelled_before_start(make_client):
+    """should not start a cancelled transfer"""
+    client = make_client(1)
+    client._read_pool[0].rpm = MagicMock()
+    transfer = ListTransfer()
+    transfer.cancel()
+    assert list(client._list_fd({}, transfer=transfer)) == []
+    client._read_pool[0].rpm.list_fd.assert_not_called()
+
+
+def test_list_fd_failed(make_client):
+    """should raise an exception, when the server reports a failed transfer"""
+    client = make_client(1)
+    client._read_pool[0].rpm = FakeRpm(client, [], success=False, error="no such package")
+    # the completion signal is waited for outside the main thread
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(lambda: list(client._list_fd({})))
+    with pytest.raises(YumexException) as exc_info:
+        future.result()
+    assert "no such package" in exc_info.value.msg
+
+
+def test_transfer_finished_before_registered(make_client):
+    """should use a completion signal received before the transfer is registered"""
+    client = make_client(1)
+    client.on_write_to_fd_finished("/read0", False, "transfer-2", "failed")
+    transfer = ListTransfer()
+    transfer.transfer_id = "transfer-2"
+    client._register_transfer(transfer)
+    assert transfer.finished and transfer.success is False
+    client._unregister_transfer(transfer)
+    transfer.close()
+
+
+def test_transfer_finished_after_unregistered(make_client):
+    """should drop the completion signals for ended transfers, and keep a bounded number of early signals"""
+    client = make_client(1)
+    transfer = ListTransfer()
+    transfer.transfer_id = "transfer-3"
+    client._register_transfer(transfer)
+    client._unregister_transfer(transfer)
+    transfer.close()
+    client.on_write_to_fd_finished("/read0", True, "transfer-3", "")
+    assert client._finished_transfers == {}
+    for ndx in range(FINISHED_TRANSFERS_MAX * 2):
+        client.on_write_to_fd_finished("/read0", True, f"lost-{ndx}", "")
+    assert len(client._finished_transfers) == FINISHED_TRANSFERS_MAX
@@ -5,6 +5,7 @@ import gi
 import pytest
 
 import yumex.utils
+import yumex.utils.scheduler
 from yumex.utils.enums import (
     InfoType,
     PackageFilter,
@@ -33,7 +34,9 @@ def mock_presenter():
     mock.get_packages_by_filter.return_value = [dummy_package()]
     mock.search.return_value = [dummy_package()]
     # dont use cache, just return the same packages
-    mock.get_packages.side_effect = lambda x: x
+    mock.get_packages.side_effect = lambda pkgs, visible=False: pkgs
+    mock.can_stream_packages.return_value = False
+    mock.has_snapshot_data.return_value = False
     return mock
 
 
@@ -50,6 +53,7 @@ def mock_queueview():
     """mock the queueview"""
     mock = MagicMock()
     mock.find_by_nevra.return_value = None
+    mock.overlay.side_effect = lambda pkgs: list(pkgs)
     return mock
 
 
@@ -65,6 +69,7 @@ def view(monkeypatch, mocker):
     # used the Special Gtk.Template wrapper
     monkeypatch.setattr(Gtk, "Template", TemplateUIFromFile)
     monkeypatch.setattr(yumex.utils, "RunAsync", run_sync)
+    monkeypatch.setattr(yumex.utils.scheduler, "RunAsync", run_sync)
 
     from yumex.ui.package_view import YumexPackageView
 
@@ -120,6 +125,64 @@ def test_search_2chars(view):
     assert len(view.storage) == 0
 
 
+def test_search_stale_result(view):
+    """should ignore the result of a search, when there is a newer search"""
+    load_id = view.load_id
+    view.load_id += 1
+    view.on_search_completed([dummy_package()], None, load_id=load_id)
+    assert len(view.storage) == 0
+
+
+def test_search_cancelled(view):
+    """should ignore the result of a cancelled search"""
+    view.presenter.search.return_value = None
+    view.search("text")
+    assert len(view.storage) == 0
+
+
+def test_cancel_search(view):
+    """should cancel the search in the backend, and ignore the result"""
+    load_id = view.load_id
+    view.cancel_search()
+    view.presenter.cancel_search.assert_called_once()
+    view.on_search_completed([dummy_package()], None, load_id=load_id)
+    assert len(view.storage) == 0
+
+
+def test_search_refined(view, pkg, pkg_other, pkg_yumex):
+    """should only remove the packages not found, when the search result is a part of the shown result"""
+    view.presenter.search.return_value = [pkg, pkg_other, pkg_yumex]
+    view.search("pkg")
+    store = view.store
+    view.presenter.search.return_value = [pkg_other]
+    view.search("otherpkg")
+    assert view.store is store
+    assert list(view.storage) == [pkg_other]
+    # a package not shown, give a new search result
+    view.presenter.search.return_value = [pkg, pkg_other]
+    view.search("pkg")
+    assert view.store is not store
+    assert len(view.storage) == 2
+
+
+def test_search_ranked(view, pkg, pkg_other, pkg_yumex):
+    """should show the search result in the ranked order, until a sort is picked"""
+    view.presenter.search.return_value = [pkg_yumex, pkg_other, pkg]
+    view.search("pkg")
+    assert list(view.storage) == [pkg_yumex, pkg_other, pkg]
+    # the shown packages is in another order, so the result is shown again
+    view.presenter.search.return_value = [pkg_other, pkg_yumex]
+    view.search("pkgs")
+    assert list(view.storage) == [pkg_other, pkg_yumex]
+    view.sort(SortType.NAME)
+    assert view.search_sorted
+    view.presenter.search.return_value = [pkg_yumex, pkg_other, pkg]
+    view.search("pkg")
+    assert list(view.storage) == [pkg, pkg_other, pkg_yumex]
+    view.get_packages(PackageFilter.INSTALLED)
+    assert not view.search_sorted
+
+
 def test_select_all(view):
     view.get_packages(PackageFilter.AVAILABLE)
     # all packages are selected and added to queue
@@ -133,3 +196,133 @@ def test_select_all(view):
     assert len(to_add) == 0
     assert len(to_delete) == 1
     view.queue_view.remove_packages.assert_called_with(to_delete)
+
+
+def test_select_all_batch(view, pkg, pkg_other, pkg_yumex, monkeypatch):
+    """should only notify the packages shown, and change the queue once"""
+    from yumex.backend.dnf import YumexPackage
+
+    view.presenter.get_packages_by_filter.return_value = [pkg, pkg_other, pkg_yumex]
+    view.get_packages(PackageFilter.AVAILABLE)
+    binding = MagicMock()
+    monkeypatch.setattr(YumexPackage, "bind_property", lambda *args: binding, raising=False)
+    item = MagicMock()
+    item.get_item.return_value = pkg_other
+    view.on_queued_bind(None, item)
+    notified = []
+    for package in (pkg, pkg_other, pkg_yumex):
+        package.connect("notify::queued", lambda obj, name: notified.append(obj))
+    monkeypatch.setattr(view, "refresh", MagicMock())
+    to_add, _to_delete = view.select_all(state=True)
+    assert len(to_add) == 3
+    view.refresh.assert_not_called()
+    assert all(package.queued for package in to_add)
+    assert notified == [pkg_other]
+    view.queue_view.add_packages.assert_called_once_with(to_add)
+    # the binding is removed, when the row is unbound
+    view.on_queued_unbind(None, item)
+    binding.unbind.assert_called_once()
+    notified.clear()
+    view.select_all(state=False)
+    assert notified == []
+    assert not any(package.queued for package in to_add)
+
+
+def test_add_columns_to_store(view):
+    """should add columnar packages to the view storage and show the queued packages"""
+    from yumex.utils.columns import PackageColumns
+
+    queued = dummy_package()
+    view.queue_view.get_all.return_value = [queued]
+    view.add_packages_to_store(PackageColumns.from_packages([dummy_package()]))
+    assert len(view.storage) == 1
+    assert view.store[0] is queued
+
+
+def test_add_packages_to_store_queued(view):
+    """should show the queued package object, for packages in the queue"""
+    queued = dummy_package()
+    view.queue_view.overlay.side_effect = lambda pkgs: [queued for _ in pkgs]
+    view.add_packages_to_store([dummy_package()])
+    assert view.store[0] is queued
+
+
+def test_stream_packages(view, monkeypatch, pkg, pkg_other):
+    """should show the packages as they arrive, and sort them when all is loaded"""
+    from yumex.ui import package_view
+    from yumex.utils.columns import PackageColumns
+
+    monkeypatch.setattr(package_view.GLib, "idle_add", lambda func, *args: func(*args))
+    shown = []
+
+    def stream(pkg_filter):
+        columns = PackageColumns()
+        for new_pkg in (pkg_other, pkg):
+            columns.append_package(new_pkg)
+            yield columns
+            shown.append(len(view.storage))
+
+    view.presenter.can_stream_packages.return_value = True
+    view.presenter.stream_packages_by_filter.side_effect = stream
+    first_row = []
+    view.connect("first-row", lambda widget, elapsed: first_row.append(elapsed))
+    view.get_packages(PackageFilter.AVAILABLE)
+    assert shown == [1, 2]
+    assert len(first_row) == 1
+    assert list(view.store) == [pkg, pkg_other]
+    view.presenter.progress.show.assert_not_called()
+
+
+def test_stream_packages_replaced(view, monkeypatch, pkg):
+    """should ignore chunks from a loading, when other packages is shown"""
+    from yumex.ui import package_view
+    from yumex.utils.columns import PackageColumns
+
+    monkeypatch.setattr(package_view.GLib, "idle_add", lambda func, *args: func(*args))
+
+    def stream(pkg_filter):
+        columns = PackageColumns()
+        columns.append_package(pkg)
+        view.add_packages_to_store([])
+        yield columns
+
+    view.presenter.can_stream_packages.return_value = True
+    view.presenter.stream_packages_by_filter.side_effect = stream
+    view.get_packages(PackageFilter.AVAILABLE)
+    assert len(view.storage) == 0
+
+
+def test_info_prefetch(view, monkeypatch):
+    """should prefetch the package info for the rows around the selected package"""
+    from yumex.ui import package_view
+
+    calls = []
+    monkeypatch.setattr(package_view, "RunAsync", lambda func, callback, *args: calls.append((func, args)))
+    pkgs = [dummy_package() for _ in range(20)]
+    for ndx, pkg in enumerate(pkgs):
+        pkg.name = f"pkg{ndx:02d}"
+    view.add_packages_to_store(pkgs)
+    position = next(ndx for ndx, pkg in enumerate(view.store) if pkg.name == "pkg10")
+    monkeypatch.setattr(view.selection, "get_selected", lambda: position)
+    assert view.on_info_prefetch() is False
+    func, (prefetched,) = calls[0]
+    assert func == view.presenter.prefetch_package_info
+    assert len(prefetched) == 2 * package_view.INFO_PREFETCH_ROWS
+    assert view.store[position] not in prefetched
+
+
+def test_advisory_filter(view):
+    """should only show the updates matching the advisory filter"""
+    from yumex.utils.enums import AdvisoryFilter
+
+    pkgs = [dummy_package() for _ in range(4)]
+    for ndx, pkg in enumerate(pkgs):
+        pkg.name = f"pkg{ndx}"
+    view.presenter.get_packages_by_filter.return_value = pkgs
+    view.presenter.match_advisory.side_effect = lambda pkg, advisory_filter: pkg.name in ("pkg1", "pkg3")
+    view.get_packages(PackageFilter.UPDATES)
+    assert len(view.storage) == 4
+    view.set_advisory_filter(AdvisoryFilter.SECURITY)
+    assert sorted(pkg.name for pkg in view.store) == ["pkg1", "pkg3"]
+    view.set_advisory_filter(AdvisoryFilter.ALL)
+    assert len(view.storage) == 4
@@ -0,0 +1,110 @@
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+
+import yumex.utils.progress as progress
+from yumex.backend.dnf5daemon import DownloadPackage, DownloadQueue
+from yumex.utils.progress import ProgressThrottle
+
+
+class Timers:
+    """replacement for GLib.timeout_add, the timers is fired by the test"""
+
+    def __init__(self) -> None:
+        self.timers = {}
+        self.next_id = 1
+
+    def timeout_add(self, delay, func, *args):
+        source = self.next_id
+        self.next_id += 1
+        self.timers[source] = partial(func, *args)
+        return source
+
+    def source_remove(self, source):
+        del self.timers[source]
+
+    def fire(self) -> None:
+        for source in sorted(self.timers):
+            self.timers.pop(source)()
+
+
+@pytest.fixture
+def timers(monkeypatch) -> Timers:
+    timers = Timers()
+    monkeypatch.setattr(progress.GLib, "timeout_add", timers.timeout_add)
+    monkeypatch.setattr(progress.GLib, "source_remove", timers.source_remove)
+    return timers
+
+
+def test_throttle(timers):
+    """should only show the newest values, when the timer fires"""
+    dialog = MagicMock()
+    throttle = ProgressThrottle(dialog)
+    for ndx in range(100):
+        throttle.set_progress(ndx / 100)
+        throttle.set_subtitle(f"Downloading : pkg-{ndx}")
+    assert len(timers.timers) == 1
+    dialog.set_progress.assert_not_called()
+    timers.fire()
+    dialog.set_progress.assert_called_once_with(0.99)
+    dialog.set_subtitle.assert_called_once_with("Downloading : pkg-99")
+    assert (throttle.recorded, throttle.updates) == (200, 1)
+    # nothing recorded, nothing to show
+    timers.fire()
+    assert dialog.set_progress.call_count == 1
+
+
+def test_throttle_title(timers):
+    """should drop the recorded values, when the title is set or the dialog is hidden and cleared"""
+    dialog = MagicMock()
+    throttle = ProgressThrottle(dialog)
+    throttle.set_progress(0.5)
+    throttle.set_title("Verifying Packages")
+    dialog.set_title.assert_called_once_with("Verifying Packages")
+    assert timers.timers == {}
+    throttle.set_progress(0.7)
+    throttle.hide()
+    dialog.hide.assert_called_once_with(clear=True)
+    assert timers.timers == {}
+    dialog.set_progress.assert_not_called()
+    throttle.show()
+    dialog.show.assert_called_once()
+
+
+def test_throttle_hide_keep(timers):
+    """should keep the recorded values, when the dialog is hidden without clearing it"""
+    dialog = MagicMock()
+    throttle = ProgressThrottle(dialog)
+    throttle.set_subtitle("Downloading : pkg")
+    throttle.set_progress(0.7)
+    throttle.hide(clear=False)
+    dialog.hide.assert_called_once_with(clear=False)
+    timers.fire()
+    dialog.set_subtitle.assert_called_once_with("Downloading : pkg")
+    dialog.set_progress.assert_called_once_with(0.7)
+
+
+def test_download_queue():
+    """should keep the totals, when the downloads is added and updated"""
+    queue = DownloadQueue()
+    pkgs = [DownloadPackage(f"package:{ndx}", f"pkg-{ndx}", 100) for ndx in range(3)]
+    for pkg in pkgs:
+        queue.add(pkg)
+    assert (queue.total, queue.current, queue.fraction) == (300, 0, 0.0)
+    queue.update(pkgs[0], 50)
+    queue.update(pkgs[1], 100)
+    assert queue.current == 150
+    assert queue.fraction == 0.5
+    assert not queue.is_completed
+    # the size of a repo download is changed while downloading
+    queue.update(pkgs[2], 20, 50)
+    assert (queue.total, queue.current) == (250, 170)
+    assert pkgs[2].to_download == 50
+    # the same download added again
+    queue.add(DownloadPackage("package:0", "pkg-0", 100, 100))
+    assert (queue.total, queue.current) == (250, 220)
+    queue.update(pkgs[2], 50)
+    assert queue.is_completed
+    queue.clear()
+    assert (len(queue), queue.total, queue.current) == (0, 0, 0)
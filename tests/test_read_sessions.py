@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+from unittest.mock import MagicMock
+
+
+def test_read_session_round_robin(make_client):
+    """should use the read-only sessions in turn"""
+    client = make_client(3)
+    used = [client.read_session().session for _ in range(6)]
+    assert used == ["/read0", "/read1", "/read2", "/read0", "/read1", "/read2"]
+
+
+def test_read_session_no_pool(make_client):
+    """should use the transaction session, without read-only sessions"""
+    client = make_client(0)
+    assert client.read_session() is client._main_session
+
+
+def test_reset_sessions(make_client):
+    """should reset the transaction session and all read-only sessions"""
+    client = make_client(2)
+    client.reset_sessions()
+    client.session_base.reset.assert_called_once()
+    for session in client._read_pool:
+        session.base.reset.assert_called_once()
+
+
+def test_close_session(make_client):
+    """should close the read-only sessions with the transaction session"""
+    client = make_client(2)
+    pool = list(client._read_pool)
+    client.close_session()
+    closed = [call.args[0] for call in client.iface_session.close_session.call_args_list]
+    assert closed == ["/main"] + [session.session for session in pool]
+    assert client._read_pool == []
+    assert client.read_session() is client._main_session
+
+
+def test_prefetched_package_list(backend):
+    """should use the prefetched package list, and save it in the snapshot"""
+    pkgs = [{"name": "foo"}]
+    future = Future()
+    future.set_result(pkgs)
+    backend._prefetch["installed"] = future
+    assert backend._get_package_list("installed") is pkgs
+    assert "installed" not in backend._prefetch
+    backend.snapshot.save.assert_called_once_with("key", {"installed": pkgs})
+
+
+def test_prefetch_failed(backend):
+    """should fetch the package list again, if the prefetch failed"""
+    future = Future()
+    future.set_exception(RuntimeError("no reply"))
+    backend._prefetch["installed"] = future
+    backend.client.package_list_fd_iter = MagicMock(return_value=iter([{"name": "bar"}]))
+    assert backend._get_package_list("installed") == [{"name": "bar"}]
+
+
+def test_prefetch_package_lists(backend):
+    """should fetch the package lists in parallel, only if not in the snapshot"""
+    backend.snapshot.get.side_effect = lambda scope: [] if scope == "upgrades" else None
+    backend._fetch_package_list = MagicMock(side_effect=lambda scope: [{"name": scope}])
+    backend.prefetch_package_lists(["installed", "available", "upgrades"])
+    assert sorted(backend._prefetch) == ["available", "installed"]
+    assert backend._take_prefetched("available") == [{"name": "available"}]
+    backend.cancel_prefetch()
+    assert backend._prefetch == {}
+    backend._prefetch_executor.shutdown()
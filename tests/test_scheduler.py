@@ -0,0 +1,290 @@
+import itertools
+from functools import partial
+from unittest.mock import MagicMock
+
+import pytest
+
+import yumex.utils.scheduler as scheduler
+from yumex.utils.enums import PackageTodo
+from yumex.utils.scheduler import DepsolveScheduler, SearchScheduler
+
+
+class Jobs:
+    """replacement for RunAsync, the jobs is run when the test completes them"""
+
+    def __init__(self) -> None:
+        self.jobs = []
+
+    def __call__(self, task_func, callback, *args, **kwargs):
+        self.jobs.append((partial(task_func, *args, **kwargs), callback))
+
+    def complete(self, ndx: int = 0) -> None:
+        task_func, callback = self.jobs.pop(ndx)
+        callback(task_func(), None)
+
+
+class Timers:
+    """replacement for GLib.timeout_add, the timers is fired by the test"""
+
+    def __init__(self) -> None:
+        self.timers = {}
+        self.ids = itertools.count(1)
+
+    def timeout_add(self, delay, func, *args):
+        source = next(self.ids)
+        self.timers[source] = partial(func, *args)
+        return source
+
+    def source_remove(self, source):
+        del self.timers[source]
+
+    def fire(self) -> None:
+        source = min(self.timers)
+        self.timers.pop(source)()
+
+
+@pytest.fixture
+def jobs(monkeypatch) -> Jobs:
+    jobs = Jobs()
+    monkeypatch.setattr(scheduler, "RunAsync", jobs)
+    return jobs
+
+
+@pytest.fixture
+def search() -> MagicMock:
+    return MagicMock(side_effect=lambda txt, options, stats: [txt])
+
+
+def test_search(jobs, search):
+    """should run the search in the background, and log the stats when the result is shown"""
+    busy = []
+    callback = MagicMock()
+    sched = SearchScheduler(search, on_busy=busy.append)
+    sched.request("fire", {"scope": "all"}, callback)
+    assert sched.busy
+    jobs.complete()
+    callback.assert_called_once_with(["fire"], None)
+    assert busy == [True, False]
+    stats = search.call_args.args[2]
+    assert stats.query == "fire"
+    assert stats.packages == 1
+    assert stats.queue_wait >= 0 and stats.search >= 0 and stats.model >= 0
+
+
+def test_coalesce(jobs, search):
+    """should only run the newest search requested while a search is running, and drop the running result"""
+    busy = []
+    callbacks = [MagicMock() for _ in range(3)]
+    cancel = MagicMock()
+    sched = SearchScheduler(search, on_busy=busy.append, cancel=cancel)
+    sched.request("fir", {}, callbacks[0])
+    sched.request("fire", {}, callbacks[1])
+    sched.request("firef", {}, callbacks[2])
+    assert len(jobs.jobs) == 1
+    # the running search is not cancelled, the new queries extends it
+    cancel.assert_not_called()
+    jobs.complete()
+    callbacks[0].assert_not_called()
+    assert len(jobs.jobs) == 1
+    jobs.complete()
+    callbacks[1].assert_not_called()
+    callbacks[2].assert_called_once_with(["firef"], None)
+    assert busy == [True, False]
+    assert (sched.requested, sched.started, sched.dropped) == (3, 2, 1)
+
+
+def test_cancel_running(jobs, search):
+    """should cancel the running search, when the new query don't extend it"""
+    cancel = MagicMock()
+    sched = SearchScheduler(search, cancel=cancel)
+    sched.request("firefox", {}, MagicMock())
+    sched.request("fire", {}, MagicMock())
+    cancel.assert_called_once()
+
+
+def test_same_search(jobs, search):
+    """should use the result of the running search, when the same search is requested again"""
+    callbacks = [MagicMock(), MagicMock()]
+    sched = SearchScheduler(search)
+    sched.request("fire", {}, callbacks[0])
+    sched.request("fire", {}, callbacks[1])
+    jobs.complete()
+    assert jobs.jobs == []
+    callbacks[0].assert_not_called()
+    callbacks[1].assert_called_once_with(["fire"], None)
+
+
+def test_cancel(jobs, search):
+    """should drop the pending search and the result of the running search"""
+    busy = []
+    callback = MagicMock()
+    sched = SearchScheduler(search, on_busy=busy.append)
+    sched.request("fire", {}, callback)
+    sched.request("firefox", {}, callback)
+    sched.cancel()
+    assert not sched.busy
+    jobs.complete()
+    assert jobs.jobs == []
+    callback.assert_not_called()
+    assert busy == [True, False]
+
+
+@pytest.fixture
+def timers(monkeypatch) -> Timers:
+    timers = Timers()
+    monkeypatch.setattr(scheduler.GLib, "timeout_add", timers.timeout_add)
+    monkeypatch.setattr(scheduler.GLib, "source_remove", timers.source_remove)
+    return timers
+
+
+@pytest.fixture
+def queue(pkg, pkg_other) -> list:
+    pkg.todo = PackageTodo.INSTALL
+    pkg_other.todo = PackageTodo.REMOVE
+    return [pkg, pkg_other]
+
+
+@pytest.fixture
+def depsolve(pkg_upd) -> MagicMock:
+    return MagicMock(return_value=[pkg_upd])
+
+
+def test_depsolve_coalesce(jobs, timers, queue, depsolve, pkg_upd):
+    """should depsolve the queue changes close together with one depsolve"""
+    on_result = MagicMock()
+    sched = DepsolveScheduler(depsolve, lambda: queue, on_result)
+    for _ in range(50):
+        sched.schedule()
+    assert len(timers.timers) == 1
+    timers.fire()
+    assert sched.busy
+    jobs.complete()
+    depsolve.assert_called_once_with(queue)
+    on_result.assert_called_once_with([pkg_upd], None)
+    assert not sched.busy
+    assert sched.stats()["requests"] == 50
+    assert sched.stats()["resolves"] == 1
+
+
+def test_depsolve_cache(jobs, timers, queue, depsolve, pkg_upd):
+    """should use the cached result, when the queue is already resolved"""
+    on_result = MagicMock()
+    sched = DepsolveScheduler(depsolve, lambda: list(reversed(queue)), on_result)
+    sched.schedule()
+    timers.fire()
+    jobs.complete()
+    sched.schedule()
+    timers.fire()
+    assert jobs.jobs == []
+    assert depsolve.call_count == 1
+    assert on_result.call_count == 2
+    assert sched.cache_hits == 1
+    # the todo is part of the key
+    queue[0].todo = PackageTodo.REINSTALL
+    sched.schedule()
+    timers.fire()
+    assert len(jobs.jobs) == 1
+    sched.clear_cache()
+    assert sched._cache == {}
+
+
+def test_depsolve_stale(jobs, timers, queue, depsolve):
+    """should drop the result, when the queue is changed while depsolving"""
+    on_result = MagicMock()
+    pkgs = queue[:1]
+    sched = DepsolveScheduler(depsolve, lambda: pkgs, on_result)
+    sched.schedule()
+    timers.fire()
+    # the queue is changed, and the timer fires while the depsolve is running
+    pkgs.append(queue[1])
+    sched.schedule()
+    timers.fire()
+    assert len(jobs.jobs) == 1
+    jobs.complete()
+    on_result.assert_not_called()
+    assert len(jobs.jobs) == 1
+    jobs.complete()
+    on_result.assert_called_once()
+    # the queue is changed, the timer is not fired yet
+    pkgs.pop()
+    sched.clear_cache()
+    sched.schedule()
+    timers.fire()
+    sched.schedule()
+    jobs.complete()
+    assert on_result.call_count == 1
+    assert sched.dropped == 2
+    assert depsolve.call_count == 3
+
+
+def test_depsolve_cancel(jobs, timers, queue, depsolve):
+    """should not use the result of a cancelled depsolve, and use no depsolve for an empty queue"""
+    on_result = MagicMock()
+    pkgs = list(queue)
+    sched = DepsolveScheduler(depsolve, lambda: pkgs, on_result)
+    sched.schedule()
+    timers.fire()
+    sched.cancel()
+    assert sched.busy
+    jobs.complete()
+    on_result.assert_not_called()
+    assert not sched.busy
+    # the result of the cancelled depsolve is not cached
+    sched.schedule()
+    timers.fire()
+    assert len(jobs.jobs) == 1
+    jobs.complete()
+    on_result.assert_called_once()
+    on_result.reset_mock()
+    pkgs.clear()
+    sched.schedule()
+    timers.fire()
+    assert jobs.jobs == []
+    on_result.assert_called_once_with([], None)
+
+
+def test_depsolve_hold(jobs, timers, queue, depsolve):
+    """should not depsolve while held, when apply is clicked before the scheduled depsolve is started"""
+    on_result = MagicMock()
+    busy = []
+    sched = DepsolveScheduler(depsolve, lambda: queue, on_result, on_busy=busy.append)
+    # a package is ticked, and apply is clicked within the delay
+    sched.schedule()
+    assert busy == [True]
+    sched.hold()
+    assert timers.timers == {}
+    assert not sched.busy
+    assert busy == [True, False]
+    # the queue is changed while the transaction is running
+    sched.schedule()
+    assert timers.timers == {}
+    depsolve.assert_not_called()
+    sched.release()
+    assert not sched.held
+    timers.fire()
+    jobs.complete()
+    depsolve.assert_called_once_with(queue)
+    on_result.assert_called_once()
+    assert busy == [True, False, True, False]
+    # nothing scheduled while held, nothing to depsolve after
+    sched.hold()
+    sched.release()
+    assert timers.timers == {}
+
+
+def test_depsolve_hold_running(jobs, timers, queue, depsolve):
+    """should keep busy while the held depsolve is running, and depsolve again when released"""
+    on_result = MagicMock()
+    sched = DepsolveScheduler(depsolve, lambda: queue, on_result)
+    sched.schedule()
+    timers.fire()
+    assert sched.running
+    sched.hold()
+    assert sched.busy
+    jobs.complete()
+    on_result.assert_not_called()
+    assert not sched.busy
+    sched.release()
+    timers.fire()
+    jobs.complete()
+    on_result.assert_called_once()
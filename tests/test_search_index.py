@@ -0,0 +1,163 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from yumex.backend import SearchStats
+from yumex.backend.dnf5daemon import LastSearch
+from yumex.backend.search_index import PackageIndex, is_glob, rank_key
+
+
+def pkg(name: str, evr: str = "1-1", arch: str = "x86_64", repo_id: str = "fedora", summary: str = "", installed=False) -> dict:
+    return {
+        "name": name,
+        "evr": evr,
+        "arch": arch,
+        "repo_id": repo_id,
+        "summary": summary,
+        "install_size": 1024,
+        "is_installed": installed,
+    }
+
+
+@pytest.fixture
+def lists() -> dict[str, list[dict]]:
+    return {
+        "installed": [
+            pkg("firefox", "120-1", repo_id="@System", summary="Mozilla Firefox Web browser", installed=True),
+            pkg("bash", "5.2-1", repo_id="@System", summary="The GNU Bourne Again shell", installed=True),
+        ],
+        "available": [
+            pkg("firefox", "120-1", summary="Mozilla Firefox Web browser", installed=True),
+            pkg("firefox", "121-1", repo_id="updates", summary="Mozilla Firefox Web browser"),
+            pkg("firefox-langpacks", "121-1", repo_id="updates", summary="Firefox langpacks"),
+            pkg("python3-firefox-tools", summary="Tools for the browser"),
+            pkg("epiphany", summary="Web browser for GNOME"),
+            pkg("fire", arch="noarch", repo_id="extra", summary="Fire simulation"),
+            pkg("bash", "5.2-1", summary="The GNU Bourne Again shell", installed=True),
+        ],
+    }
+
+
+@pytest.fixture
+def index(lists) -> PackageIndex:
+    return PackageIndex.build(lists)
+
+
+def names(pkgs: list[dict]) -> list[str]:
+    return [pkg["name"] for pkg in pkgs]
+
+
+def test_ranking(index):
+    """should rank exact > prefix > substring > summary matches"""
+    assert names(index.search("firefox")) == ["firefox", "firefox-langpacks", "python3-firefox-tools"]
+    assert names(index.search("fire")) == ["fire", "firefox", "firefox-langpacks", "python3-firefox-tools"]
+    assert names(index.search("browser")) == ["firefox", "epiphany", "python3-firefox-tools"]
+    assert names(index.search("FireFox")) == names(index.search("firefox"))
+    assert index.search("XXXNOTFOUNDXXX") == []
+
+
+def test_nevra(index):
+    """should match the name-version of the nevra, after the name matches"""
+    assert [(p["name"], p["evr"]) for p in index.search("firefox-121")] == [("firefox", "121-1")]
+    assert names(index.search("fox-1")) == ["firefox"]
+    assert index.search("firefox-122") == []
+
+
+def test_rank_key(index, lists):
+    """should rank the packages from other searches like the index"""
+    pkgs = [pkg for pkg in lists["available"] if "fire" in pkg["name"]]
+    assert names(sorted(pkgs, key=rank_key("Fire "))) == ["fire", "firefox", "firefox", "firefox-langpacks", "python3-firefox-tools"]
+    assert is_glob("fire*") and is_glob("fire?ox") and is_glob("[f]irefox")
+    assert not is_glob("firefox-121")
+
+
+def test_short_query(index):
+    """should find names shorter than a trigram"""
+    assert names(index.search("ba")) == ["bash"]
+
+
+def test_summary_words(index):
+    """should match all the query words as prefixes of summary words"""
+    assert names(index.search("web brow")) == ["firefox", "epiphany"]
+    assert names(index.search("gnome shell")) == []
+
+
+def test_latest(index):
+    """should only return the newest package of each name.arch, the installed package when it is the newest"""
+    firefox = [p for p in index.search("firefox", scope="all") if p["name"] == "firefox"]
+    assert [p["evr"] for p in firefox] == ["121-1"]
+    bash = index.search("bash", scope="all")
+    assert bash[0]["repo_id"] == "@System"
+    assert index.search("firefox", scope="installed") == [index.pkgs[0]]
+
+
+def test_filters(index):
+    """should filter by scope, arch and repository"""
+    assert names(index.search("fire", scope="available", arch=["noarch"])) == ["fire"]
+    assert names(index.search("fire", repo=["updates"])) == ["firefox", "firefox-langpacks"]
+    assert names(index.search("bash", scope="available")) == ["bash"]
+    assert index.search("bash", scope="available")[0]["repo_id"] == "fedora"
+    with pytest.raises(ValueError):
+        index.search("bash", scope="upgrades")
+
+
+def test_save_load(index, lists, tmp_path):
+    """should load the saved index for the same snapshot key and package lists"""
+    path = tmp_path / "packages.index"
+    index.save(path, "key")
+    loaded = PackageIndex.load(path, "key", lists)
+    assert loaded is not None
+    for query in ["firefox", "fire", "browser", "ba", "web brow"]:
+        assert loaded.search(query) == index.search(query)
+    assert PackageIndex.load(path, "other_key", lists) is None
+    assert PackageIndex.load(path, "key", lists | {"installed": []}) is None
+    assert PackageIndex.load(tmp_path / "missing.index", "key", lists) is None
+
+
+def test_search_index(backend):
+    """should search in the search index, and use dnf5daemon for the searches it can't answer"""
+    installed = [{"name": "foo", "evr": "1-1", "arch": "noarch", "repo_id": "@System", "summary": "", "install_size": 1, "is_installed": True}]
+    available = [{"name": "foobar", "evr": "1-1", "arch": "noarch", "repo_id": "fedora", "summary": "", "install_size": 1, "is_installed": False}]
+    backend._installed_evr = {"foo": "1-1"}
+    backend.client.package_list_fd = MagicMock(return_value=[])
+    assert backend.search("foo") == []
+    backend.search_index = PackageIndex.build({"installed": installed, "available": available})
+    stats = SearchStats("foo")
+    assert [pkg.name for pkg in backend.search("foo", stats=stats)] == ["foo", "foobar"]
+    assert stats.source == "index"
+    assert [pkg.name for pkg in backend.search("foo", options={"scope": "available", "with_provides": False})] == ["foobar"]
+    assert backend.client.package_list_fd.call_count == 1
+    backend.search("foo", options={"with_filenames": True})
+    backend.search("fo*")
+    backend.search("fo?")
+    backend.search("foo", options={"scope": "upgrades"})
+    assert backend.client.package_list_fd.call_count == 5
+
+
+def test_search_refine(backend):
+    """should filter the last search result, when the query is extended with the same options"""
+    backend._installed_evr = {}
+    pkgs = [
+        {"name": name, "evr": "1-1", "arch": "noarch", "repo_id": "fedora", "summary": "", "install_size": 1, "is_installed": False}
+        for name in ("python3-firewall", "firewalld", "firefox")
+    ]
+    backend.client.package_list_fd = MagicMock(return_value=pkgs)
+    stats = SearchStats("fire")
+    # ranked like the search index results
+    assert [pkg.name for pkg in backend.search("fire", stats=stats)] == ["firefox", "firewalld", "python3-firewall"]
+    assert stats.source == "daemon"
+    stats = SearchStats("Firew")
+    assert [pkg.name for pkg in backend.search("Firew", stats=stats)] == ["firewalld", "python3-firewall"]
+    assert stats.source == "refined"
+    assert [pkg.name for pkg in backend.search("firewa")] == ["firewalld", "python3-firewall"]
+    assert backend.client.package_list_fd.call_count == 1
+    # shorter query, other options and searching in provides is done by dnf5daemon
+    backend.search("fir")
+    backend.search("fire", options={"scope": "available"})
+    backend.search("firewall", options={"scope": "available", "with_provides": True})
+    assert backend.client.package_list_fd.call_count == 4
+    # the last result is not used, when the search is cancelled
+    backend._last_search = LastSearch("fire", {}, pkgs)
+    backend.cancel_search()
+    backend.search("firefox")
+    assert backend.client.package_list_fd.call_count == 5
@@ -0,0 +1,178 @@
+import sys
+import threading
+
+import pytest
+
+from yumex.backend.snapshot import PackageSnapshot, get_rpmdb_state, make_key
+
+
+@pytest.fixture
+def snapshot(tmp_path) -> PackageSnapshot:
+    return PackageSnapshot(tmp_path / "packages.snapshot")
+
+
+@pytest.fixture
+def installed() -> list[dict]:
+    return [
+        {
+            "name": "mypkg",
+            "evr": "1-1.0",
+            "arch": "x86_64",
+            "repo_id": "@System",
+            "summary": "Æble grød på dansk",
+            "install_size": 2048,
+            "is_installed": True,
+        },
+        {
+            "name": "otherpkg",
+            "evr": "2:1.2-3.fc42",
+            "arch": "noarch",
+            "repo_id": "@System",
+            "summary": "",
+            "install_size": 0,
+            "is_installed": True,
+        },
+    ]
+
+
+@pytest.fixture
+def available() -> list[dict]:
+    return [
+        {
+            "name": "newpkg",
+            "evr": "1-1.fc42",
+            "arch": "noarch",
+            "repo_id": "fedora",
+            "summary": "a new package",
+            "install_size": 1024,
+            "is_installed": False,
+        }
+    ]
+
+
+def test_make_key():
+    """should make the same key from the same data"""
+    assert make_key((1, 2), [("fedora", 99)]) == make_key((1, 2), [("fedora", 99)])
+    assert make_key((1, 2), [("fedora", 99)]) != make_key((1, 3), [("fedora", 99)])
+
+
+def test_rpmdb_state(tmp_path):
+    """should change when the rpmdb or its write-ahead log is changed"""
+    rpmdb = tmp_path / "rpmdb.sqlite"
+    paths = [tmp_path / "missing.sqlite", rpmdb]
+    assert get_rpmdb_state(paths) == ()
+    rpmdb.write_bytes(b"db")
+    state = get_rpmdb_state(paths)
+    assert state[0] == rpmdb.as_posix()
+    (tmp_path / "rpmdb.sqlite-wal").write_bytes(b"changes")
+    wal_state = get_rpmdb_state(paths)
+    assert wal_state[: len(state)] == state and wal_state != state
+    (tmp_path / "rpmdb.sqlite-wal").write_bytes(b"more changes")
+    assert get_rpmdb_state(paths) != wal_state
+
+
+def test_save_load(snapshot, installed, available):
+    """should load the saved sections"""
+    snapshot.save("key", {"installed": installed, "available": available})
+    loaded = PackageSnapshot(snapshot.path)
+    assert loaded.load("key")
+    assert loaded.get("installed") == installed
+    assert loaded.get("available") == available
+    assert loaded.get("upgrades") is None
+
+
+def test_save_empty_section(snapshot):
+    """should store empty sections"""
+    snapshot.save("key", {"upgrades": []})
+    loaded = PackageSnapshot(snapshot.path)
+    assert loaded.load("key")
+    assert loaded.get("upgrades") == []
+
+
+def test_save_merge(snapshot, installed, available):
+    """should keep the existing sections, when saved with the same key"""
+    snapshot.save("key", {"installed": installed})
+    snapshot.save("key", {"available": available})
+    assert sorted(snapshot.sections()) == ["available", "installed"]
+    assert snapshot.get("installed") == installed
+
+
+def test_save_new_key(snapshot, installed, available):
+    """should drop the existing sections, when saved with another key"""
+    snapshot.save("key", {"installed": installed})
+    snapshot.save("new_key", {"available": available})
+    assert snapshot.sections() == ["available"]
+
+
+def test_load_stale(snapshot, installed):
+    """should remove a stale snapshot"""
+    snapshot.save("key", {"installed": installed})
+    loaded = PackageSnapshot(snapshot.path)
+    assert not loaded.load("other_key")
+    assert not loaded.is_loaded
+    assert not snapshot.path.exists()
+
+
+def test_load_missing(snapshot):
+    """should not load a missing snapshot"""
+    assert not snapshot.load("key")
+    assert snapshot.get("installed") is None
+
+
+def test_load_wrong_version(snapshot):
+    """should remove a snapshot with a unknown format"""
+    snapshot.path.write_bytes(b"YUMEXSNAP 0\n{}\n")
+    assert not snapshot.load("key")
+    assert not snapshot.path.exists()
+
+
+def test_separators_in_values(snapshot, installed):
+    """should not break on separator chars in the values"""
+    installed[0]["summary"] = "bad\x1fsum\x1emary"
+    snapshot.save("key", {"installed": installed})
+    assert snapshot.get("installed")[0]["summary"] == "bad sum mary"
+
+
+def test_save_removes_index(snapshot, installed, available):
+    """should remove the search index, when the indexed sections is changed"""
+    snapshot.save("key", {"installed": installed, "available": available})
+    snapshot.index_path.write_bytes(b"index")
+    snapshot.save("key", {"upgrades": []})
+    assert snapshot.index_path.exists()
+    snapshot.save("key", {"installed": installed})
+    assert not snapshot.index_path.exists()
+    snapshot.index_path.write_bytes(b"index")
+    snapshot.invalidate()
+    assert not snapshot.index_path.exists()
+
+
+def test_get_while_saving(snapshot, installed, available):
+    """should get the sections, while another thread saves the snapshot"""
+    snapshot.save("key", {"installed": installed})
+    done = threading.Event()
+    errors = []
+
+    def save():
+        try:
+            for _ndx in range(500):
+                snapshot.save("key", {"available": available})
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    # switch threads often, so get is called in the middle of a save
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        thread = threading.Thread(target=save)
+        thread.start()
+        while not done.is_set() and not errors:
+            try:
+                assert snapshot.get("installed") == installed
+            except Exception as e:
+                errors.append(e)
+        thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert errors == []
@@ -0,0 +1,92 @@
+import pytest
+
+from .standin_data import StandinConfig, StandinData
+
+
+@pytest.fixture(scope="module")
+def data() -> StandinData:
+    return StandinData(StandinConfig(packages=2000, repos=2, installed=0.3, updates=0.5, advisories=1.0))
+
+
+def test_generate(data):
+    """should generate the configured number of packages and the same dataset from a seed"""
+    assert len(data.available) >= 2000
+    assert len(data.installed) > 0
+    assert [repo["id"] for repo in data.repos] == ["fedora", "updates", "updates-testing", "extra-0", "extra-1"]
+    other = StandinData(data.config)
+    assert other.available == data.available
+    assert other.advisories == data.advisories
+
+
+def test_scopes(data):
+    """should list the packages in a scope"""
+    installed = data.list_packages({"scope": "installed"})
+    assert len(installed) == len(data.installed)
+    assert all(data.package_attr(pkg, "is_installed") for pkg in installed)
+    upgrades = data.list_packages({"scope": "upgrades"})
+    assert len(upgrades) > 0
+    for pkg in upgrades:
+        assert pkg.repo_id == "updates"
+        assert pkg.evr_key > data.installed[pkg.na].evr_key
+    assert len(data.list_packages({"scope": "upgradable"})) == len(upgrades)
+
+
+def test_latest_limit(data):
+    """should only list the newest package of each name.arch"""
+    pkgs = data.list_packages({"scope": "available"})
+    latest = data.list_packages({"scope": "available", "latest-limit": 1})
+    assert len(latest) == len({pkg.na for pkg in pkgs})
+    assert len(latest) < len(pkgs)
+
+
+def test_patterns(data):
+    """should match the patterns to the name or the nevra, ignoring the case"""
+    pkg = data.available[10]
+    assert data.list_packages({"patterns": [pkg.name.upper()], "scope": "available"})[0].name == pkg.name
+    assert data.list_packages({"patterns": [pkg.nevra], "scope": "available"}) == [pkg]
+    found = data.list_packages({"patterns": ["*fire*"], "scope": "available"})
+    assert found and all("fire" in pkg.name for pkg in found)
+    assert data.list_packages({"patterns": ["XXXNOTFOUNDXXX"], "scope": "all"}) == []
+
+
+def test_repo_and_arch(data):
+    """should filter by repository and arch"""
+    pkgs = data.list_packages({"scope": "available", "repo": ["extra-0"], "arch": "noarch"})
+    assert pkgs and all(pkg.repo_id == "extra-0" and pkg.arch == "noarch" for pkg in pkgs)
+
+
+def test_package_attrs(data):
+    """should return the attributes as dnf5daemon does"""
+    pkg = data.available[0]
+    attrs = data.package_attrs(pkg, ["name", "evr", "arch", "repo_id", "summary", "install_size", "is_installed"])
+    assert attrs["name"] == pkg.name
+    assert attrs["evr"] == pkg.evr
+    assert isinstance(attrs["is_installed"], bool)
+    with pytest.raises(ValueError):
+        data.package_attr(pkg, "unknown")
+
+
+def test_advisories(data):
+    """should list the advisories for the packages"""
+    upgrade = next(iter(data.upgrades().values()))
+    advisories = data.list_advisories({"contains_pkgs": [upgrade.name], "advisory_attrs": ["name", "type", "severity"]})
+    assert len(advisories) == 1
+    assert set(advisories[0]) == {"name", "type", "severity"}
+    assert len(data.list_advisories({})) == len(data.advisories)
+    advisories = data.list_advisories({"contains_pkgs": [upgrade.name], "advisory_attrs": ["name", "collections"]})
+    expected = {"n": upgrade.name, "e": upgrade.epoch, "v": upgrade.version, "r": upgrade.release, "a": upgrade.arch}
+    assert advisories[0]["collections"] == [{"packages": [expected]}]
+
+
+def test_resolve_and_apply():
+    """should resolve the goal with a dependency, and update the installed packages"""
+    data = StandinData(StandinConfig(packages=500, installed=0.2))
+    pkg = next(pkg for pkg in data.available if not data.is_installed(pkg))
+    items = data.resolve([("Install", pkg.name)])
+    assert items[0] == ("Install", pkg, "User")
+    data.apply(items)
+    assert data.is_installed(pkg)
+    items = data.resolve([("Remove", pkg.name)])
+    data.apply(items)
+    assert not data.is_installed(pkg)
+    assert data.resolve([("Install", "XXXNOTFOUNDXXX")]) == []
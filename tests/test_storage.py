@@ -1,8 +1,12 @@
+import gc
+
 import pytest
 from gi.repository import Gio
 
+from yumex.backend.dnf import YumexPackage
+from yumex.utils.columns import PackageColumns
 from yumex.utils.enums import SortType
-from yumex.utils.storage import PackageStorage
+from yumex.utils.storage import PackageListModel, PackageStorage
 
 
 @pytest.fixture
@@ -27,7 +31,7 @@ def test_storage_add_pkg_twice(storage: PackageStorage, pkg):
     storage.add_package(pkg)
     storage.add_package(pkg)
     assert len(storage) == 1
-    assert storage._index == {pkg.nevra: 1}
+    assert storage._index == {pkg.nevra: pkg}
     assert storage.get_storage()[0] == pkg
 
 
@@ -140,3 +144,222 @@ def test_storage_find_by_nevra(storage: PackageStorage, pkg, pkg_other, pkg_upd)
     assert po == pkg
     po = storage.find_by_nevra(pkg_upd.nevra)  # pkg is not in storage
     assert po is None
+
+
+@pytest.fixture
+def columnar() -> PackageStorage:
+    return PackageStorage(columnar=True)
+
+
+def test_columnar_add_columns(columnar: PackageStorage, pkg, pkg_other, pkg_upd):
+    """should show the packages in the columns"""
+    columnar.add_columns(PackageColumns.from_packages([pkg, pkg_other]))
+    model = columnar.get_storage()
+    assert isinstance(model, PackageListModel)
+    assert model.get_n_items() == 2
+    assert list(columnar) == [pkg, pkg_other]
+    assert pkg in columnar
+    assert pkg_upd not in columnar
+
+
+def test_columnar_add_columns_not_columnar(storage: PackageStorage, pkg):
+    """should raise ValueError, when not in columnar mode"""
+    with pytest.raises(ValueError):
+        storage.add_columns(PackageColumns.from_packages([pkg]))
+
+
+def test_columnar_sort(columnar: PackageStorage, pkg, pkg_other):
+    """should sort the rows, without changing the columns"""
+    columns = PackageColumns.from_packages([pkg_other, pkg])
+    columnar.add_columns(columns)
+    columnar.sort_by(SortType.NAME)
+    assert list(columnar) == [pkg, pkg_other]
+    columnar.sort_by(SortType.SIZE)
+    assert list(columnar) == [pkg_other, pkg]
+    assert list(columns) == [pkg_other, pkg]
+    with pytest.raises(ValueError):
+        columnar.sort_by("notfound")
+
+
+def test_columnar_pin_packages(columnar: PackageStorage, pkg, pkg_other, pkg_upd, pkg_dict):
+    """should show the pinned package objects"""
+    columnar.add_columns(PackageColumns.from_packages([pkg, pkg_other]))
+    queued = YumexPackage(**pkg_dict)
+    columnar.pin_packages([queued, pkg_upd])
+    assert columnar.get_storage()[0] is queued
+    assert columnar.find_by_nevra(pkg.nevra) is queued
+    assert columnar.find_by_nevra(pkg_upd.nevra) is None
+
+
+def test_columnar_add_package(columnar: PackageStorage, pkg, pkg_other, pkg_upd):
+    """should not change shared columns, when adding packages"""
+    columns = PackageColumns.from_packages([pkg, pkg_other])
+    columnar.add_columns(columns)
+    columnar.add_package(pkg_upd)
+    assert len(columnar) == 3
+    assert columnar.get_storage()[2] is pkg_upd
+    assert len(columns) == 2
+
+
+def test_storage_set_queued(storage: PackageStorage, pkg, pkg_other):
+    """should queue and dequeue all packages, and return the changed packages"""
+    storage.add_packages([pkg, pkg_other])
+    pkg.queued = True
+    assert storage.set_queued(True) == [pkg_other]
+    assert pkg.queued and pkg_other.queued
+    assert storage.set_queued(False) == [pkg, pkg_other]
+    assert not pkg.queued and not pkg_other.queued
+
+
+def test_columnar_insert_sorted(columnar: PackageStorage, pkg_dict):
+    """should insert at the sorted position, comparing only a few rows"""
+    pkgs = [YumexPackage(**(pkg_dict | {"name": f"pkg{ndx:03d}"})) for ndx in range(0, 200, 2)]
+    columnar.add_columns(PackageColumns.from_packages(pkgs))
+    compared = []
+
+    def sort_fn(a, b):
+        compared.append(a)
+        return a.name > b.name
+
+    new_pkg = YumexPackage(**(pkg_dict | {"name": "pkg101"}))
+    columnar.insert_sorted(new_pkg, sort_fn)
+    model = columnar.get_storage()
+    assert model[51] is new_pkg
+    assert model[50].name == "pkg100"
+    assert model[52].name == "pkg102"
+    assert len(compared) <= 8
+    # the packages sorted the same, is kept before the new package
+    same = YumexPackage(**(pkg_dict | {"name": "pkg101", "version": "2"}))
+    columnar.insert_sorted(same, lambda a, b: (a.name > b.name) - (a.name < b.name))
+    assert model[52] is same
+    columnar.insert_sorted(YumexPackage(**(pkg_dict | {"name": "zzz"})), sort_fn)
+    assert model[len(model) - 1].name == "zzz"
+
+
+def test_columnar_set_queued(columnar: PackageStorage, pkg, pkg_other, pkg_upd):
+    """should keep the queued state in the columns, and not create package objects to dequeue"""
+    columns = PackageColumns.from_packages([pkg, pkg_other, pkg_upd])
+    columnar.add_columns(columns)
+    model = columnar.get_storage()
+    model.remove_range(2, 1)
+    queued = columnar.set_queued(True)
+    assert [p.nevra for p in queued] == [pkg.nevra, pkg_other.nevra]
+    assert list(columns.queued) == [1, 1, 0]
+    # the queued package objects is kept by the queue, not by the columns
+    assert columns._objects == {}
+    assert model[0] is queued[0] and model[1].queued
+    assert columnar.set_queued(True) == []
+    assert columnar.set_queued(False) == queued
+    assert list(columns.queued) == [0, 0, 0]
+    assert len(list(columns.packages())) == 2
+    assert not columns[2].queued
+
+
+def test_columnar_set_queued_released(columnar: PackageStorage, pkg, pkg_other):
+    """should queue the rows again, when the queued package objects is released"""
+    columns = PackageColumns.from_packages([pkg, pkg_other])
+    columnar.add_columns(columns)
+    queued = columnar.set_queued(True)
+    # pkg is dequeued and released by the queue
+    queued[0].queued = False
+    del queued[0]
+    gc.collect()
+    assert not columnar.get_storage()[0].queued
+    assert [p.nevra for p in columnar.set_queued(True)] == [pkg.nevra]
+
+
+def test_storage_find_by_nevra_insert_sorted(storage: PackageStorage, pkg, pkg_other):
+    """should find packages added with insert_sorted"""
+    storage.insert_sorted(pkg_other, lambda a, b: a.name > b.name)
+    storage.insert_sorted(pkg, lambda a, b: a.name > b.name)
+    assert storage.find_by_nevra(pkg.nevra) is pkg
+    assert storage.find_by_nevra(pkg_other.nevra) is pkg_other
+    storage.clear()
+    assert storage.find_by_nevra(pkg.nevra) is None
+
+
+def test_storage_get_position(storage: PackageStorage, pkg, pkg_other, pkg_upd, pkg_yumex):
+    """should keep track of the package positions"""
+    storage.add_packages([pkg_yumex, pkg])
+    assert storage.get_position(pkg.nevra) == 1
+    storage.sort_by(SortType.NAME)  # mypkg, yumex
+    assert storage.get_position(pkg.nevra) == 0
+    # the store is sorted by name, so the insert position is well defined
+    storage.insert_sorted(pkg_other, lambda a, b: (a.name > b.name) - (a.name < b.name))
+    assert storage.get_position(pkg.nevra) == 0
+    assert storage.get_position(pkg_other.nevra) == 1
+    assert storage.get_position(pkg_yumex.nevra) == 2
+    storage.add_package(pkg_upd)
+    assert storage.get_position(pkg_upd.nevra) == 3
+    storage.sort_by(SortType.SIZE)  # 1024, 1024, 1024, 2048
+    assert storage.get_position(pkg.nevra) == 3
+    assert storage.get_position("notfound") is None
+
+
+def test_storage_overlay(storage: PackageStorage, pkg, pkg_other, pkg_dict):
+    """should replace the packages with the stored package objects"""
+    storage.add_package(pkg)
+    incoming = [YumexPackage(**pkg_dict), pkg_other]
+    result = storage.overlay(incoming)
+    assert result[0] is pkg
+    assert result[1] is pkg_other
+
+
+def test_storage_sort_cached(storage: PackageStorage, pkg, pkg_other, pkg_upd):
+    """should reuse the sort order, until packages is added"""
+    storage.add_packages([pkg_other, pkg])
+    storage.sort_by(SortType.NAME)
+    storage.sort_by(SortType.SIZE)
+    assert set(storage._sorted) == {SortType.NAME, SortType.SIZE}
+    storage.sort_by(SortType.NAME)
+    assert list(storage) == [pkg, pkg_other]
+    storage.add_package(pkg_upd)
+    assert storage._sorted == {}
+    storage.sort_by(SortType.NAME)  # mypkg-1, mypkg-2, otherpkg
+    assert list(storage) == [pkg, pkg_upd, pkg_other]
+
+
+def test_storage_retain(storage: PackageStorage, pkg, pkg_other, pkg_upd, pkg_yumex):
+    """should keep the given packages in the current order, and refuse packages not in storage"""
+    storage.add_packages([pkg, pkg_other, pkg_upd, pkg_yumex])
+    storage.sort_by(SortType.NAME)  # mypkg-1, mypkg-2, otherpkg, yumex
+    store = storage.get_storage()
+    assert storage.retain([pkg_yumex, pkg])
+    assert storage.get_storage() is store
+    assert list(storage) == [pkg, pkg_yumex]
+    assert storage.find_by_nevra(pkg_upd.nevra) is None
+    assert storage.get_position(pkg_yumex.nevra) == 1
+    assert not storage.retain([pkg, pkg_other])
+    assert list(storage) == [pkg, pkg_yumex]
+    # the packages must be in the same order, if ordered
+    assert not storage.retain([pkg_yumex, pkg], ordered=True)
+    assert storage.retain([pkg_yumex], ordered=True)
+    assert list(storage) == [pkg_yumex]
+
+
+def test_storage_replace(storage: PackageStorage, columnar: PackageStorage, pkg, pkg_other, pkg_upd):
+    """should replace the packages in the given order, with one splice of the store"""
+    storage.add_packages([pkg, pkg_other])
+    store = storage.get_storage()
+    assert storage.replace([pkg_upd, pkg]) is store
+    assert list(storage) == [pkg_upd, pkg]
+    assert pkg_upd in storage and pkg_other not in storage
+    assert storage.get_position(pkg.nevra) == 1
+    storage.replace([])
+    assert len(storage) == 0
+    with pytest.raises(ValueError):
+        columnar.replace([pkg])
+
+
+def test_columnar_retain(columnar: PackageStorage, pkg, pkg_other, pkg_upd, pkg_yumex):
+    """should remove the runs of packages not kept, with an items_changed for each run"""
+    columnar.add_packages([pkg, pkg_other, pkg_upd, pkg_yumex])
+    model = columnar.get_storage()
+    changes = []
+    model.items_changed = lambda position, removed, added: changes.append((position, removed, added))
+    assert columnar.retain([pkg])
+    assert list(columnar) == [pkg]
+    assert changes == [(1, 3, 0)]
+    # the removed rows is not shown again, when sorting
+    columnar.sort_by(SortType.NAME)
+    assert list(columnar) == [pkg]
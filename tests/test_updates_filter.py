@@ -1,3 +1,5 @@
+from unittest.mock import MagicMock
+
 from yumex.backend.dnf import YumexPackage
 from yumex.backend.dnf5daemon import create_package
 from yumex.backend.dnf5daemon.filter import FilterUpdates
@@ -76,3 +78,61 @@ def test_filter_updates(pkg):
     assert len(filtered_updates) == 1
     assert filtered_updates[0].repo == "base"
     assert filtered_updates[0].evr == "1.0-1"
+
+
+def get_packages_by_names(pkgs: list[YumexPackage]) -> list:
+    # Mock function to simulate bulk package retrieval
+    result = []
+    for pkg in pkgs:
+        result.extend(get_packages_by_name(pkg))
+    return result
+
+
+def test_filter_updates_bulk(pkg, pkg_other):
+    """should build the repo index with a single bulk lookup"""
+    repo_priority = {
+        "base": 1,
+        "updates": 2,
+        "epel": 3,
+    }
+    by_name = MagicMock(side_effect=get_packages_by_name)
+    by_names = MagicMock(side_effect=get_packages_by_names)
+    filter_updates = FilterUpdates(repo_priority, by_name, by_names)
+    updates = get_packages_by_name(pkg) + get_packages_by_name(pkg_other)
+    filtered_updates = filter_updates.get_updates(updates)
+    assert by_names.call_count == 1
+    assert by_name.call_count == 0
+    assert len(filtered_updates) == 2
+    assert {upd.repo for upd in filtered_updates} == {"base"}
+
+
+def test_filter_updates_bulk_not_found(pkg):
+    """should not fall back to single lookups, when bulk lookup don't find the package"""
+    repo_priority = {"updates": 99}
+    by_name = MagicMock(side_effect=get_packages_by_name)
+    filter_updates = FilterUpdates(repo_priority, by_name, lambda pkgs: [])
+    pkg.repo = "updates"
+    filtered_updates = filter_updates.get_updates([pkg])
+    assert by_name.call_count == 0
+    assert filtered_updates == [pkg]
+
+
+def test_filter_updates_version_order(pkg):
+    """should compare the versions as rpm does, 1.10 is newer than 1.9"""
+    filter_updates = FilterUpdates({"updates": 99}, get_packages_by_name, lambda pkgs: [])
+    updates = []
+    for evr in ("1.9-1", "1.10-1", "1.2-1"):
+        upd = create_package(
+            {
+                "arch": "noarch",
+                "evr": evr,
+                "install_size": 1024,
+                "is_installed": False,
+                "name": pkg.name,
+                "repo_id": "updates",
+                "summary": "",
+            }
+        )
+        updates.append(upd)
+    filtered_updates = filter_updates.get_updates(updates)
+    assert [upd.evr for upd in filtered_updates] == ["1.10-1"]
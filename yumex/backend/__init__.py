@@ -13,7 +13,7 @@
 #
 # Copyright (C) 2024 Tim Lauridsen
 
-
+import time
 from dataclasses import dataclass, field
 
 
@@ -30,3 +30,28 @@ class TransactionResult:
     problems: list = field(default_factory=list)
     key_install: bool = False
     key_values: tuple|None = None
+
+
+@dataclass
+class SearchStats:
+    """the latency of a search (ms), from the search is requested until the result is shown"""
+
+    query: str
+    requested: float = field(default_factory=time.perf_counter)
+    # waiting for a running search to complete, and for the search thread to start
+    queue_wait: float = 0.0
+    # where the result is from (index, refined or daemon)
+    source: str = ""
+    # the search in the backend, including the dnf5daemon call and decoding
+    search: float = 0.0
+    daemon: float = 0.0
+    decode: float = 0.0
+    # updating the package view with the result
+    model: float = 0.0
+    packages: int = 0
+
+    def __str__(self) -> str:
+        return (
+            f"search({self.query}): {self.packages} packages from {self.source or 'none'}, queue wait {self.queue_wait:.1f} ms, "
+            f"daemon {self.daemon:.1f} ms, decode {self.decode:.1f} ms, search {self.search:.1f} ms, model update {self.model:.1f} ms"
+        )
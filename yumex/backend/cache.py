@@ -1,42 +1,281 @@
 import logging
-from typing import Generator
+import threading
+from collections import OrderedDict
+from typing import Any, Generator, Iterable, Iterator
+
+from gi.repository import GLib
 
 from yumex.backend.dnf import YumexPackage
-from yumex.utils.enums import PackageFilter, PackageState
+from yumex.utils.columns import PackageColumns
+from yumex.utils.enums import InfoType, PackageFilter, PackageState
 
 logger = logging.getLogger(__name__)
 
+# max. number of package info entries
+INFO_CACHE_ENTRIES = 2000
+# max. estimated size of the cached package info (bytes)
+INFO_CACHE_BYTES = 16 * 2**20
+# max. number of cached packages, not counting the pinned packages
+PACKAGE_CACHE_ENTRIES = 20000
+# max. estimated size of the cached packages, not counting the pinned packages (bytes)
+PACKAGE_CACHE_BYTES = 32 * 2**20
+# the packages is evicted down to this fraction of the limits
+EVICT_WATERMARK = 0.9
+# estimated memory size of a YumexPackage without the strings (GObject, instance dict & values)
+PACKAGE_OVERHEAD = 1200
+
+
+def info_size(value: Any) -> int:
+    """estimated memory size of a package info value (bytes)"""
+    match value:
+        case str():
+            return 49 + len(value)
+        case list() | tuple():
+            return 56 + 8 * len(value) + sum(info_size(item) for item in value)
+        case dict():
+            return 232 + sum(info_size(key) + info_size(item) for key, item in value.items())
+        case _:
+            return 32
+
+
+def package_size(pkg: YumexPackage) -> int:
+    """estimated memory size of a YumexPackage (bytes)"""
+    return PACKAGE_OVERHEAD + sum(len(value) for value in (pkg.name, pkg.version, pkg.release, pkg.arch, pkg.repo, pkg.description))
+
+
+class PackageInfoCache:
+    """A bounded LRU cache for package info, keyed by (nevra, InfoType)
+
+    The least recently used entries is evicted, when there is too many entries or the
+    estimated size of the entries is too big (like big file lists). It is used from
+    the threads getting package info, so it is thread-safe.
+    """
+
+    def __init__(self, max_entries: int = INFO_CACHE_ENTRIES, max_bytes: int = INFO_CACHE_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, InfoType], tuple[Any, int]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple[str, InfoType]) -> bool:
+        return key in self._entries
+
+    def get(self, nevra: str, info_type: InfoType) -> Any | None:
+        """get a cached value and mark it as recently used, None if not cached"""
+        with self._lock:
+            entry = self._entries.get((nevra, info_type))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((nevra, info_type))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, nevra: str, info_type: InfoType, value: Any) -> None:
+        """cache a value, values bigger than a quarter of the cache is not cached"""
+        size = info_size(value)
+        if size > self.max_bytes // 4:
+            logger.debug(f"info cache: {nevra} {info_type} is too big to cache ({size} bytes)")
+            return
+        with self._lock:
+            if (old := self._entries.pop((nevra, info_type), None)) is not None:
+                self.size -= old[1]
+            self._entries[(nevra, info_type)] = (value, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def missing(self, nevras: list[str], info_type: InfoType) -> list[str]:
+        """the nevras without a cached value"""
+        return [nevra for nevra in nevras if (nevra, info_type) not in self._entries]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
 
 class YumexPackageCache:
     """A cache for storing YumexPackages, so the state is preserved when getting packages
     from the PackageBackend.
 
+    The packages in the package filter lists, the queued packages and the packages shown in
+    the view is pinned, the other packages (from searches and depsolving) is evicted by LRU,
+    when there is too many or their estimated size is too big (max_entries 0 is no limit).
+    The number and size of the pinned packages is updated, when the pinned packages is changed.
+
     Implement the PackageCache protocol class
     """
 
-    def __init__(self, backend: YumexPackageBackend) -> None:
+    def __init__(self, backend: YumexPackageBackend, max_entries: int = PACKAGE_CACHE_ENTRIES, max_bytes: int = PACKAGE_CACHE_BYTES) -> None:
         self._packages = {}
         self.backend: YumexPackageBackend = backend
-        self._package_dict = {}
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # cached packages, the least recently used first
+        self._package_dict: OrderedDict[YumexPackage, YumexPackage] = OrderedDict()
+        self._sizes: dict[YumexPackage, int] = {}
+        self.size = 0
+        # the cached packages there is pinned, and their size
+        self._pinned: set[YumexPackage] = set()
+        self._pinned_size = 0
+        # the packages in the package filter lists
+        self._listed: set[YumexPackage] = set()
+        # the packages shown in the view
+        self._visible: set[YumexPackage] = set()
+        # the packages in the queue
+        self._queued: set[YumexPackage] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._package_dict)
 
-    def get_packages_by_filter(self, pkgfilter: PackageFilter, reset=False) -> list[YumexPackage]:
+    def stats(self) -> dict[str, int]:
+        """the cache counters, for debugging"""
+        return {
+            "entries": len(self._package_dict),
+            "bytes": self.size,
+            "pinned": len(self._pinned),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def forget(self, touched: set[tuple[str, str]]) -> None:
+        """forget the package lists and the packages changed by a transaction
+
+        touched is the name.arch of the packages installed or removed by the transaction, the
+        queued packages is forgotten too. The state of the other cached packages is not changed.
+        """
+        self._packages = {}
+        self._listed = set()
+        self._visible = set()
+        for pkg in [pkg for pkg in self._package_dict if pkg.queued or pkg in self._queued or (pkg.name, pkg.arch) in touched]:
+            del self._package_dict[pkg]
+            self.size -= self._sizes.pop(pkg)
+        self._queued = set()
+        self._pinned = set()
+        self._pinned_size = 0
+        logger.debug(f"package cache: {len(self._package_dict)} packages kept after the transaction")
+
+    def is_pinned(self, pkg: YumexPackage) -> bool:
+        """True if the package is queued, in a package filter list or shown in the view"""
+        return pkg in self._queued or pkg in self._listed or pkg in self._visible
+
+    def _update_pinned(self, pkgs: Iterable[YumexPackage]) -> None:
+        """update the pinned packages, for packages there is pinned or unpinned"""
+        pinned = self._pinned
+        for pkg in pkgs:
+            if pkg in self._package_dict and self.is_pinned(pkg):
+                if pkg not in pinned:
+                    pinned.add(pkg)
+                    self._pinned_size += self._sizes[pkg]
+            elif pkg in pinned:
+                pinned.remove(pkg)
+                self._pinned_size -= self._sizes[pkg]
+
+    def set_queued(self, pkgs: Iterable[YumexPackage]) -> None:
+        """set the packages in the queue, they are pinned"""
+        queued = self._queued
+        self._queued = set(pkgs)
+        self._update_pinned(queued ^ self._queued)
+
+    def get_packages_by_filter(self, pkgfilter: PackageFilter, reset=False) -> list[YumexPackage] | PackageColumns:
         if not isinstance(pkgfilter, PackageFilter):
             raise KeyError(f"{pkgfilter} is not a valid PackageFilter")
         if pkgfilter not in self._packages or reset:
-            pkgs = self.get_packages(self.backend.get_packages(pkgfilter))
-            self._packages[pkgfilter] = list(pkgs)
+            pkgs = self.backend.get_packages(pkgfilter)
+            if isinstance(pkgs, PackageColumns):
+                self._packages[pkgfilter] = self.merge_columns(pkgs)
+            else:
+                self._packages[pkgfilter] = list(self.get_packages(pkgs))
+                self._listed.update(self._packages[pkgfilter])
+                self._update_pinned(self._packages[pkgfilter])
         return self._packages[pkgfilter]
 
-    def get_packages(self, pkgs: list[YumexPackage]) -> Generator[YumexPackage, None, None]:
+    def can_stream_packages(self, pkgfilter: PackageFilter) -> bool:
+        """True if the packages is not cached and can be streamed from the backend"""
+        return pkgfilter not in self._packages and self.backend.can_stream_packages(pkgfilter)
+
+    def stream_packages_by_filter(self, pkgfilter: PackageFilter) -> Iterator[PackageColumns]:
+        """get the packages in chunks from the backend, they is cached when all is received
+
+        This is run in a thread, so the chunks is added to the yielded columns and the packages
+        is merged with the cache in the main thread (GLib.idle_add), where the columns and the
+        cache is used. The columns must only be read in the main thread, from a callback added
+        after the chunk is yielded (like a GLib.idle_add or the RunAsync callback)
+        """
+        columns = PackageColumns()
+        for chunk in self.backend.stream_packages(pkgfilter):
+            GLib.idle_add(self._add_chunk, columns, chunk)
+            yield columns
+        GLib.idle_add(self._add_streamed, pkgfilter, columns)
+
+    def _add_chunk(self, columns: PackageColumns, chunk: PackageColumns) -> bool:
+        columns.extend(chunk)
+        return GLib.SOURCE_REMOVE
+
+    def _add_streamed(self, pkgfilter: PackageFilter, columns: PackageColumns) -> bool:
+        """cache the streamed packages"""
+        self._packages[pkgfilter] = self.merge_columns(columns)
+        return GLib.SOURCE_REMOVE
+
+    def merge_columns(self, columns: PackageColumns) -> PackageColumns:
+        """use the cached packages for the rows in a columnar package list
+
+        Only the packages already in the cache is merged, the package objects for the other
+        rows is created by the columns when they are needed
+        """
+        listed = []
+        for cached_pkg in self._package_dict.values():
+            row = columns.find(cached_pkg.nevra)
+            if row is not None:
+                pkg = columns.get_package(row)
+                if pkg.state != cached_pkg.state:
+                    self._update_state(cached_pkg, pkg)
+                cached_pkg.action = pkg.action
+                columns.set_package(row, cached_pkg)
+                listed.append(cached_pkg)
+        self._listed.update(listed)
+        self._update_pinned(listed)
+        return columns
+
+    def get_packages(self, pkgs: list[YumexPackage], visible: bool = False) -> Generator[YumexPackage, None, None]:
+        """get the cached packages, visible packages replaces the packages shown in the view"""
+        if visible:
+            shown, self._visible = self._visible, set()
+            self._update_pinned(shown)
         for pkg in pkgs:
-            yield self.get_package(pkg)
+            cached_pkg = self.get_package(pkg)
+            if visible:
+                self._visible.add(cached_pkg)
+                self._update_pinned((cached_pkg,))
+            yield cached_pkg
 
     def get_package(self, pkg: YumexPackage) -> YumexPackage:
         """cache a new package or return the already cached one"""
         if pkg not in self._package_dict:
+            self.misses += 1
             self._package_dict[pkg] = pkg
+            self._sizes[pkg] = size = package_size(pkg)
+            self.size += size
+            if self.is_pinned(pkg):
+                self._update_pinned((pkg,))
+            elif self._is_full():
+                self._evict()
             return pkg
         else:
+            self.hits += 1
+            self._package_dict.move_to_end(pkg)
             cached_pkg = self._package_dict[pkg]
             if pkg.state != cached_pkg.state:
                 # logger.debug(f" update state : {cached_pkg}{cached_pkg.state} {pkg}{pkg.state}")
@@ -46,6 +285,34 @@ class YumexPackageCache:
             cached_pkg.action = pkg.action
             return cached_pkg
 
+    def _is_full(self) -> bool:
+        if self.max_entries and len(self._package_dict) - len(self._pinned) > self.max_entries:
+            return True
+        return self.size - self._pinned_size > self.max_bytes
+
+    def _evict(self) -> None:
+        """evict the least recently used packages, there is not pinned
+
+        The packages is evicted down to EVICT_WATERMARK of the limits, so the cache is only
+        scanned again, after a number of new packages is added
+        """
+        pinned = self._pinned
+        unpinned = [pkg for pkg in self._package_dict if pkg not in pinned]
+        unpinned_size = self.size - self._pinned_size
+        max_entries = int(self.max_entries * EVICT_WATERMARK) if self.max_entries else len(unpinned)
+        max_bytes = int(self.max_bytes * EVICT_WATERMARK)
+        evicted = 0
+        for pkg in unpinned:
+            if len(unpinned) - evicted <= max_entries and unpinned_size <= max_bytes:
+                break
+            del self._package_dict[pkg]
+            size = self._sizes.pop(pkg)
+            unpinned_size -= size
+            self.size -= size
+            evicted += 1
+        self.evictions += evicted
+        logger.debug(f"package cache: evicted {evicted} packages, {len(pinned)} pinned packages")
+
     def _update_state(self, current, new) -> None:
         """update the state of the cached pkg"""
         match (current.state, new.state):
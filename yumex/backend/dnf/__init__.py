@@ -76,6 +76,15 @@ class YumexPackage(GObject.GObject):
             self._queued = state
             self.notify("queued")
 
+    def set_queued_silent(self, state: bool) -> bool:
+        """set the queued state without notify::queued (bulk changes), return True if it is changed
+
+        the caller must notify the packages shown in the view
+        """
+        changed = self._queued != state
+        self._queued = state
+        return changed
+
     @property
     def is_installed(self) -> bool:
         return self.state == PackageState.INSTALLED
@@ -176,6 +185,21 @@ def reload_metadata_expired():
     return datetime.now() > update_time
 
 
+def get_metadata_timestamp() -> int:
+    settings = Gio.Settings.new(APP_ID)
+    return settings.get_int64("meta-load-time")
+
+
+def get_read_sessions() -> int:
+    settings = Gio.Settings.new(APP_ID)
+    return max(settings.get_int("read-sessions"), 0)
+
+
+def get_package_cache_size() -> int:
+    settings = Gio.Settings.new(APP_ID)
+    return max(settings.get_int("package-cache-size"), 0)
+
+
 def update_metadata_timestamp():
     settings = Gio.Settings.new(APP_ID)
     settings.set_int64("meta-load-time", int(datetime.now().timestamp()))
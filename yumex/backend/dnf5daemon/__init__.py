@@ -1,14 +1,22 @@
 import datetime
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import asdict, dataclass, field
-from typing import Iterable, Self, Any
+from typing import Iterable, Iterator, Self, Any
 
 import dbus
 
-from yumex.backend import TransactionResult
-from yumex.backend.dnf import TransactionOptions, YumexPackage
+from yumex.backend import SearchStats, TransactionResult
+from yumex.backend.cache import PackageInfoCache
+from yumex.backend.dnf import TransactionOptions, YumexPackage, get_metadata_timestamp, get_read_sessions
 from yumex.backend.dnf5daemon.filter import FilterUpdates
+from yumex.backend.search_index import INDEX_SCOPES, PackageIndex, is_glob, nevra, rank_key
+from yumex.backend.snapshot import INDEXED_SECTIONS, PackageSnapshot, get_metadata_state, get_rpmdb_state, make_key
+from yumex.utils.columns import PackageColumns
 from yumex.utils.enums import (
+    AdvisoryFilter,
     DownloadType,
     InfoType,
     PackageFilter,
@@ -18,8 +26,12 @@ from yumex.utils.enums import (
     TransactionAction,
     TransactionCommand,
 )
+from yumex.utils.evr import compare_many, evr_key
+from yumex.utils.progress import ProgressThrottle
 
-from .client import Dnf5DbusClient
+from .advisory import AdvisoryIndex, AdvisorySummary
+from .client import Dnf5DbusClient, ListTransfer
+from .delta import TransactionDelta, checksum, installed_state_matches
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +47,15 @@ ADVISOR_ATTRS = [
     "references",
 ]
 
+# dnf5daemon package attributes for the package info, there is fetched together
+INFO_ATTRS = {
+    InfoType.DESCRIPTION: "description",
+    InfoType.FILES: "files",
+    InfoType.CHANGELOG: "changelogs",
+    InfoType.PROVIDES: "provides",
+    InfoType.REQUIRES: "requires",
+}
+
 PACKAGE_ATTRS = [
     "name",
     "evr",
@@ -46,6 +67,46 @@ PACKAGE_ATTRS = [
 ]
 
 
+# dnf5daemon package scopes for the package filters
+SCOPE_FILTERS = {
+    "installed": PackageFilter.INSTALLED,
+    "available": PackageFilter.AVAILABLE,
+    "upgrades": PackageFilter.UPDATES,
+}
+
+
+# package filters there can be streamed and the chunk sizes, the first chunk is small to fill the view fast
+# scopes fetched in parallel at startup, when there is read-only sessions
+PREFETCH_SCOPES = ["installed", "available", "upgrades"]
+# scopes checked against dnf5daemon in the background (reconcile_snapshot), when a transaction
+# is applied to the package lists, only the nevras is fetched (see _verify_delta)
+DELTA_VERIFY_SCOPES = ["installed", "upgrades"]
+# the latest-limit of the package lists, all installed versions is listed (installonly packages like the kernel)
+LIST_LATEST_LIMIT = {"installed": 0}
+STREAM_FILTERS = {
+    PackageFilter.INSTALLED: "installed",
+    PackageFilter.AVAILABLE: "available",
+}
+# search options, there can be answered by the search index
+INDEX_SEARCH_SCOPES = {"all", "installed", "available"}
+INDEX_SEARCH_DAEMON_OPTIONS = ("with_filenames", "with_provides", "with_binaries")
+STREAM_FIRST_CHUNK = 200
+STREAM_CHUNK = 5000
+
+
+def snapshot_fingerprint(pkgs: list[dict[str, Any]]) -> set[tuple]:
+    """the package identities used to check if snapshot packages is still current"""
+    return {(pkg["name"], pkg["evr"], pkg["arch"], pkg["repo_id"]) for pkg in pkgs}
+
+
+def refine_search(pkgs: list[dict[str, Any]], query: str) -> list[dict[str, Any]]:
+    """the packages from a dnf5daemon search (*txt*), there match a lowercase query extending txt
+
+    dnf5daemon match the pattern with the name and the nevra, so the nevra is used here too
+    """
+    return [pkg for pkg in pkgs if query in nevra(pkg).lower()]
+
+
 def create_package(pkg) -> YumexPackage:
     """Generate a YumexPackage from a dnf5daemon list package"""
     evr = pkg["evr"]
@@ -120,22 +181,25 @@ class UpdateInfo:
 
 
 @dataclass
-class DownloadQueue:
-    queue: dict = field(default_factory=dict)
+class InfoStats:
+    """dnf5daemon calls and decoded bytes used for getting package info"""
 
-    @property
-    def total(self):
-        total = 0
-        for pkg in self.queue.values():
-            total += pkg.to_download
-        return total
+    calls: int = 0
+    bytes: int = 0
 
-    @property
-    def current(self):
-        current = 0
-        for pkg in self.queue.values():
-            current += pkg.downloaded
-        return current
+    def add(self, transfer: ListTransfer | None = None) -> None:
+        self.calls += 1
+        if transfer is not None:
+            self.bytes += transfer.bytes_decoded
+
+
+@dataclass
+class DownloadQueue:
+    """the downloads in the transaction, the totals is updated with the changes of each download"""
+
+    queue: dict = field(default_factory=dict)
+    total: int = 0
+    current: int = 0
 
     @property
     def fraction(self):
@@ -149,10 +213,25 @@ class DownloadQueue:
         return self.current == self.total
 
     def add(self, pkg):
+        if (old := self.queue.get(pkg.id)) is not None:
+            self.total -= old.to_download
+            self.current -= old.downloaded
         self.queue[pkg.id] = pkg
+        self.total += pkg.to_download
+        self.current += pkg.downloaded
+
+    def update(self, pkg: DownloadPackage, downloaded: int, to_download: int | None = None) -> None:
+        """set the downloaded (and to_download) for a package in the queue"""
+        if to_download is not None:
+            self.total += to_download - pkg.to_download
+            pkg.to_download = to_download
+        self.current += downloaded - pkg.downloaded
+        pkg.downloaded = downloaded
 
     def clear(self):
         self.queue = {}
+        self.total = 0
+        self.current = 0
 
     def get(self, id):
         if id in self.queue:
@@ -164,25 +243,104 @@ class DownloadQueue:
         return len(self.queue)
 
 
+@dataclass
+class ResolvedGoal:
+    """the goal resolved in the dnf5daemon session by build_transaction"""
+
+    key: tuple
+    content: list
+    # time used to build and resolve the goal (ms)
+    resolve_time: float
+
+
+@dataclass
+class GoalStats:
+    """the goals resolved for transactions, and the resolves saved by running the resolved goal"""
+
+    resolves: int = 0
+    reused: int = 0
+    resolve_time: float = 0.0
+    saved_time: float = 0.0
+
+    def __str__(self) -> str:
+        return f"resolves: {self.resolves} ({self.resolve_time:.0f} ms), reused: {self.reused} ({self.saved_time:.0f} ms saved)"
+
+
+def goal_key(pkgs: Iterable[YumexPackage] | None, opts: TransactionOptions) -> tuple:
+    """key for a resolved goal, the packages with todo and the options used for the goal (offline is not)"""
+    items = frozenset(pkg if isinstance(pkg, str) else (pkg.nevra, pkg.todo) for pkg in pkgs or ())
+    return (opts.command, opts.parameter, items)
+
+
+@dataclass
+class LastSearch:
+    """the query, options and result of the last dnf5daemon search"""
+
+    query: str
+    options: dict
+    result: list[dict[str, Any]]
+
+
 class YumexPackageBackend:
     def __init__(self, presenter) -> None:
         super().__init__()
         self.presenter: YumexPresenter = presenter
         self.last_transaction = None
+        # the goal resolved by build_transaction, used by run_transaction when nothing is changed
+        self._resolved_goal: ResolvedGoal | None = None
+        self._last_resolve_time = 0.0
+        self.goal_stats = GoalStats()
         self.download_queue = DownloadQueue()
-        self.client = Dnf5DbusClient()
+        self.client = Dnf5DbusClient(read_sessions=get_read_sessions())
         self.client.open_session()
         self.connect_signals()
-        repo_prioritiy: dict = {id: priority for id, _, _, priority in self.get_repositories()}
-        self.filter_updates = FilterUpdates(repo_prioritiy, self.get_packages_by_name)
+        self._repositories = self.get_repositories()
+        repo_prioritiy: dict = {id: priority for id, _, _, priority in self._repositories}
+        self.filter_updates = FilterUpdates(repo_prioritiy, self.get_packages_by_name, self.get_packages_by_names)
+        self.snapshot = PackageSnapshot()
+        # scopes served from the snapshot, there is not reconciled with dnf5daemon yet
+        self._from_snapshot: set[str] = set()
+        # scopes fetched from dnf5daemon in this session
+        self._fetched: set[str] = set()
+        self._snapshot_lock = threading.Lock()
+        # package lists being fetched in the background, by scope
+        self._prefetch: dict[str, Future] = {}
+        self._prefetch_executor: ThreadPoolExecutor | None = None
+        # the list_fd transfer for the newest search
+        self._search_transfer: ListTransfer | None = None
+        self._search_lock = threading.Lock()
+        # the last search, used to answer searches extending the query
+        self._last_search: LastSearch | None = None
+        self.info_cache = PackageInfoCache()
+        self.info_stats = InfoStats()
+        # the advisories for the upgradable packages, build when the updates is loaded
+        self.advisory_index: AdvisoryIndex | None = None
+        # the content of the last completed transaction, applied to the package lists on reset
+        self._transaction_content: list | None = None
+        # the transaction applied to the package lists in the last reset, None if they was reloaded
+        self.applied_delta: TransactionDelta | None = None
+        # the package lists updated by the transaction is not checked against dnf5daemon yet
+        self._verify_delta_pending = False
+        # the search index for the installed & available packages, build in the background
+        self.search_index: PackageIndex | None = None
+        self._index_generation = 0
+        self._index_thread: threading.Thread | None = None
+        self.snapshot.load(self.get_snapshot_key())
+        self.schedule_search_index()
+        self.prefetch_package_lists(PREFETCH_SCOPES)
         self._installed_evr = self.fetch_installed_evr()
         self._offline = False
 
+    def get_snapshot_key(self) -> str:
+        """key for the package snapshot, based on the rpmdb, repo metadata and repository setup"""
+        return make_key(get_rpmdb_state(), get_metadata_state(), get_metadata_timestamp(), self._repositories)
+
     def fetch_installed_evr(self) -> dict[str, str]:
         """build dict of installed package name and evr"""
         inst_dict = {}
         for pkg in self.installed:
-            if pkg["name"] not in inst_dict:
+            # the newest evr, if more versions is installed
+            if pkg["name"] not in inst_dict or evr_key(pkg["evr"]) > evr_key(inst_dict[pkg["name"]]):
                 inst_dict[pkg["name"]] = pkg["evr"]
         return inst_dict
 
@@ -190,16 +348,147 @@ class YumexPackageBackend:
         # self.client.close_session()
         # self.client.open_session()
         # self.connect_signals()
-        logger.debug(f"DBUS: {self.client.session_base.dbus_interface}.reset()")
-        self.client.session_base.reset()
+        self.cancel_prefetch()
+        self.advisory_index = None
+        # the package states in the last search result is stale
+        self._last_search = None
+        # the goal is not valid, after the session is reset
+        self._resolved_goal = None
+        self.client.reset_sessions()
         logger.debug("Dnf5Demon is reset...")
+        self.applied_delta = None
+        self._verify_delta_pending = False
+        content, self._transaction_content = self._transaction_content, None
+        if content is not None and self._apply_transaction(content):
+            return
+        # package lists and package info fetched before the reset is stale
+        self.info_cache.clear()
+        # the rpmdb or the metadata has changed, so the snapshot is stale
+        self.snapshot.invalidate()
+        self._invalidate_search_index()
+        self._from_snapshot.clear()
+        self._fetched.clear()
+        self.prefetch_package_lists(PREFETCH_SCOPES)
+        self._installed_evr = self.fetch_installed_evr()
+
+    def _apply_transaction(self, content: list) -> bool:
+        """apply a completed transaction to the package lists in the snapshot
+
+        return False if the package lists can't be updated, then the package lists must be reloaded.
+        The updated lists is checked against dnf5daemon in the background (see _verify_delta), like
+        package lists loaded from the snapshot, so the view is reloaded if they don't match
+        """
+        delta = TransactionDelta(content)
+        installed = self.snapshot.get("installed")
+        if not delta or installed is None:
+            return False
+        available = self.snapshot.get("available")
+        upgrades = self.snapshot.get("upgrades")
+        sections = {"installed": delta.apply_installed(installed, available)}
+        if available is not None:
+            sections["available"] = delta.apply_available(available)
+            if upgrades is not None:
+                sections["upgrades"] = delta.apply_upgrades(upgrades, sections["installed"], sections["available"])
+        logger.debug(f"transaction delta: applied {len(delta)} packages to {list(sections)}")
+        self._save_snapshot(sections)
+        # scopes not in the new snapshot is fetched again
+        self._from_snapshot.intersection_update(sections)
+        self._fetched.intersection_update(sections)
+        self.prefetch_package_lists(PREFETCH_SCOPES)
         self._installed_evr = self.fetch_installed_evr()
+        self.applied_delta = delta
+        self._verify_delta_pending = True
+        return True
+
+    def prefetch_package_lists(self, scopes: Iterable[str]) -> None:
+        """start fetching the package lists in the background, one read-only session per list
+
+        Only scopes not in the snapshot is fetched, and nothing is done without a pool of read-only sessions
+        """
+        if not self.client.read_sessions:
+            return
+        if self._prefetch_executor is None:
+            self._prefetch_executor = ThreadPoolExecutor(max_workers=self.client.read_sessions, thread_name_prefix="yumex-prefetch")
+        for scope in scopes:
+            if scope not in self._prefetch and self.snapshot.get(scope) is None:
+                logger.debug(f"prefetch: fetching {scope} packages")
+                self._prefetch[scope] = self._prefetch_executor.submit(self._fetch_package_list, scope)
+
+    def cancel_prefetch(self) -> None:
+        """cancel package lists not fetched yet, and wait for the ones being fetched"""
+        prefetch, self._prefetch = self._prefetch, {}
+        for future in prefetch.values():
+            if not future.cancel():
+                future.exception()
+
+    def _take_prefetched(self, scope: str) -> list[dict[str, Any]] | None:
+        """get a prefetched package list (waiting for it if needed), None if not prefetched or it failed"""
+        if (future := self._prefetch.pop(scope, None)) is None or future.cancelled():
+            return None
+        if err := future.exception():
+            logger.debug(f"prefetch: failed to fetch {scope} packages : {err}")
+            return None
+        pkgs = future.result()
+        self._save_snapshot({scope: pkgs})
+        return pkgs
+
+    def _save_snapshot(self, sections: dict[str, list[dict[str, Any]]]) -> None:
+        """save package lists in the snapshot, the search index is build again if the indexed lists is changed"""
+        with self._snapshot_lock:
+            key = self.get_snapshot_key()
+            keep_index = key == self.snapshot.key and INDEXED_SECTIONS.isdisjoint(sections)
+            self.snapshot.save(key, sections)
+        if not keep_index:
+            self._invalidate_search_index()
+            self.schedule_search_index()
+
+    def _invalidate_search_index(self) -> None:
+        self._index_generation += 1
+        self.search_index = None
+
+    def schedule_search_index(self) -> None:
+        """build (or load) the search index in the background, when the installed & available packages is in the snapshot"""
+        if self._index_thread is not None and self._index_thread.is_alive():
+            return
+        if any(self.snapshot.get(scope) is None for scope in INDEX_SCOPES):
+            return
+        self._index_thread = threading.Thread(target=self._build_search_index, name="yumex-search-index", daemon=True)
+        self._index_thread.start()
+
+    def _build_search_index(self) -> None:
+        """load the search index saved with the snapshot or build it, until the index is current"""
+        while True:
+            with self._snapshot_lock:
+                generation = self._index_generation
+                key = self.snapshot.key
+                lists = {scope: self.snapshot.get(scope) for scope in INDEX_SCOPES}
+            if key is None or any(pkgs is None for pkgs in lists.values()):
+                return
+            t_start = time.perf_counter()
+            index = PackageIndex.load(self.snapshot.index_path, key, lists)  # type: ignore
+            if index is None:
+                index = PackageIndex.build(lists)  # type: ignore
+                built = True
+            else:
+                built = False
+            with self._snapshot_lock:
+                if generation == self._index_generation and key == self.snapshot.key:
+                    self.search_index = index
+                    if built:
+                        index.save(self.snapshot.index_path, key)
+                    action = "built" if built else "loaded"
+                    logger.debug(f"search index: {action} for {len(index)} packages in {(time.perf_counter() - t_start) * 1000:.0f} ms")
+                    return
+            logger.debug("search index: the packages has changed, building it again")
 
     def close(self):
+        self.cancel_prefetch()
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
         self.client.close_session()
 
     @property
-    def progress(self) -> Progress:
+    def progress(self) -> ProgressThrottle:
         return self.presenter.progress
 
     def __enter__(self) -> Self:
@@ -239,6 +528,9 @@ class YumexPackageBackend:
         to_reinstall = []
         to_distrosync = []
         allow_erasing = False
+        t_start = time.perf_counter()
+        # the goal resolved by build_transaction is replaced
+        self._resolved_goal = None
         self.client.session_goal.reset()
         if opts.command == TransactionCommand.SYSTEM_UPGRADE:
             res, err = self.system_upgrade("systemupgrade", opts.parameter)
@@ -298,12 +590,17 @@ class YumexPackageBackend:
                 self.client.session_rpm.distro_sync(dbus.Array(to_distrosync), dbus.Dictionary({}))
 
         res, err = self.client.resolve(dbus.Dictionary({"allow_erasing": allow_erasing}))
+        self._last_resolve_time = (time.perf_counter() - t_start) * 1000
         if res:
             result, rc = res
         else:
             result, rc = ([], 2)
         return result, rc
 
+    def _goal_key(self, pkgs: Iterable[YumexPackage] | None, opts: TransactionOptions) -> tuple:
+        """the key for the goal, it is only valid in the session there resolved it"""
+        return (str(self.client.session), *goal_key(pkgs, opts))
+
     def connect_signals(self):
         self.client.session_base.connect_to_signal("download_add_new", self.on_download_add_new)
         self.client.session_base.connect_to_signal("download_progress", self.on_download_progress)
@@ -327,6 +624,10 @@ class YumexPackageBackend:
         self.progress.set_title(_("Building Transaction"))
         logger.debug("building transaction")
         content, rc = self._build_transations(pkgs, opts)
+        self.goal_stats.resolves += 1
+        self.goal_stats.resolve_time += self._last_resolve_time
+        if rc in (0, 1):
+            self._resolved_goal = ResolvedGoal(self._goal_key(pkgs, opts), content, self._last_resolve_time)
         logger.debug(f"build transaction: rc =  {rc}")
         errors = self.client.session_goal.get_transaction_problems_string()
         for error in errors:
@@ -344,9 +645,17 @@ class YumexPackageBackend:
         self._offline = opts.offline
         self.download_queue.clear()
         self.progress.show()
-        self.progress.set_title(_("Building Transaction"))
-        logger.debug("building transaction")
-        self._build_transations(self.last_transaction, opts)  # type: ignore
+        goal, self._resolved_goal = self._resolved_goal, None
+        if goal is not None and goal.key == self._goal_key(self.last_transaction, opts):
+            # the goal confirmed by the user is still resolved in the session
+            content = goal.content
+            self.goal_stats.reused += 1
+            self.goal_stats.saved_time += goal.resolve_time
+            logger.debug(f"using the resolved goal, {goal.resolve_time:.0f} ms resolve saved, {self.goal_stats}")
+        else:
+            self.progress.set_title(_("Building Transaction"))
+            logger.debug("building transaction")
+            content, _rc = self._build_transations(self.last_transaction, opts)  # type: ignore
         # self.progress.set_title(_("Applying Transaction"))
         logger.debug("running transaction")
         if opts.offline:
@@ -358,6 +667,10 @@ class YumexPackageBackend:
         if err:
             return TransactionResult(False, error=err)
         else:
+            # the package lists can be updated from the transaction content, when the packages is
+            # installed now and the content is for the packages in the package lists
+            if not opts.offline and opts.command in (TransactionCommand.NONE, TransactionCommand.IS_FILE):
+                self._transaction_content = list(content)
             return TransactionResult(True, data=None)  # type: ignore
 
     def on_download_mirror_failure(self, session, *args):
@@ -380,7 +693,6 @@ class YumexPackageBackend:
         self.progress.set_progress(0.0)
 
     def on_transaction_verify_progress(self, session, amount, total):
-        logger.debug(f"SIGNAL : transaction_verify_progress ({amount}/{total})")
         if total > 0:
             self.progress.set_progress(amount / total)
 
@@ -406,7 +718,6 @@ class YumexPackageBackend:
         self.progress.set_progress(0.0)
 
     def on_transaction_action_progress(self, session, package_id, amount, total):
-        logger.debug(f"SIGNAL : transaction_action_progress: amount {amount} total: {total} id: {package_id}")
         if total > 0:
             self.progress.set_progress(amount / total)
 
@@ -443,19 +754,14 @@ class YumexPackageBackend:
         else:
             logger.debug(f"SIGNAL: download_progress: unexpected args: {args}")
             return
-        logger.debug(
-            f"SIGNAL : download_progress: download_id: {download_id}"
-            f" downloaded: {downloaded} total_to_download: {total_to_download}"
-        )
         pkg: DownloadPackage = self.download_queue.get(download_id)
         self.progress.set_subtitle(_(f"Downloading : {pkg.name}"))
         match pkg.package_type:
             case DownloadType.PACKAGE:
-                pkg.downloaded = downloaded
+                self.download_queue.update(pkg, downloaded)
             case DownloadType.REPO:
                 if total_to_download > 0:
-                    pkg.downloaded = downloaded
-                    pkg.to_download = total_to_download
+                    self.download_queue.update(pkg, downloaded, total_to_download)
             case DownloadType.UNKNOWN:
                 logger.debug(f"unknown download type : {pkg.id}")
         fraction = self.download_queue.fraction
@@ -472,15 +778,14 @@ class YumexPackageBackend:
         if status == 0:
             match pkg.package_type:
                 case DownloadType.PACKAGE:
-                    pkg.downloaded = pkg.to_download
+                    self.download_queue.update(pkg, pkg.to_download)
                     if self.download_queue.is_completed:
                         if self._offline:
                             self.progress.set_title(_("Building Offline Transaction"))
                         else:
                             self.progress.set_title(_("Applying Transaction"))
                 case DownloadType.REPO:
-                    pkg.downloaded = 1
-                    pkg.to_download = 1
+                    self.download_queue.update(pkg, 1, 1)
                 case DownloadType.UNKNOWN:
                     logger.debug(f"unknown download type : {pkg.id}")
         fraction = self.download_queue.fraction
@@ -498,9 +803,9 @@ class YumexPackageBackend:
         # <arg name="timestamp" type="x" />
         logger.debug(f"confirm gpg key import id: {key_id} user-id: {user_ids[0]}")
         key_values = (key_id, user_ids[0], key_fingerprint, key_url, timestamp)
-        self.presenter.progress.hide(clear=False)
+        self.progress.hide(clear=False)
         ok = self.presenter.confirm_gpg_import(key_values)
-        self.presenter.progress.show()
+        self.progress.show()
         if ok:
             logger.debug("Importing RPM GPG key")
             self.client.confirm_key(key_id, True)
@@ -509,124 +814,272 @@ class YumexPackageBackend:
             self.client.confirm_key(key_id, False)
 
     def check_for_installed(self, pkgs: list[YumexPackage]) -> list[YumexPackage]:
-        """check for downgrades"""
-        for pkg in pkgs:
-            if pkg.name in self._installed_evr:
-                if pkg.evr < self._installed_evr[pkg.name]:
-                    pkg.set_state(PackageState.DOWNGRADE)
-                if pkg.evr > self._installed_evr[pkg.name]:
-                    pkg.set_state(PackageState.UPDATE)
+        """check for downgrades and updates, by comparing with the installed evr"""
+        installed = [pkg for pkg in pkgs if pkg.name in self._installed_evr]
+        results = compare_many((pkg.evr, self._installed_evr[pkg.name]) for pkg in installed)
+        for pkg, result in zip(installed, results):
+            if result < 0:
+                pkg.set_state(PackageState.DOWNGRADE)
+            elif result > 0:
+                pkg.set_state(PackageState.UPDATE)
         return pkgs
 
-
     @property
     def package_attr(self) -> list[str]:
         return PACKAGE_ATTRS
 
-    def get_packages(self, pkg_filter: PackageFilter) -> list[YumexPackage]:
+    def get_packages(self, pkg_filter: PackageFilter) -> PackageColumns:
         match pkg_filter:
             case PackageFilter.AVAILABLE:
-                return self._get_yumex_packages(self.available)
+                return self._get_package_columns(self.available)
             case PackageFilter.INSTALLED:
-                return self._get_yumex_packages(self.installed)
+                return self._get_package_columns(self.installed)
             case PackageFilter.UPDATES:
                 updates = self._get_yumex_packages(self.updates, state=PackageState.UPDATE)
-                return self.filter_updates.get_updates(updates)
+                updates = self.filter_updates.get_updates(updates)
+                self.advisory_index = self._get_advisory_index(updates)
+                return PackageColumns.from_packages(updates)
             case other:
                 raise ValueError(f"Unknown package filter: {other}")
 
-    def search(self, txt: str, options={}) -> list[YumexPackage]:
-        kw_args = options
+    def search(self, txt: str, options={}, stats: SearchStats | None = None) -> list[YumexPackage] | None:
+        """search for packages, a search in progress is cancelled by a new search
+
+        The search index is used, when it can answer the search. A search extending the query of the
+        last dnf5daemon search with the same options, is answered by filtering the last result.
+        The queries with glob characters is always searched by dnf5daemon. The result is ranked
+        like the search index result (see rank_key). The source of the result and the dnf5daemon &
+        decode times is added to stats
+
+        return None, if the search is cancelled
+        """
+        stats = stats or SearchStats(txt)
+        if (result := self._search_index(txt, options)) is not None:
+            stats.source = "index"
+        elif (result := self._refine_search(txt, options)) is not None:
+            stats.source = "refined"
+        else:
+            stats.source = "daemon"
+            if (result := self._search_daemon(txt, options, stats)) is None:
+                return None
+            with self._search_lock:
+                self._last_search = LastSearch(txt.lower(), dict(options), result)
+        if stats.source != "index":
+            result = sorted(result, key=rank_key(txt))
+        return self.check_for_installed(self._get_yumex_packages(result))
+
+    def _search_daemon(self, txt: str, options: dict, stats: SearchStats) -> list[dict[str, Any]] | None:
+        """search for packages in dnf5daemon, return None if the search is cancelled"""
+        transfer = ListTransfer()
+        with self._search_lock:
+            if self._search_transfer is not None:
+                self._search_transfer.cancel()
+            self._search_transfer = transfer
+        kw_args = dict(options)
         kw_args["package_attrs"] = self.package_attr
         if "*" not in txt:
             txt = f"*{txt}*"
-        result = self.client.package_list_fd(txt, **kw_args)
-        if result:
-            pkgs = self.check_for_installed(self._get_yumex_packages(result))
-            return pkgs
-        else:
-            return []
+        t_start = time.perf_counter()
+        result = self.client.package_list_fd(txt, transfer=transfer, **kw_args)
+        elapsed = time.perf_counter() - t_start
+        stats.daemon = transfer.wait_time * 1000
+        stats.decode = (elapsed - transfer.wait_time) * 1000
+        logger.debug(f"search({txt}): {transfer.records} records, {transfer.bytes_decoded} bytes decoded")
+        if transfer.cancelled:
+            logger.debug(f"search({txt}): cancelled by a newer search")
+            return None
+        return result or []
+
+    def _refine_search(self, txt: str, options: dict) -> list[dict[str, Any]] | None:
+        """filter the result of the last dnf5daemon search, when the query extends the last query with the same options
+
+        return None, if the search can't be answered from the last result (a shorter or other query,
+        other options or searching in provides, files or binaries, where the matches is not known)
+        """
+        last = self._last_search
+        query = txt.lower()
+        if last is None or is_glob(query) or any(options.get(option) for option in INDEX_SEARCH_DAEMON_OPTIONS):
+            return None
+        if options != last.options or not query.startswith(last.query):
+            return None
+        t_start = time.perf_counter()
+        result = refine_search(last.result, query)
+        elapsed = (time.perf_counter() - t_start) * 1000
+        logger.debug(f"search({txt}): {len(result)} of {len(last.result)} packages from the last search in {elapsed:.1f} ms")
+        with self._search_lock:
+            self._last_search = LastSearch(query, last.options, result)
+        return result
+
+    def _search_index(self, txt: str, options: dict) -> list[dict[str, Any]] | None:
+        """search the name and summary in the search index
+
+        return None, if there is no search index yet, or the search must be done by dnf5daemon
+        (globs, provides, files, binaries and other scopes or latest limits)
+        """
+        index = self.search_index
+        if index is None or is_glob(txt) or any(options.get(option) for option in INDEX_SEARCH_DAEMON_OPTIONS):
+            return None
+        scope = options.get("scope", "all")
+        if scope not in INDEX_SEARCH_SCOPES or options.get("latest_limit", 1) != 1:
+            return None
+        t_start = time.perf_counter()
+        result = index.search(txt, scope=scope, arch=options.get("arch", ()), repo=options.get("repo", ()))
+        logger.debug(f"search({txt}): {len(result)} packages from the search index in {(time.perf_counter() - t_start) * 1000:.1f} ms")
+        return result
 
-    def _get_package_attribute(self, pkg: YumexPackage, attribute: str):
+    def cancel_search(self) -> None:
+        """cancel the search in progress"""
+        with self._search_lock:
+            self._last_search = None
+            if self._search_transfer is not None:
+                self._search_transfer.cancel()
+                self._search_transfer = None
+
+    def _get_package_attributes(self, pkg: YumexPackage, info_types: list[InfoType]) -> dict[InfoType, Any]:
+        """get the package info attributes in one call, and cache them by info type"""
+        transfer = ListTransfer()
         result = self.client.package_list_fd(
             pkg.nevra,
-            package_attrs=["nevra", attribute],
+            package_attrs=["nevra", *(INFO_ATTRS[info_type] for info_type in info_types)],
             scope="all",
+            transfer=transfer,
         )
-        if result:
-            return result[0][attribute]
-        return None
-
-    def _get_description(self, pkg: YumexPackage):
-        desc = self._get_package_attribute(pkg, "description")
-        if desc:
-            return desc
-        return ""
-
-    def _get_files(self, pkg: YumexPackage):
-        files = self._get_package_attribute(pkg, "files")
-        if files:
-            return files
-        return []
+        self.info_stats.add(transfer)
+        values = result[0] if result else {}
+        info = {}
+        for info_type in info_types:
+            value = values.get(INFO_ATTRS[info_type])
+            if not value:
+                value = "" if info_type == InfoType.DESCRIPTION else []
+            self.info_cache.put(pkg.nevra, info_type, value)
+            info[info_type] = value
+        return info
+
+    @staticmethod
+    def _update_info(res: dict) -> dict:
+        timestamp = datetime.datetime.fromtimestamp(res["buildtime"])
+        updated = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        return UpdateInfo(
+            id=res["name"],
+            title=res["title"],
+            description=res["description"],
+            type=res["severity"],
+            updated=updated,
+            references=res["references"],
+        ).as_dict()
+
+    def _get_advisory_index(self, pkgs: list[YumexPackage]) -> AdvisoryIndex | None:
+        """get the advisories for all the packages in one call, and index them by package name"""
+        names = sorted({pkg.name for pkg in pkgs})
+        if not names:
+            return AdvisoryIndex([], [])
+        result, error = self.client.advisory_list(*names, advisor_attrs=[*ADVISOR_ATTRS, "collections"])
+        self.info_stats.add()
+        if error or result is None:
+            logger.debug(f"advisory index: failed to get the advisories: {error}")
+            return None
+        return AdvisoryIndex(result, names)
+
+    def get_advisory_summary(self, pkg: YumexPackage) -> AdvisorySummary | None:
+        """the most important advisory type and severity for an update, None if not known"""
+        if self.advisory_index is None:
+            return None
+        return self.advisory_index.summary(pkg.name)
+
+    def match_advisory(self, pkg: YumexPackage, advisory_filter: AdvisoryFilter) -> bool:
+        """True if the package has an advisory matching the filter"""
+        if self.advisory_index is None:
+            return advisory_filter == AdvisoryFilter.ALL
+        return self.advisory_index.match(pkg.name, advisory_filter)
 
     def _get_update_info(self, pkg: YumexPackage):
-        info_list = []
+        if self.advisory_index is not None and pkg.name in self.advisory_index:
+            return [self._update_info(res) for res in self.advisory_index.get(pkg.name)]
         result, error = self.client.advisory_list(pkg.name, advisor_attrs=ADVISOR_ATTRS)
+        self.info_stats.add()
         if result:
-            for res in result:
-                timestamp = datetime.datetime.fromtimestamp(res["buildtime"])
-                updated = timestamp.strftime("%Y-%m-%d %H:%M:%S")
-                info_list.append(
-                    UpdateInfo(
-                        id=res["name"],
-                        title=res["title"],
-                        description=res["description"],
-                        type=res["severity"],
-                        updated=updated,
-                        references=res["references"],
-                    ).as_dict()
-                )
-            return info_list
+            return [self._update_info(res) for res in result]
         return []
 
-    def _get_changelog(self, pkg: YumexPackage):
-        changelog = self._get_package_attribute(pkg, "changelogs")
+    @staticmethod
+    def _format_changelog(changelog: list) -> list[str]:
         result = []
-        if changelog:
-            for time_int, who, what in changelog:
-                timestamp = datetime.datetime.fromtimestamp(time_int)
-                time_str = timestamp.strftime("* %a %b %m %Y")
-                result.append(time_str + " " + who + "\n" + what)
+        for time_int, who, what in changelog:
+            timestamp = datetime.datetime.fromtimestamp(time_int)
+            time_str = timestamp.strftime("* %a %b %m %Y")
+            result.append(time_str + " " + who + "\n" + what)
         return result
 
-    def _get_provides(self, pkg: YumexPackage):
-        provides = self._get_package_attribute(pkg, "provides")
-        if provides:
-            return provides
-        return []
-
-    def _get_requires(self, pkg: YumexPackage):
-        requires = self._get_package_attribute(pkg, "requires")
-        if requires:
-            return requires
-        return []
-
     def get_package_info(self, pkg: YumexPackage, attr: InfoType):
-        match attr:
-            case InfoType.DESCRIPTION:
-                return self._get_description(pkg)
-            case InfoType.FILES:
-                return self._get_files(pkg)
-            case InfoType.UPDATE_INFO:
-                return self._get_update_info(pkg)
-            case InfoType.CHANGELOG:
-                return self._get_changelog(pkg)
-            case InfoType.PROVIDES:
-                return self._get_provides(pkg)
-            case InfoType.REQUIRES:
-                return self._get_requires(pkg)
-            case other:
-                raise ValueError(f"Unknown package info: {other}")
+        """get the package info, all the package attributes not cached is fetched in one call"""
+        if (info := self.get_cached_package_info(pkg, attr)) is not None:
+            return info
+        calls, size = self.info_stats.calls, self.info_stats.bytes
+        if attr == InfoType.UPDATE_INFO:
+            info = self._get_update_info(pkg)
+            self.info_cache.put(pkg.nevra, attr, info)
+        elif attr in INFO_ATTRS:
+            # the missing attributes for the other info tabs is fetched in the same call
+            missing = [info_type for info_type in INFO_ATTRS if info_type == attr or (pkg.nevra, info_type) not in self.info_cache]
+            info = self._get_package_attributes(pkg, missing)[attr]
+        else:
+            raise ValueError(f"Unknown package info: {attr}")
+        logger.debug(
+            f"package info ({pkg.nevra}, {attr.name}): {self.info_stats.calls - calls} calls, "
+            f"{self.info_stats.bytes - size} bytes decoded, total: {self.info_stats}"
+        )
+        if attr == InfoType.CHANGELOG:
+            return self._format_changelog(info)
+        return info
+
+    def get_cached_package_info(self, pkg: YumexPackage, attr: InfoType) -> Any | None:
+        """get the package info, if it is cached, else None"""
+        info = self.info_cache.get(pkg.nevra, attr)
+        # the changelog is cached as (timestamp, author, text) and is only formatted when it is shown
+        if info is not None and attr == InfoType.CHANGELOG:
+            return self._format_changelog(info)
+        return info
+
+    def prefetch_package_info(self, pkgs: Iterable[YumexPackage]) -> None:
+        """fetch the description and update info for the packages not cached, one call for each"""
+        pkgs = list(pkgs)
+        if nevras := self.info_cache.missing([pkg.nevra for pkg in pkgs], InfoType.DESCRIPTION):
+            transfer = ListTransfer()
+            result = self.client.package_list_fd(
+                *nevras,
+                package_attrs=["name", "evr", "arch", "description"],
+                scope="all",
+                latest_limit=0,
+                transfer=transfer,
+            )
+            self.info_stats.add(transfer)
+            for res in result:
+                nevra = f"{res['name']}-{res['evr']}.{res['arch']}"
+                if nevra in nevras and (nevra, InfoType.DESCRIPTION) not in self.info_cache:
+                    self.info_cache.put(nevra, InfoType.DESCRIPTION, res["description"] or "")
+        missing = set(self.info_cache.missing([pkg.nevra for pkg in pkgs], InfoType.UPDATE_INFO))
+        if self.advisory_index is not None:
+            for pkg in pkgs:
+                if pkg.nevra in missing and pkg.name in self.advisory_index:
+                    self.info_cache.put(pkg.nevra, InfoType.UPDATE_INFO, self._get_update_info(pkg))
+                    missing.discard(pkg.nevra)
+        if names := sorted({pkg.name for pkg in pkgs if pkg.nevra in missing}):
+            result, error = self.client.advisory_list(*names, advisor_attrs=[*ADVISOR_ATTRS, "collections"])
+            self.info_stats.add()
+            if error or result is None:
+                return
+            by_name: dict[str, list[dict]] = {name: [] for name in names}
+            for res in result:
+                if "collections" not in res:
+                    # the advisories can't be matched to the packages
+                    return
+                for pkg_name in {pkg["n"] for coll in res["collections"] for pkg in coll.get("packages", [])}:
+                    if pkg_name in by_name:
+                        by_name[pkg_name].append(self._update_info(res))
+            for pkg in pkgs:
+                if pkg.nevra in missing:
+                    self.info_cache.put(pkg.nevra, InfoType.UPDATE_INFO, by_name[pkg.name])
+        logger.debug(f"info cache: {len(self.info_cache)} entries, {self.info_cache.size} bytes")
 
     def get_repositories(self) -> list[tuple]:
         repos, error = self.client.repo_list()
@@ -654,36 +1107,136 @@ class YumexPackageBackend:
                 logger.debug(f"Adding {ypkg} as dependency")
         return self.check_for_installed(dep_pkgs)
 
+    def _get_package_list(self, scope: str) -> list[dict[str, Any]]:
+        """get the packages in a scope from the snapshot or from dnf5daemon"""
+        if (pkgs := self.snapshot.get(scope)) is not None:
+            if scope not in self._fetched:
+                logger.debug(f"snapshot: using {len(pkgs)} {scope} packages")
+                self._from_snapshot.add(scope)
+            return pkgs
+        if (pkgs := self._take_prefetched(scope)) is not None:
+            return pkgs
+        return list(self._iter_package_list(scope))
 
-    @property
-    def installed(self) -> list[dict[str, Any]]:
+    def _iter_package_list(self, scope: str) -> Iterator[dict[str, Any]]:
+        """yield the packages in a scope from the snapshot or as they arrive from dnf5daemon"""
+        if self.snapshot.get(scope) is not None or scope in self._prefetch:
+            yield from self._get_package_list(scope)
+            return
+        pkgs = []
+        latest_limit = LIST_LATEST_LIMIT.get(scope, 1)
+        for pkg in self.client.package_list_fd_iter("*", package_attrs=self.package_attr, scope=scope, latest_limit=latest_limit):
+            pkgs.append(pkg)
+            yield pkg
+        self._fetched.add(scope)
+        self._save_snapshot({scope: pkgs})
+
+    def can_stream_packages(self, pkg_filter: PackageFilter) -> bool:
+        return pkg_filter in STREAM_FILTERS
+
+    def stream_packages(self, pkg_filter: PackageFilter) -> Iterator[PackageColumns]:
+        """get the packages in chunks, as they arrive from dnf5daemon
+
+        Each chunk is a new PackageColumns, so a chunk is not changed after it is yielded
+        (it is added to the columns shown, in the main thread). The last chunk is yielded,
+        when all packages is added (it can be empty)
+        """
+        if pkg_filter not in STREAM_FILTERS:
+            raise ValueError(f"Package filter can't be streamed: {pkg_filter}")
+        columns = PackageColumns()
+        seen = set()
+        chunk_size = STREAM_FIRST_CHUNK
+        for pkg in self._iter_package_list(STREAM_FILTERS[pkg_filter]):
+            nevra = (pkg["name"], pkg["evr"], pkg["arch"])
+            if nevra not in seen:
+                seen.add(nevra)
+                columns.append_dict(pkg)
+                if len(columns) >= chunk_size:
+                    yield columns
+                    columns = PackageColumns()
+                    chunk_size = STREAM_CHUNK
+        yield columns
+
+    def _fetch_package_list(self, scope: str) -> list[dict[str, Any]]:
         result = self.client.package_list_fd(
             "*",
             package_attrs=self.package_attr,
-            scope="installed",
+            scope=scope,
+            latest_limit=LIST_LATEST_LIMIT.get(scope, 1),
         )
-        return result
+        self._fetched.add(scope)
+        if result:
+            return result
+        else:
+            return []
+
+    def has_snapshot_data(self) -> bool:
+        """True if some of the packages is served from the snapshot or updated by a transaction, and not reconciled yet"""
+        return bool(self._from_snapshot) or self._verify_delta_pending
+
+    def _verify_delta(self) -> list[str]:
+        """check the package lists updated by the last transaction, return the scopes there don't match dnf5daemon
+
+        Only the nevras of the installed packages & upgrades is fetched, and compared by count & hash.
+        The installed state of the available packages is checked with the installed nevras.
+        """
+        self._verify_delta_pending = False
+        mismatch = []
+        installed_nevras: set[str] | None = None
+        for scope in DELTA_VERIFY_SCOPES:
+            if (pkgs := self.snapshot.get(scope)) is None:
+                continue
+            result = self.client.package_list_fd("*", package_attrs=["nevra"], scope=scope, latest_limit=LIST_LATEST_LIMIT.get(scope, 1))
+            nevras = [str(pkg["nevra"]) for pkg in result]
+            if scope == "installed":
+                installed_nevras = set(nevras)
+            if checksum(nevras) != checksum(nevra(pkg) for pkg in pkgs):
+                mismatch.append(scope)
+        if installed_nevras is not None and (available := self.snapshot.get("available")) is not None:
+            if "installed" in mismatch or not installed_state_matches(available, installed_nevras):
+                mismatch.append("available")
+        if mismatch:
+            logger.debug(f"transaction delta: {mismatch} packages don't match dnf5daemon")
+        return mismatch
+
+    def reconcile_snapshot(self) -> list[PackageFilter]:
+        """refetch the package lists served from the snapshot, and update the snapshot
+
+        The package lists updated by a transaction is checked by their nevras, and only fetched if they don't match.
+        return the package filters, where the packages has changed
+        """
+        changed = []
+        sections = {}
+        mismatch = self._verify_delta() if self._verify_delta_pending else []
+        for scope in mismatch:
+            sections[scope] = self._fetch_package_list(scope)
+            changed.append(SCOPE_FILTERS[scope])
+        for scope in list(self._from_snapshot):
+            if scope in sections:
+                continue
+            pkgs = self._fetch_package_list(scope)
+            if snapshot_fingerprint(pkgs) != snapshot_fingerprint(self.snapshot.get(scope) or []):
+                logger.debug(f"snapshot: {scope} packages has changed")
+                changed.append(SCOPE_FILTERS[scope])
+            sections[scope] = pkgs
+        self._from_snapshot.clear()
+        if sections:
+            self._save_snapshot(sections)
+        if PackageFilter.INSTALLED in changed:
+            self._installed_evr = self.fetch_installed_evr()
+        return changed
+
+    @property
+    def installed(self) -> list[dict[str, Any]]:
+        return self._get_package_list("installed")
 
     @property
     def available(self) -> list[dict[str, Any]]:
-        result = self.client.package_list_fd(
-            "*",
-            package_attrs=self.package_attr,
-            scope="available",
-        )
-        return result
+        return self._get_package_list("available")
 
     @property
     def updates(self) -> list[dict[str, Any]]:
-        updates = self.client.package_list_fd(
-            "*",
-            package_attrs=self.package_attr,
-            scope="upgrades",
-        )
-        if updates:
-            return updates
-        else:
-            return []
+        return self._get_package_list("upgrades")
 
     def _get_yumex_packages(self, pkgs: list[dict[str, Any]], state=PackageState.AVAILABLE) -> list[YumexPackage]:
         nevra_dict = {}
@@ -697,6 +1250,17 @@ class YumexPackageBackend:
             #     logger.debug(f"Skipping duplicate : {ypkg}")
         return list(nevra_dict.values())
 
+    def _get_package_columns(self, pkgs: list[dict[str, Any]]) -> PackageColumns:
+        """store the packages in columns, without creating YumexPackage objects"""
+        columns = PackageColumns()
+        seen = set()
+        for pkg in pkgs:
+            nevra = (pkg["name"], pkg["evr"], pkg["arch"])
+            if nevra not in seen:
+                seen.add(nevra)
+                columns.append_dict(pkg)
+        return columns
+
     def get_packages_by_name(self, pkg: YumexPackage) -> list[YumexPackage]:
         """Get a list of packages by name"""
         result = self.client.package_list_fd(
@@ -708,6 +1272,19 @@ class YumexPackageBackend:
         )
         return self._get_yumex_packages(result)
 
+    def get_packages_by_names(self, pkgs: list[YumexPackage]) -> list[YumexPackage]:
+        """Get the available packages for a list of packages, using a single list_fd call"""
+        names = sorted({pkg.name for pkg in pkgs})
+        archs = sorted({pkg.arch for pkg in pkgs})
+        result = self.client.package_list_fd(
+            *names,
+            package_attrs=self.package_attr,
+            scope="available",
+            arch=archs,
+            latest_limit=10,
+        )
+        return self._get_yumex_packages(result)
+
     def has_offline_transaction(self) -> bool:
         """Check if there is an offline transaction"""
         pending, _ = self.client.offline_get_status()
@@ -0,0 +1,96 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""Index of the advisories for the upgradable packages"""
+
+import logging
+from typing import Any, Iterable, NamedTuple
+
+from yumex.utils.enums import AdvisoryFilter
+
+logger = logging.getLogger(__name__)
+
+# the most important advisory type and severity is shown for a package
+ADVISORY_TYPE_ORDER = ["security", "bugfix", "enhancement", "newpackage"]
+SEVERITY_ORDER = ["Critical", "Important", "Moderate", "Low"]
+
+
+class AdvisorySummary(NamedTuple):
+    """the most important advisory type and severity for a package"""
+
+    type: str
+    severity: str
+
+
+def _rank(value: str, order: list[str]) -> int:
+    return order.index(value) if value in order else len(order)
+
+
+class AdvisoryIndex:
+    """The advisories for a set of packages, indexed by package name
+
+    It is build from a single advisory list call with the collections attribute, and
+    used for the update info and for filtering the updates, without more DBus calls.
+    """
+
+    def __init__(self, advisories: Iterable[dict[str, Any]], names: Iterable[str]) -> None:
+        # the packages the index is build for, there can be packages without advisories
+        self._names = set(names)
+        self._by_name: dict[str, list[dict[str, Any]]] = {}
+        self._summary: dict[str, AdvisorySummary] = {}
+        count = 0
+        for advisory in advisories:
+            count += 1
+            pkg_names = {pkg["n"] for coll in advisory.get("collections", []) for pkg in coll.get("packages", [])}
+            for name in pkg_names & self._names:
+                self._by_name.setdefault(name, []).append(advisory)
+        for name, pkg_advisories in self._by_name.items():
+            self._summary[name] = self._summarize(pkg_advisories)
+        logger.debug(f"advisory index: {count} advisories for {len(self._by_name)} of {len(self._names)} packages")
+
+    @staticmethod
+    def _summarize(advisories: list[dict[str, Any]]) -> AdvisorySummary:
+        advisory_type = min((str(adv.get("type", "")) for adv in advisories), key=lambda typ: _rank(typ, ADVISORY_TYPE_ORDER))
+        severity = min((str(adv.get("severity", "")) for adv in advisories), key=lambda sev: _rank(sev, SEVERITY_ORDER))
+        return AdvisorySummary(advisory_type, severity if severity in SEVERITY_ORDER else "")
+
+    def __len__(self) -> int:
+        return len(self._by_name)
+
+    def __contains__(self, name: str) -> bool:
+        """True if the index has the advisories for the package name (maybe none)"""
+        return name in self._names
+
+    def get(self, name: str) -> list[dict[str, Any]]:
+        """the advisories for a package name"""
+        return self._by_name.get(name, [])
+
+    def summary(self, name: str) -> AdvisorySummary | None:
+        """the most important advisory type and severity for a package name, None without advisories"""
+        return self._summary.get(name)
+
+    def match(self, name: str, advisory_filter: AdvisoryFilter) -> bool:
+        """True if the package name has an advisory matching the filter"""
+        match advisory_filter:
+            case AdvisoryFilter.ALL:
+                return True
+            case AdvisoryFilter.SECURITY:
+                summary = self._summary.get(name)
+                return summary is not None and summary.type == "security"
+            case AdvisoryFilter.CRITICAL:
+                summary = self._summary.get(name)
+                return summary is not None and summary.severity == "Critical"
+            case other:
+                raise ValueError(f"Unknown advisory filter: {other}")
@@ -1,14 +1,18 @@
-import json
+import itertools
 import logging
 import os
 import select
+import threading
+import time
+from collections import OrderedDict
 from functools import partial
-from typing import Any
+from typing import Any, Iterator
 
 import dbus
 from dbus.mainloop.glib import DBusGMainLoop
-from gi.repository import GLib
 
+from yumex.backend.dnf5daemon.decoder import JsonStreamDecoder
+from yumex.backend.dnf5daemon.dispatcher import DBUS_TIMEOUT, DBusDispatcher
 from yumex.utils import dbus_exception
 from yumex.utils.exceptions import YumexException
 
@@ -26,52 +30,116 @@ IFACE_GROUP = "{}.comps.Group".format(DNFDAEMON_BUS_NAME)
 IFACE_ADVISORY = "{}.Advisory".format(DNFDAEMON_BUS_NAME)
 IFACE_OFFLINE = "{}.Offline".format(DNFDAEMON_BUS_NAME)
 
+# fallback timeout for data from a list_fd transfer (ms), the completion signal ends a failed transfer
+LIST_FD_TIMEOUT = 180000
+# max. time to wait for the completion signal, when all data is read (ms)
+LIST_FD_FINISH_TIMEOUT = 200
+# the completion signals kept for transfers not registered yet, and the ids of the ended transfers
+FINISHED_TRANSFERS_MAX = 32
+
+# set to "session" to use a dnf5daemon stand-in on the session bus (tests/dnf5daemon_standin.py)
+DNFDAEMON_BUS_ENV = "YUMEX_DNF5DAEMON_BUS"
+
 logger = logging.getLogger(__name__)
 
 
-# async call handler class
-class AsyncCaller:
+def get_dnfdaemon_bus() -> dbus.Bus:
+    """get the bus with dnf5daemon, the system bus unless YUMEX_DNF5DAEMON_BUS=session"""
+    if os.environ.get(DNFDAEMON_BUS_ENV, "system") == "session":
+        logger.debug("using dnf5daemon on the session bus")
+        return dbus.SessionBus()
+    return dbus.SystemBus()
+
+
+class ListTransfer:
+    """A list_fd transfer of packages from dnf5daemon through a pipe
+
+    The transfer can be cancelled from any thread, the reader is woken up and closes
+    the read end of the pipe, so the server stops writing and no more data is decoded
+    """
+
     def __init__(self) -> None:
-        self.res = None
-        self.err = None
-        self.loop: GLib.MainLoop
-
-    def error_handler(self, e) -> None:
-        logger.error(e)
-        self.err = e
-        self.loop.quit()
-
-    def reply_handler(self, *args) -> None:
-        if len(args) > 1:
-            self.res = args
-        else:
-            if args:
-                self.res = args[0]
-        self.loop.quit()
-
-    def call(self, mth, *args, **kwargs) -> None | Any:
-        self.loop = GLib.MainLoop()
-        self.res = None
-        self.err = None
-        mth(
-            *args,
-            **kwargs,
-            reply_handler=self.reply_handler,
-            error_handler=self.error_handler,
-        )
-        self.loop.run()
-        return self.res, self.err
+        self.transfer_id: str | None = None
+        self.success: bool | None = None
+        self.error = ""
+        self.bytes_decoded = 0
+        self.records = 0
+        # time spent waiting for dnf5daemon (seconds), the rest of the transfer is reading & decoding
+        self.wait_time = 0.0
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._wake_r, self._wake_w = os.pipe()
+        self._closed = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.success is not None
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._wake()
+
+    def finish(self, success: bool, error: str) -> None:
+        """the server has finished writing"""
+        self.success = success
+        self.error = error
+        self._wake()
+
+    def _wake(self) -> None:
+        with self._lock:
+            if not self._closed:
+                os.write(self._wake_w, b"x")
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                os.close(self._wake_r)
+                os.close(self._wake_w)
+
+    def __repr__(self) -> str:
+        return f"ListTransfer({self.transfer_id})"
+
+
+class ReadSession:
+    """The interfaces for a read-only dnf5daemon session, used for package queries"""
+
+    def __init__(self, bus, session: str) -> None:
+        self.session = session
+        self.repo = dbus.Interface(bus.get_object(DNFDAEMON_BUS_NAME, session), dbus_interface=IFACE_REPO)
+        self.rpm = dbus.Interface(bus.get_object(DNFDAEMON_BUS_NAME, session), dbus_interface=IFACE_RPM)
+        self.base = dbus.Interface(bus.get_object(DNFDAEMON_BUS_NAME, session), dbus_interface=IFACE_BASE)
+        self.advisory = dbus.Interface(bus.get_object(DNFDAEMON_BUS_NAME, session), dbus_interface=IFACE_ADVISORY)
+
+    def __repr__(self) -> str:
+        return f"ReadSession({self.session})"
 
 
 class Dnf5DbusClient:
-    def __init__(self):
-        self.bus = dbus.SystemBus()
+    def __init__(self, read_sessions: int = 0):
+        self.bus = get_dnfdaemon_bus()
         self.iface_session = dbus.Interface(
             self.bus.get_object(DNFDAEMON_BUS_NAME, DNFDAEMON_OBJECT_PATH),
             dbus_interface=IFACE_SESSION_MANAGER,
         )
-        self.async_dbus = AsyncCaller()
+        # all async calls is made by the dispatcher, so they can run concurrently
+        self.dispatcher = DBusDispatcher()
         self._connected = False
+        # pool of read-only sessions for package queries, next to the transaction session
+        self.read_sessions = read_sessions
+        self._read_pool: list[ReadSession] = []
+        self._next_read = itertools.count()
+        # list_fd transfers in progress by transfer id
+        self._transfers: dict[str, ListTransfer] = {}
+        # completion signals received before the transfer is registered
+        self._finished_transfers: OrderedDict[str, tuple[bool, str]] = OrderedDict()
+        # the transfers ended (unregistered), their completion signals is dropped
+        self._ended_transfers: OrderedDict[str, None] = OrderedDict()
+        self._transfer_lock = threading.Lock()
 
     @dbus_exception
     def open_session(self, options=dbus.Dictionary({})):
@@ -110,15 +178,87 @@ class Dnf5DbusClient:
                     self.bus.get_object(DNFDAEMON_BUS_NAME, self.session),
                     dbus_interface=IFACE_OFFLINE,
                 )
+                self._main_session = ReadSession(self.bus, self.session)
+                self._open_read_sessions(options)
+                for session in [self._main_session, *self._read_pool]:
+                    session.rpm.connect_to_signal("write_to_fd_finished", self.on_write_to_fd_finished)
             else:
                 raise YumexException("Couldn't open session to Dnf5Dbus")
 
+    def _open_read_sessions(self, options) -> None:
+        for _ in range(self.read_sessions):
+            if session := self.iface_session.open_session(options):
+                self._read_pool.append(ReadSession(self.bus, session))
+        logger.debug(f"open session: {len(self._read_pool)} read-only sessions : {self._read_pool}")
+
+    def read_session(self) -> ReadSession:
+        """get the next read-only session (round-robin), the transaction session is used without a pool"""
+        if not self._read_pool:
+            return self._main_session
+        return self._read_pool[next(self._next_read) % len(self._read_pool)]
+
+    @dbus_exception
+    def reset_sessions(self) -> None:
+        """reset the transaction session and all read-only sessions, so they use the current rpmdb & metadata"""
+        logger.debug(f"DBUS: {self.session_base.dbus_interface}.reset()")
+        self.session_base.reset()
+        for read_session in self._read_pool:
+            read_session.base.reset()
+
+    def on_write_to_fd_finished(self, *args) -> None:
+        """completion signal for a list_fd transfer"""
+        # the signal ends with: success, transfer_id, error_msg
+        success, transfer_id, error_msg = args[-3:]
+        logger.debug(f"SIGNAL : write_to_fd_finished: {transfer_id} success: {bool(success)} {error_msg}")
+        transfer_id = str(transfer_id)
+        with self._transfer_lock:
+            transfer = self._transfers.get(transfer_id)
+            if transfer is None:
+                if transfer_id in self._ended_transfers:
+                    # the transfer is already ended (main thread, cancelled or timed out)
+                    return
+                self._finished_transfers[transfer_id] = (bool(success), str(error_msg))
+                if len(self._finished_transfers) > FINISHED_TRANSFERS_MAX:
+                    self._finished_transfers.popitem(last=False)
+                return
+        transfer.finish(bool(success), str(error_msg))
+
+    def _register_transfer(self, transfer: ListTransfer) -> None:
+        with self._transfer_lock:
+            self._transfers[transfer.transfer_id] = transfer
+            finished = self._finished_transfers.pop(transfer.transfer_id, None)
+        if finished:
+            transfer.finish(*finished)
+
+    def _unregister_transfer(self, transfer: ListTransfer) -> None:
+        with self._transfer_lock:
+            self._transfers.pop(transfer.transfer_id, None)
+            self._finished_transfers.pop(transfer.transfer_id, None)
+            self._ended_transfers[transfer.transfer_id] = None
+            if len(self._ended_transfers) > FINISHED_TRANSFERS_MAX:
+                self._ended_transfers.popitem(last=False)
+
+    def cancel_transfers(self) -> int:
+        """cancel all list_fd transfers in progress, return the number of cancelled transfers"""
+        with self._transfer_lock:
+            transfers = list(self._transfers.values())
+        for transfer in transfers:
+            transfer.cancel()
+        return len(transfers)
+
     @dbus_exception
     def close_session(self):
         if self._connected:
             logger.debug(f"DBUS: {self.iface_session.object_path}.close_session()")
+            if cancelled := self.dispatcher.cancel_all():
+                logger.debug(f"close session: {cancelled} pending calls cancelled")
+            if cancelled := self.cancel_transfers():
+                logger.debug(f"close session: {cancelled} list_fd transfers cancelled")
             rc = self.iface_session.close_session(self.session)
             logger.debug(f"close session: {self.session} ({rc})")
+            for read_session in self._read_pool:
+                self.iface_session.close_session(read_session.session)
+            self._read_pool = []
             self._connected = False
 
     def reopen_session(self, options=None):
@@ -133,7 +273,7 @@ class Dnf5DbusClient:
         """create a patial func to make an async call to a given
         dbus method name
         """
-        return partial(self.async_dbus.call, getattr(proxy, method), timeout=1000 * 60 * 20)
+        return partial(self.dispatcher.call, getattr(proxy, method), timeout=DBUS_TIMEOUT)
 
     def resolve(self, *args):
         logger.debug(f"DBUS: {self.session_goal.dbus_interface}.resolve()")
@@ -158,74 +298,97 @@ class Dnf5DbusClient:
         res, err = get_list({"repo_attrs": dbus.Array(["name", "enabled", "priority"]), "enable_disable": "all"})
         return res, err
 
-    def _list_fd(self, options):
-        """Generator function that yields packages as they arrive from the server."""
+    def _list_fd(self, options, session: ReadSession | None = None, transfer: ListTransfer | None = None):
+        """Generator function that yields packages as they arrive from the server.
+
+        The transfer stops, without yielding more packages, if it is cancelled
+        """
+        session = session or self.read_session()
+        transfer = transfer or ListTransfer()
+        if transfer.cancelled:
+            transfer.close()
+            return
 
         # create a pipe and pass the write end to the server
         pipe_r, pipe_w = os.pipe()
-        # transfer id serves as an identifier of the pipe transfer for a signal emitted
-        # after server finish. This example does not use it.
-        transfer_id = self.session_rpm.list_fd(options, pipe_w)  # noqa: F841
-        # logger.debug(f"list_fd: transfer_id : {transfer_id}")
-        # close the write end - otherwise poll cannot detect the end of transmission
-        os.close(pipe_w)
+        t_wait = time.perf_counter()
+        try:
+            # transfer id serves as an identifier of the pipe transfer for the signal emitted after server finish
+            transfer.transfer_id = str(session.rpm.list_fd(options, pipe_w))
+        except Exception:
+            os.close(pipe_r)
+            transfer.close()
+            raise
+        finally:
+            # close the write end - otherwise poll cannot detect the end of transmission
+            os.close(pipe_w)
+            transfer.wait_time += time.perf_counter() - t_wait
+        self._register_transfer(transfer)
 
         # decoder that will be used to parse incomming data
-        parser = json.JSONDecoder()
+        decoder = JsonStreamDecoder()
 
-        # prepare for polling
+        # prepare for polling, the transfer wakes up the poller, when cancelled or finished
         poller = select.poll()
         poller.register(pipe_r, select.POLLIN)
-        # wait for data 180 secs at most
-        timeout = 180000
+        poller.register(transfer._wake_r, select.POLLIN)
         # 64k is a typical size of a pipe
         buffer_size = 65536
-
-        # remaining string to parse (can contain unfinished json from previous run)
-        to_parse = ""
-        # remaining raw data (i.e. data before UTF decoding)
-        raw_data = b""
-        while True:
-            # wait for data
-            polled_event = poller.poll(timeout)
-            if not polled_event:
-                logger.error("Timeout reached. (_list_fd)")
-                break
-
-            # we know there is only one fd registered in poller
-            descriptor, event = polled_event[0]
-            # read a chunk of data
-            buffer = os.read(descriptor, buffer_size)
-            if not buffer:
-                # end of file
-                break
-
-            raw_data += buffer
-            try:
-                to_parse += raw_data.decode()
-                # decode successful, clear remaining raw data
-                raw_data = b""
-            except UnicodeDecodeError:
-                # Buffer size split data in the middle of multibyte UTF character.
-                # Need to read another chunk of data.
-                continue
-
-            # parse JSON objects from the string
-            while to_parse:
-                try:
-                    # skip all chars till begin of next JSON objects (new lines mostly)
-                    json_obj_start = to_parse.find("{")
-                    if json_obj_start < 0:
-                        break
-                    obj, end = parser.raw_decode(to_parse[json_obj_start:])
-                    yield obj
-                    to_parse = to_parse[(json_obj_start + end) :]
-                except json.decoder.JSONDecodeError:
-                    # this is just example which assumes that every decode error
-                    # means the data are incomplete (buffer size split the json
-                    # object in the middle). So the handler does not do anything
-                    # just break the parsing cycle and continue polling.
+        try:
+            while True:
+                # wait for data
+                t_wait = time.perf_counter()
+                polled_events = poller.poll(LIST_FD_TIMEOUT)
+                transfer.wait_time += time.perf_counter() - t_wait
+                if not polled_events:
+                    logger.error("Timeout reached. (_list_fd)")
+                    break
+                if transfer.cancelled:
+                    logger.debug(f"list_fd: {transfer} cancelled")
+                    return
+                if transfer.success is False:
+                    raise YumexException(f"list_fd failed : {transfer.error}")
+                if not any(descriptor == pipe_r for descriptor, _ in polled_events):
+                    # the transfer is finished, read the data left in the pipe
+                    os.read(transfer._wake_r, buffer_size)
+                    continue
+                # read a chunk of data
+                buffer = os.read(pipe_r, buffer_size)
+                if not buffer:
+                    # end of file
                     break
+                for record in decoder.feed(buffer):
+                    # drop the rest of the records, when cancelled
+                    if transfer.cancelled:
+                        logger.debug(f"list_fd: {transfer} cancelled")
+                        return
+                    yield record
+            t_wait = time.perf_counter()
+            self._wait_for_finished(transfer)
+            transfer.wait_time += time.perf_counter() - t_wait
+            if transfer.success is False:
+                raise YumexException(f"list_fd failed : {transfer.error}")
+            yield from decoder.close()
+        finally:
+            # closing the read end stops the server from writing more data
+            os.close(pipe_r)
+            self._unregister_transfer(transfer)
+            transfer.close()
+            transfer.bytes_decoded = decoder.bytes_decoded
+            transfer.records = decoder.records
+            logger.debug(f"list_fd: {transfer} decoded {decoder.records} records ({decoder.bytes_decoded} bytes)")
+
+    @staticmethod
+    def _wait_for_finished(transfer: ListTransfer) -> None:
+        """wait a little for the completion signal, so a failed transfer is detected
+
+        The signal is handled by the main loop, so there is no waiting in the main thread
+        """
+        if transfer.finished or threading.current_thread() is threading.main_thread():
+            return
+        poller = select.poll()
+        poller.register(transfer._wake_r, select.POLLIN)
+        poller.poll(LIST_FD_FINISH_TIMEOUT)
 
     @dbus_exception
     def package_list_fd(self, *args, **kwargs) -> list[list[str]]:
@@ -234,8 +397,21 @@ class Dnf5DbusClient:
         *args is package patterns to match
         **kwargs can contain other options like package_attrs, repo or scope
 
+        """
+        result = list(self.package_list_fd_iter(*args, **kwargs))
+        logger.debug(f"list_fd({args}) returned : {len(result)} elements")
+        return result
+
+    def package_list_fd_iter(self, *args, **kwargs) -> Iterator[dict[str, Any]]:
+        """call the org.rpm.dnf.v0.rpm.Repo list_fd method, and yield the packages as they arrive
+
+        *args is package patterns to match
+        **kwargs can contain other options like package_attrs, repo or scope
+        and a ListTransfer as transfer, so the transfer can be cancelled
+
         """
         # logger.debug(f"\n --> args: {args} kwargs: {kwargs}")
+        transfer = kwargs.pop("transfer", None)
         options = {}
         options["patterns"] = dbus.Array(args)
         options["package_attrs"] = dbus.Array(kwargs.pop("package_attrs", ["nevra"]))
@@ -258,9 +434,10 @@ class Dnf5DbusClient:
         # logger.debug(f" --> options: {options} ")
 
         # logger.debug(f"DBUS: {self.session_rpm.dbus_interface}.list_fd()")
-        result = list(self._list_fd(options))
-        logger.debug(f"list_fd({args}) returned : {len(result)} elements")
-        return result
+        try:
+            yield from self._list_fd(options, transfer=transfer)
+        except dbus.exceptions.DBusException as e:
+            raise YumexException(str(e))
 
     @dbus_exception
     def _test_exception(self):
@@ -293,8 +470,9 @@ class Dnf5DbusClient:
             options["arch"] = kwargs.pop("arch")
         # get and async partial function
         # logger.debug(f" --> options: {options} ")
-        logger.debug(f"DBUS: {self.session_rpm.dbus_interface}.list()")
-        get_list = self._async_method("list", proxy=self.session_rpm)
+        session = self.read_session()
+        logger.debug(f"DBUS: {session.rpm.dbus_interface}.list() on {session}")
+        get_list = self._async_method("list", proxy=session.rpm)
         res, err = get_list(options)
         # print(res, err)
         # return as native types.
@@ -311,8 +489,9 @@ class Dnf5DbusClient:
         # options[""] = get_variant(list[str], [])
         # print(f" --> options: {options} ")
         # print(self.session_advisory)
-        logger.debug(f"DBUS: {self.session_advisory.dbus_interface}.list()")
-        get_list = self._async_method("list", proxy=self.session_advisory)
+        session = self.read_session()
+        logger.debug(f"DBUS: {session.advisory.dbus_interface}.list() on {session}")
+        get_list = self._async_method("list", proxy=session.advisory)
         res, err = get_list(options)
         return res, err
 
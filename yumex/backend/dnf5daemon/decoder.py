@@ -0,0 +1,115 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""Streaming decoder for the JSON records written by dnf5daemon list_fd"""
+
+import json
+import logging
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+NEWLINE = ord("\n")
+
+
+class JsonStreamDecoder:
+    """Incremental decoder for a stream of JSON objects
+
+    dnf5daemon writes one JSON object per line to the pipe. Chunks are appended to a
+    bytearray, and only the new data is scanned for the last line end. All complete
+    lines are decoded from UTF-8 in one go and parsed as a single JSON array, so every
+    byte is decoded exactly once. A newline can never be part of a multibyte UTF-8
+    sequence, so a chunk boundary in the middle of a character is harmless.
+    Only the unfinished tail is kept in the buffer, that is less than one record, or a record
+    with line ends in it, not received to the end yet.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._decoder = json.JSONDecoder()
+        self.bytes_decoded: int = 0
+        self.records: int = 0
+
+    def feed(self, chunk: bytes) -> Iterator[dict[str, Any]]:
+        """add a chunk of raw data and yield the records completed by it"""
+        buffer = self._buffer
+        # only the new data can contain the next line end
+        search_from = len(buffer)
+        buffer += chunk
+        end = buffer.rfind(NEWLINE, search_from)
+        if end < 0:
+            return
+        with memoryview(buffer) as view:
+            text = str(view[:end], "utf-8")
+        objs, partial = self._decode(text, final=False)
+        if partial is None:
+            consumed = end + 1
+        else:
+            # a record with line ends in it is not completed yet, it is kept in the buffer
+            consumed = end - len(text[partial:].encode("utf-8"))
+        del buffer[:consumed]
+        self.bytes_decoded += consumed
+        yield from objs
+
+    def close(self) -> Iterator[dict[str, Any]]:
+        """yield the records left in the buffer, when the stream is ended"""
+        buffer = self._buffer
+        if buffer:
+            text = buffer.decode("utf-8")
+            self.bytes_decoded += len(buffer)
+            buffer.clear()
+            objs, _partial = self._decode(text, final=True)
+            yield from objs
+
+    def _decode(self, text: str, final: bool) -> tuple[list[dict[str, Any]], Optional[int]]:
+        """decode a block of complete lines, return the records and the position of an unfinished record"""
+        try:
+            # a raw newline can't be part of a JSON string, so the lines can be joined to an array
+            objs = json.loads("[" + text.replace("\n", ",") + "]")
+            partial = None
+        except json.JSONDecodeError:
+            # empty lines, objects without a line separator or objects with line ends in them
+            objs, partial = self._decode_concatenated(text, final)
+        self.records += len(objs)
+        return objs, partial
+
+    def _decode_concatenated(self, text: str, final: bool) -> tuple[list[dict[str, Any]], Optional[int]]:
+        """decode a string with JSON objects separated by any whitespace
+
+        The text ends at a line end, so an object running to the end of the text is not finished,
+        unless it is the final text in the stream. Its position is returned, so it can be decoded
+        when the rest of it is received.
+        """
+        objs = []
+        pos = 0
+        length = len(text)
+        while pos < length:
+            # skip all chars till begin of next JSON objects (new lines mostly)
+            pos = text.find("{", pos)
+            if pos < 0:
+                break
+            try:
+                obj, pos = self._decoder.raw_decode(text, pos)
+            except json.JSONDecodeError as e:
+                if e.pos >= length and not final:
+                    return objs, pos
+                logger.error(f"list_fd: skipping malformed data : {e}")
+                # skip to the next line
+                pos = text.find("\n", e.pos)
+                if pos < 0:
+                    break
+                continue
+            objs.append(obj)
+        return objs, None
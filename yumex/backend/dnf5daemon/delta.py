@@ -0,0 +1,157 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""Apply the packages in a completed transaction to the package lists
+
+The package lists (installed, available & upgrades) is the list_fd dicts with the
+PACKAGE_ATTRS. The installed list has all installed versions of a name.arch (installonly
+packages like the kernel), the available & upgrades lists the newest package for each
+name.arch (latest-limit 1).
+"""
+
+import hashlib
+import logging
+from typing import Any, Iterable
+
+from yumex.utils.evr import evr_key
+
+logger = logging.getLogger(__name__)
+
+# transaction actions, where the package is installed after the transaction
+INSTALL_ACTIONS = {"Install", "Upgrade", "Downgrade", "Reinstall"}
+# transaction actions, where the package is removed by the transaction
+REMOVE_ACTIONS = {"Remove", "Replaced", "Obsoleted"}
+# transaction actions, where the installed package with same name.arch is replaced
+REPLACE_ACTIONS = {"Upgrade", "Downgrade"}
+
+SYSTEM_REPO = "@System"
+
+
+def nevra(pkg: dict[str, Any]) -> str:
+    return f"{pkg['name']}-{pkg['evr']}.{pkg['arch']}"
+
+
+def _latest(pkgs: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """keep the newest package for each name.arch, like latest-limit 1"""
+    latest: dict[tuple[str, str], dict[str, Any]] = {}
+    for pkg in pkgs:
+        key = (pkg["name"], pkg["arch"])
+        if key not in latest or evr_key(pkg["evr"]) > evr_key(latest[key]["evr"]):
+            latest[key] = pkg
+    return list(latest.values())
+
+
+def checksum(nevras: Iterable[str]) -> tuple[int, str]:
+    """the number of packages and a hash of the sorted nevras, to check a package list without comparing the packages"""
+    nevras = sorted(nevras)
+    return len(nevras), hashlib.sha256("\n".join(nevras).encode()).hexdigest()
+
+
+def installed_state_matches(available: list[dict[str, Any]], installed_nevras: set[str]) -> bool:
+    """True if the available packages is marked as installed, exactly when they are in the installed nevras"""
+    return all(pkg["is_installed"] == (nevra(pkg) in installed_nevras) for pkg in available)
+
+
+class TransactionDelta:
+    """The packages installed and removed by a transaction
+
+    content is the transaction items from the dnf5daemon Goal.resolve, as (object type, action,
+    reason, item attributes, package attributes)
+    """
+
+    def __init__(self, content: Iterable[tuple]) -> None:
+        self.installed: dict[str, dict[str, Any]] = {}
+        self.removed: dict[str, dict[str, Any]] = {}
+        # name.arch of packages replaced by an upgrade or downgrade
+        self.replaced: set[tuple[str, str]] = set()
+        for typ, action, _reason, _item_attrs, pkg in content:
+            action = str(action) or str(typ)
+            if action in INSTALL_ACTIONS:
+                self.installed[nevra(pkg)] = pkg
+                if action in REPLACE_ACTIONS:
+                    self.replaced.add((str(pkg["name"]), str(pkg["arch"])))
+            elif action in REMOVE_ACTIONS:
+                self.removed[nevra(pkg)] = pkg
+            else:
+                logger.debug(f"transaction delta: ignoring {action} {nevra(pkg)}")
+        # a reinstalled package is both removed and installed
+        for key in self.installed:
+            self.removed.pop(key, None)
+        # the name.arch with changes in the installed packages
+        self.touched = {(str(pkg["name"]), str(pkg["arch"])) for pkg in [*self.installed.values(), *self.removed.values()]}
+
+    def __len__(self) -> int:
+        return len(self.installed) + len(self.removed)
+
+    def _is_replaced(self, pkg: dict[str, Any]) -> bool:
+        # the replaced packages is in the transaction as Replaced items, so the other versions is kept
+        key = nevra(pkg)
+        return key in self.installed or key in self.removed
+
+    def apply_installed(self, installed: list[dict[str, Any]], available: list[dict[str, Any]] | None) -> list[dict[str, Any]]:
+        """the installed packages after the transaction, the summaries is found in the available packages
+
+        The other installed versions of a name.arch is kept, only the packages removed or replaced is dropped
+        """
+        summaries = {}
+        if available is not None:
+            summaries = {nevra(pkg): pkg["summary"] for pkg in available if nevra(pkg) in self.installed}
+        pkgs = [pkg for pkg in installed if not self._is_replaced(pkg)]
+        for key, pkg in self.installed.items():
+            pkgs.append(
+                {
+                    "name": str(pkg["name"]),
+                    "evr": str(pkg["evr"]),
+                    "arch": str(pkg["arch"]),
+                    "repo_id": SYSTEM_REPO,
+                    "summary": summaries.get(key, ""),
+                    "install_size": int(pkg.get("install_size", 0)),
+                    "is_installed": True,
+                }
+            )
+        return pkgs
+
+    def apply_available(self, available: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """the available packages with the is_installed state after the transaction"""
+        pkgs = []
+        for pkg in available:
+            key = nevra(pkg)
+            if key in self.installed:
+                is_installed = True
+            elif key in self.removed or (pkg["name"], pkg["arch"]) in self.replaced:
+                is_installed = False
+            else:
+                is_installed = pkg["is_installed"]
+            pkgs.append(pkg if is_installed == pkg["is_installed"] else pkg | {"is_installed": is_installed})
+        return pkgs
+
+    def apply_upgrades(
+        self, upgrades: list[dict[str, Any]], installed: list[dict[str, Any]], available: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """the upgrades after the transaction, the upgrades for the changed packages is found in the available packages
+
+        installed and available is the packages after the transaction
+        """
+        pkgs = [pkg for pkg in upgrades if (pkg["name"], pkg["arch"]) not in self.touched]
+        installed_evr: dict[tuple[str, str], tuple] = {}
+        for pkg in installed:
+            key = (pkg["name"], pkg["arch"])
+            if key in self.touched and (key not in installed_evr or evr_key(pkg["evr"]) > installed_evr[key]):
+                installed_evr[key] = evr_key(pkg["evr"])
+        for pkg in available:
+            key = (pkg["name"], pkg["arch"])
+            if key in installed_evr and evr_key(pkg["evr"]) > installed_evr[key]:
+                pkgs.append(pkg | {"is_installed": False})
+        return _latest(pkgs)
@@ -0,0 +1,150 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""Thread-safe dispatcher for DBus method calls
+
+dbus-python attaches the bus connection to the default GLib main context, so the
+replies to async calls can't be handled in a private main context. Instead the calls
+is made as blocking calls by a pool of dedicated DBus worker threads, so many calls
+can be in flight at the same time, and each call has its own future with the result.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+from gi.repository import GLib
+
+logger = logging.getLogger(__name__)
+
+# max. number of calls in flight
+DBUS_WORKERS = 8
+# default timeout in seconds, a transaction can take a long time
+DBUS_TIMEOUT = 60 * 20
+
+
+class DBusCall(Future):
+    """Future for a single DBus method call
+
+    The future stays pending while the call is in flight, so it can be cancelled
+    until the reply is received, the reply to a cancelled call is ignored
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__()
+        self.name = name
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+
+    @property
+    def latency(self) -> Optional[float]:
+        """time from the call was made until the reply was received (sec)"""
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    def __repr__(self) -> str:
+        return f"DBusCall({self.name})"
+
+
+class DBusDispatcher:
+    """Make DBus method calls from any thread, with a future per call"""
+
+    def __init__(self, max_workers: int = DBUS_WORKERS) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yumex-dbus")
+        self._lock = threading.Lock()
+        self._pending: set[DBusCall] = set()
+
+    @property
+    def pending(self) -> int:
+        """number of calls in flight"""
+        with self._lock:
+            return len(self._pending)
+
+    def submit(self, method: Callable, *args, timeout: float = DBUS_TIMEOUT, **kwargs) -> DBusCall:
+        """start a call of a DBus method, and return the future for the result"""
+        call = DBusCall(getattr(method, "_method_name", getattr(method, "__name__", repr(method))))
+        with self._lock:
+            self._pending.add(call)
+        call.add_done_callback(self._on_done)
+        self._executor.submit(self._run, call, method, args, {**kwargs, "timeout": timeout})
+        return call
+
+    def _run(self, call: DBusCall, method: Callable, args: tuple, kwargs: dict) -> None:
+        """make the call in a worker thread"""
+        if call.cancelled():
+            return
+        try:
+            result = method(*args, **kwargs)
+            error = None
+        except Exception as e:
+            result = None
+            error = e
+        call.finished = time.monotonic()
+        # the call could be cancelled while in flight
+        if not call.set_running_or_notify_cancel():
+            logger.debug(f"{call} reply ignored, the call is cancelled")
+            return
+        if error is not None:
+            call.set_exception(error)
+        else:
+            call.set_result(result)
+
+    def _on_done(self, call: DBusCall) -> None:
+        with self._lock:
+            self._pending.discard(call)
+
+    def wait(self, call: DBusCall, timeout: Optional[float] = None) -> Any:
+        """wait for the result of a call, the call is cancelled on timeout
+
+        If the calling thread owns the default main context (the main loop thread), it
+        will keep handling events while waiting, so DBus signals is still handled
+        """
+        context = GLib.MainContext.default()
+        if context.is_owner():
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while not call.done() and (deadline is None or time.monotonic() < deadline):
+                if not context.iteration(False):
+                    futures_wait([call], timeout=0.01)
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+        try:
+            return call.result(timeout)
+        except FutureTimeoutError:
+            call.cancel()
+            raise TimeoutError(f"{call} timed out")
+
+    def call(self, method: Callable, *args, timeout: float = DBUS_TIMEOUT, **kwargs) -> tuple[Any, Optional[Exception]]:
+        """make a call and wait for the reply, return (result, error)"""
+        call = self.submit(method, *args, timeout=timeout, **kwargs)
+        try:
+            return self.wait(call, timeout), None
+        except (CancelledError, Exception) as e:
+            logger.error(f"{call} failed : {e}")
+            return None, e
+
+    def cancel_all(self) -> int:
+        """cancel all calls in flight, return the number of cancelled calls"""
+        with self._lock:
+            pending = list(self._pending)
+        return sum(1 for call in pending if call.cancel())
+
+    def shutdown(self) -> None:
+        self.cancel_all()
+        self._executor.shutdown(wait=False, cancel_futures=True)
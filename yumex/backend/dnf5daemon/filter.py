@@ -1,18 +1,28 @@
 import logging
-from typing import Callable
+from typing import Callable, Optional
 
 from yumex.backend.dnf import YumexPackage
+from yumex.utils.evr import compare_evr
 
 logger = logging.getLogger(__name__)
 
 
 class FilterUpdates:
-    def __init__(self, repo_priority: dict[str, int], packages_by_name: Callable) -> None:
+    def __init__(
+        self,
+        repo_priority: dict[str, int],
+        packages_by_name: Callable,
+        packages_by_names: Optional[Callable] = None,
+    ) -> None:
         self.packages_by_name: Callable = packages_by_name
+        # bulk lookup, get the available packages for a list of packages in one call
+        self.packages_by_names: Optional[Callable] = packages_by_names
         self.repo_prioritiy: dict[str, int] = repo_priority
+        self._repo_index: dict[tuple[str, str], set[str]] = {}
 
     def _filter_updates(self, updates: list[YumexPackage]) -> list:
         """Filter updates based on the repository priority"""
+        self._build_repo_index(updates)
         latest_versions = {}
         for pkg in updates:
             repos = self._get_package_repos(pkg)
@@ -22,18 +32,34 @@ class FilterUpdates:
 
             if pkg_repo_priority == lowest_priority:
                 if pkg.name in latest_versions:
-                    if pkg.evr > latest_versions[pkg.name].evr:
+                    if compare_evr(pkg.evr, latest_versions[pkg.name].evr) > 0:
                         latest_versions[pkg.name] = pkg
                 else:
                     latest_versions[pkg.name] = pkg
 
+        self._repo_index = {}
         return list(latest_versions.values())
 
+    def _build_repo_index(self, updates: list[YumexPackage]) -> None:
+        """Build a (name, arch) -> repos index for all updates with a single bulk lookup"""
+        self._repo_index = {}
+        if not self.packages_by_names or not updates:
+            return
+        for pkg in self.packages_by_names(updates):
+            self._repo_index.setdefault((pkg.name, pkg.arch), set()).add(pkg.repo)
+        # updates without available packages must not be looked up one by one
+        for pkg in updates:
+            self._repo_index.setdefault((pkg.name, pkg.arch), set())
+        logger.debug(f"Repo index build for {len(self._repo_index)} packages")
+
     def _get_repo_priority(self, repo_name: str) -> int:
         """Get the priority of a repository"""
         return self.repo_prioritiy[repo_name]
 
     def _get_package_repos(self, pkg: YumexPackage) -> list[str]:
+        key = (pkg.name, pkg.arch)
+        if key in self._repo_index:
+            return list(self._repo_index[key])
         repos = set()
         pkgs = self.packages_by_name(pkg)
         for pkg in pkgs:
@@ -22,6 +22,7 @@ from gi.repository import Flatpak, GLib
 
 from yumex.backend.flatpak import FlatpakPackage, FlatpakUpdate
 from yumex.utils.enums import FlatpakAction, FlatpakLocation
+from yumex.utils.progress import ProgressThrottle
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +41,8 @@ class FlatpakTransaction:
     def __init__(self, backend, location: FlatpakLocation, first_run: bool = False):
         self.win = backend.win
         self.backend = backend
+        # the transaction run in a thread, the window progress is shown from the main loop at most once per frame
+        self.progress: ProgressThrottle = self.win.progress
         self.first_run = first_run
         self._current_result:list[TransactionOperation]
         self.failed = False
@@ -92,7 +95,7 @@ class FlatpakTransaction:
         """signal handler for FlatPak.TransactionProgress::changed"""
         cur_progress = progress.get_progress()
         total_progress = (self.current_action - 1) * self.elem_progress + ((cur_progress / 100.0) * self.elem_progress)
-        self.win.progress.set_progress(total_progress)
+        self.progress.set_progress(total_progress)
 
     def on_new_operation(self, transaction, operation, progress) -> None:
         """signal handler for FlatPak.Transaction::new-operation"""
@@ -102,7 +105,7 @@ class FlatpakTransaction:
         ref = operation.get_ref()
         operation_type = self._parse_operation(operation)
         msg = f"{operation_type} {ref}"
-        self.win.progress.set_subtitle(msg)
+        self.progress.set_subtitle(msg)
         logger.debug(f"{msg}")
 
     def operation_done(self, transaction, operation, commit, result) -> None:
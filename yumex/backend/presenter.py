@@ -15,17 +15,22 @@
 
 from __future__ import annotations
 
-from typing import Iterable
+from typing import Any, Iterable, Iterator
 
+from yumex.backend import SearchStats
 from yumex.backend.cache import YumexPackageCache
-from yumex.backend.dnf import YumexPackage
+from yumex.backend.dnf import YumexPackage, get_package_cache_size
 from yumex.backend.dnf5daemon import YumexPackageBackend
+from yumex.backend.dnf5daemon.advisory import AdvisorySummary
 from yumex.backend.flatpak.backend import FlatpakBackend
+from yumex.utils.columns import PackageColumns
 from yumex.utils.enums import (
+    AdvisoryFilter,
     InfoType,
     PackageFilter,
     Page,
 )
+from yumex.utils.progress import ProgressThrottle
 
 
 class YumexPresenter:
@@ -50,7 +55,7 @@ class YumexPresenter:
     @property
     def package_cache(self) -> YumexPackageCache:
         if not self._cache:
-            self._cache: YumexPackageCache = YumexPackageCache(backend=self.package_backend)
+            self._cache: YumexPackageCache = YumexPackageCache(backend=self.package_backend, max_entries=get_package_cache_size())
         return self._cache
 
     @property
@@ -60,7 +65,7 @@ class YumexPresenter:
         return self._fp_backend
 
     @property
-    def progress(self) -> Progress:
+    def progress(self) -> ProgressThrottle:
         return self._win.progress
 
     def reset_backend(self) -> None:
@@ -72,16 +77,35 @@ class YumexPresenter:
         self._fp_backend = None
 
     def reset_cache(self) -> None:
+        """Drop the package cache, only the changed packages if the last transaction was applied to the package lists"""
+        if self._cache is not None and self._backend is not None and (delta := self._backend.applied_delta) is not None:
+            self._cache.forget(delta.touched)
+            return
         del self._cache
         self._cache = None
 
     # PackageBackend implementation
-    def search(self, txt: str, options: dict) -> list[YumexPackage]:
-        return self.package_backend.search(txt, options=options)
+    def search(self, txt: str, options: dict, stats: SearchStats | None = None) -> list[YumexPackage] | None:
+        return self.package_backend.search(txt, options=options, stats=stats)
+
+    def cancel_search(self) -> None:
+        self.package_backend.cancel_search()
 
     def get_package_info(self, pkg: YumexPackage, attr: InfoType) -> str | None:
         return self.package_backend.get_package_info(pkg, attr)
 
+    def get_cached_package_info(self, pkg: YumexPackage, attr: InfoType) -> Any | None:
+        return self.package_backend.get_cached_package_info(pkg, attr)
+
+    def prefetch_package_info(self, pkgs: Iterable[YumexPackage]) -> None:
+        self.package_backend.prefetch_package_info(pkgs)
+
+    def get_advisory_summary(self, pkg: YumexPackage) -> AdvisorySummary | None:
+        return self.package_backend.get_advisory_summary(pkg)
+
+    def match_advisory(self, pkg: YumexPackage, advisory_filter: AdvisoryFilter) -> bool:
+        return self.package_backend.match_advisory(pkg, advisory_filter)
+
     def get_repositories(self) -> list[tuple[str, str, bool, int]]:  # id, name, enabled, priority
         return self.package_backend.get_repositories()
 
@@ -100,15 +124,34 @@ class YumexPresenter:
         """Reboot and install the system upgrade"""
         return self.package_backend.reboot_and_install()
 
-    def get_packages_by_filter(self, pkgfilter: PackageFilter, reset=False) -> list[YumexPackage]:
+    def get_packages_by_filter(self, pkgfilter: PackageFilter, reset=False) -> list[YumexPackage] | PackageColumns:
         return self.package_cache.get_packages_by_filter(pkgfilter, reset)
 
-    def get_packages(self, pkgs: list[YumexPackage]) -> Generator[YumexPackage, None, None]:
-        return self.package_cache.get_packages(pkgs)
+    def can_stream_packages(self, pkgfilter: PackageFilter) -> bool:
+        return self.package_cache.can_stream_packages(pkgfilter)
+
+    def stream_packages_by_filter(self, pkgfilter: PackageFilter) -> Iterator[PackageColumns]:
+        return self.package_cache.stream_packages_by_filter(pkgfilter)
+
+    def has_snapshot_data(self) -> bool:
+        """Check if packages is loaded from the on-disk snapshot, and not reconciled yet"""
+        return self.package_backend.has_snapshot_data()
+
+    def reconcile_snapshot(self) -> list[PackageFilter]:
+        """Reconcile the snapshot packages with the package backend"""
+        return self.package_backend.reconcile_snapshot()
+
+    def get_packages(self, pkgs: list[YumexPackage], visible: bool = False) -> Generator[YumexPackage, None, None]:
+        return self.package_cache.get_packages(pkgs, visible=visible)
 
     def get_package(self, pkg: YumexPackage) -> YumexPackage:
         return self.package_cache.get_package(pkg)
 
+    def set_queued_packages(self, pkgs: Iterable[YumexPackage]) -> None:
+        """the packages in the queue is kept in the package cache"""
+        if self._cache is not None:
+            self._cache.set_queued(pkgs)
+
     # Main Window helpers
 
     def get_main_window(self) -> YumexMainWindow:
@@ -0,0 +1,304 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""In-process search index over the name and summary of the installed & available packages
+
+The package names is indexed by trigrams and the summaries by words, each term has a posting
+list with the ids of the packages (the position in the installed + available package lists).
+
+File layout (saved next to the package snapshot):
+
+    YUMEXIDX <version>\\n
+    <json header with the snapshot key, the package list sizes and the (offset, count) of each array>\\n
+    <the arrays (posting lists, the newest packages in the scopes & the name order) as unsigned 32 bit ints>
+"""
+
+import json
+import logging
+import re
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from yumex.utils.evr import evr_key
+
+logger = logging.getLogger(__name__)
+
+INDEX_MAGIC = b"YUMEXIDX"
+INDEX_VERSION = 1
+
+# the package lists in the index, in the order of the package ids (INDEXED_SECTIONS in the snapshot)
+INDEX_SCOPES = ("installed", "available")
+# the scopes there can be searched
+SEARCH_SCOPES = ("installed", "available", "all")
+
+WORD_RE = re.compile(r"\w+")
+# a query with a dash before a digit can match the name-version part of the nevra (like dnf5daemon)
+NEVRA_RE = re.compile(r"-\d")
+# the queries with glob characters is searched by dnf5daemon
+GLOB_CHARS = frozenset("*?[")
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[ndx : ndx + 3] for ndx in range(len(text) - 2)}
+
+
+def words(text: str) -> set[str]:
+    return set(WORD_RE.findall(text.lower()))
+
+
+def is_glob(txt: str) -> bool:
+    return not GLOB_CHARS.isdisjoint(txt)
+
+
+def nevra(pkg: dict[str, Any]) -> str:
+    return f"{pkg['name']}-{pkg['evr']}.{pkg['arch']}"
+
+
+def rank_key(query: str) -> Callable[[dict[str, Any]], tuple[int, int, str]]:
+    """sort key for the packages found by a query, the same ranking as PackageIndex.search
+
+    The packages is ranked by the name match (exact > prefix > substring > other), and the name length and name
+    """
+    query = query.strip().lower()
+
+    def key(pkg: dict[str, Any]) -> tuple[int, int, str]:
+        name = pkg["name"].lower()
+        if name == query:
+            rank = 0
+        elif name.startswith(query):
+            rank = 1
+        elif query in name:
+            rank = 2
+        else:
+            rank = 3
+        return rank, len(name), name
+
+    return key
+
+
+class PackageIndex:
+    """Search index over the name and summary of the installed & available packages
+
+    The packages is the list_fd dicts from the package lists, the installed packages first
+    """
+
+    def __init__(
+        self,
+        lists: dict[str, list[dict[str, Any]]],
+        names: dict[str, array],
+        summaries: dict[str, array],
+        order: array | None = None,
+        latest: dict[str, array] | None = None,
+    ) -> None:
+        self.sizes = [len(lists[scope]) for scope in INDEX_SCOPES]
+        self.pkgs = [pkg for scope in INDEX_SCOPES for pkg in lists[scope]]
+        self._names = [pkg["name"].lower() for pkg in self.pkgs]
+        self._trigrams = names
+        self._words = summaries
+        self._sorted_words = sorted(summaries)
+        # the position of the packages, ordered by name length and name
+        if order is None:
+            order = array("I", bytes(4 * len(self.pkgs)))
+            for pos, pkg_id in enumerate(sorted(range(len(self.pkgs)), key=lambda pkg_id: (len(self._names[pkg_id]), self._names[pkg_id]))):
+                order[pkg_id] = pos
+        self._order = order
+        # masks with the packages in the scopes, and the newest package of each name.arch in the scopes
+        self._in_scope: dict[str, bytearray] = {}
+        self._latest: dict[str, bytearray] = {}
+        for scope in SEARCH_SCOPES:
+            ids = self.scope_ids(scope)
+            self._in_scope[scope] = bytearray(ids.start) + b"\x01" * len(ids) + bytearray(len(self.pkgs) - ids.stop)
+            if latest is None:
+                self._latest[scope] = self._latest_ids(ids)
+            else:
+                self._latest[scope] = mask = bytearray(len(self.pkgs))
+                for pkg_id in latest[scope]:
+                    mask[pkg_id] = 1
+
+    @classmethod
+    def build(cls, lists: dict[str, list[dict[str, Any]]]) -> "PackageIndex":
+        """build the index for the package lists (installed & available)"""
+        names: dict[str, array] = {}
+        summaries: dict[str, array] = {}
+        pkg_id = 0
+        for scope in INDEX_SCOPES:
+            for pkg in lists[scope]:
+                for term in trigrams(pkg["name"].lower()):
+                    if (postings := names.get(term)) is None:
+                        postings = names[term] = array("I")
+                    postings.append(pkg_id)
+                for term in words(pkg["summary"]):
+                    if (postings := summaries.get(term)) is None:
+                        postings = summaries[term] = array("I")
+                    postings.append(pkg_id)
+                pkg_id += 1
+        return cls(lists, names, summaries)
+
+    def __len__(self) -> int:
+        return len(self.pkgs)
+
+    def scope_ids(self, scope: str) -> range:
+        """the package ids in a scope (installed, available or all)"""
+        installed, available = self.sizes
+        match scope:
+            case "installed":
+                return range(0, installed)
+            case "available":
+                return range(installed, installed + available)
+            case "all":
+                return range(0, installed + available)
+            case other:
+                raise ValueError(f"unknown scope: {other}")
+
+    def _latest_ids(self, ids: Iterable[int]) -> bytearray:
+        """mask with the newest package of each name.arch in the ids, the installed package is used if it is the newest"""
+        latest: dict[tuple[str, str], tuple[tuple, int]] = {}
+        for pkg_id in ids:
+            pkg = self.pkgs[pkg_id]
+            key = (pkg["name"], pkg["arch"])
+            order = (evr_key(pkg["evr"]), pkg_id < self.sizes[0])
+            if key not in latest or order > latest[key][0]:
+                latest[key] = (order, pkg_id)
+        mask = bytearray(len(self.pkgs))
+        for _, pkg_id in latest.values():
+            mask[pkg_id] = 1
+        return mask
+
+    def _name_matches(self, query: str) -> Iterable[int]:
+        """the ids of the packages with the query in the name"""
+        terms = trigrams(query)
+        if not terms:
+            return (pkg_id for pkg_id, name in enumerate(self._names) if query in name)
+        postings = sorted((self._trigrams.get(term, ()) for term in terms), key=len)
+        candidates = set(postings[0])
+        for other in postings[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(other)
+        return (pkg_id for pkg_id in candidates if query in self._names[pkg_id])
+
+    def _word_matches(self, word: str) -> set[int]:
+        """the ids of the packages with a summary word starting with word"""
+        found: set[int] = set()
+        ndx = bisect_left(self._sorted_words, word)
+        while ndx < len(self._sorted_words) and self._sorted_words[ndx].startswith(word):
+            found.update(self._words[self._sorted_words[ndx]])
+            ndx += 1
+        return found
+
+    def _summary_matches(self, query: str) -> set[int]:
+        """the ids of the packages with summary words starting with all the query words"""
+        found: set[int] | None = None
+        for word in words(query):
+            matches = self._word_matches(word)
+            found = matches if found is None else found & matches
+            if not found:
+                break
+        return found or set()
+
+    def search(self, txt: str, scope: str = "all", arch: Iterable[str] = (), repo: Iterable[str] = ()) -> list[dict[str, Any]]:
+        """the packages matching the query, the best matches first
+
+        The name matches is ranked as exact > prefix > substring, then the nevra matches (a query
+        like firefox-130) and the summary matches last, only the newest package of each name.arch
+        in the scope is returned (latest-limit 1)
+        """
+        query = txt.strip().lower()
+        if not query:
+            return []
+        if scope not in self._latest:
+            raise ValueError(f"unknown scope: {scope}")
+        archs = set(arch)
+        repos = set(repo)
+        # with arch or repository filters, the newest package is found after filtering
+        latest = self._latest[scope] if not (archs or repos) else self._in_scope[scope]
+        exact: list[int] = []
+        prefix: list[int] = []
+        substring: list[int] = []
+        names = self._names
+        for pkg_id in self._name_matches(query):
+            if latest[pkg_id]:
+                name = names[pkg_id]
+                if name == query:
+                    exact.append(pkg_id)
+                elif name.startswith(query):
+                    prefix.append(pkg_id)
+                else:
+                    substring.append(pkg_id)
+        pkgs = self.pkgs
+        found = set(exact).union(prefix, substring)
+        nevras: list[int] = []
+        if (match := NEVRA_RE.search(query)) and match.start() > 0:
+            # the name is ending with the part before the version
+            for pkg_id in self._name_matches(query[: match.start()]):
+                if latest[pkg_id] and pkg_id not in found and query in nevra(pkgs[pkg_id]).lower():
+                    nevras.append(pkg_id)
+            found.update(nevras)
+        summary = [pkg_id for pkg_id in self._summary_matches(query) if latest[pkg_id] and pkg_id not in found]
+        result = []
+        for ranked in (exact, prefix, substring, nevras, summary):
+            result.extend(sorted(ranked, key=self._order.__getitem__))
+        if archs or repos:
+            result = [pkg_id for pkg_id in result if (not archs or pkgs[pkg_id]["arch"] in archs) and (not repos or pkgs[pkg_id]["repo_id"] in repos)]
+            newest = self._latest_ids(result)
+            result = [pkg_id for pkg_id in result if newest[pkg_id]]
+        return [pkgs[pkg_id] for pkg_id in result]
+
+    def save(self, path: Path, key: str) -> None:
+        """save the index for the package snapshot with the key"""
+        latest = {scope: array("I", (pkg_id for pkg_id, newest in enumerate(mask) if newest)) for scope, mask in self._latest.items()}
+        header: dict[str, Any] = {"key": key, "sizes": self.sizes, "names": {}, "summaries": {}, "latest": {}}
+        blob = array("I")
+        for section, terms in (("names", self._trigrams), ("summaries", self._words), ("latest", latest)):
+            for term, postings in terms.items():
+                header[section][term] = (len(blob), len(postings))
+                blob.extend(postings)
+        header["order"] = (len(blob), len(self._order))
+        blob.extend(self._order)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp-index")
+        with tmp_path.open("wb") as f:
+            f.write(INDEX_MAGIC + b" " + str(INDEX_VERSION).encode() + b"\n")
+            f.write(json.dumps(header).encode() + b"\n")
+            blob.tofile(f)
+        tmp_path.replace(path)
+        logger.debug(f"search index: saved {path} ({len(self._trigrams)} trigrams, {len(self._words)} words)")
+
+    @classmethod
+    def load(cls, path: Path, key: str, lists: dict[str, list[dict[str, Any]]]) -> "PackageIndex | None":
+        """load the index for the package snapshot with the key, None if it don't exist or is stale"""
+        try:
+            with path.open("rb") as f:
+                if f.readline().split() != [INDEX_MAGIC, str(INDEX_VERSION).encode()]:
+                    return None
+                header = json.loads(f.readline())
+                if header.get("key") != key or header.get("sizes") != [len(lists[scope]) for scope in INDEX_SCOPES]:
+                    logger.debug("search index: the index is stale")
+                    return None
+                blob = array("I")
+                blob.frombytes(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug(f"search index: failed to load {path} : {e}")
+            return None
+        sections = {}
+        for section in ("names", "summaries", "latest"):
+            sections[section] = {term: blob[offset : offset + count] for term, (offset, count) in header[section].items()}
+        offset, count = header["order"]
+        logger.debug(f"search index: loaded {path}")
+        return cls(lists, sections["names"], sections["summaries"], blob[offset : offset + count], sections["latest"])
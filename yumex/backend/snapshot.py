@@ -0,0 +1,242 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""On-disk snapshot of the package lists, used to fill the window on a cold start
+
+File layout:
+
+    YUMEXSNAP <version>\\n
+    <json header with the snapshot key and the (offset, length, count) of each section>\\n
+    <sections>
+
+Each section is a block of UTF-8 records separated by RS (0x1e), where the fields are
+separated by US (0x1f). The file is mapped with mmap, and a section is only decoded
+when it is requested.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"YUMEXSNAP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = Path("~/.cache/yumex/packages.snapshot").expanduser()
+
+# rpmdb locations, the first one found is used
+RPMDB_PATHS = [
+    Path("/usr/lib/sysimage/rpm/rpmdb.sqlite"),
+    Path("/var/lib/rpm/rpmdb.sqlite"),
+]
+# dnf5 system metadata cache
+METADATA_CACHE = Path("/var/cache/libdnf5")
+
+FIELD_SEP = "\x1f"
+RECORD_SEP = "\x1e"
+
+# the sections there is in the search index for the snapshot (yumex.backend.search_index)
+INDEXED_SECTIONS = frozenset(("installed", "available"))
+
+# the package attributes stored in the snapshot (same as PACKAGE_ATTRS in the dnf5daemon backend)
+FIELDS = ("name", "evr", "arch", "repo_id", "summary", "install_size", "is_installed")
+
+
+def get_rpmdb_state(rpmdb_paths: list[Path] = RPMDB_PATHS) -> tuple:
+    """get a tuple there changes when the rpmdb is changed
+
+    The changes to the sqlite rpmdb is written to the write-ahead log (rpmdb.sqlite-wal) first,
+    so the log is part of the state
+    """
+    for path in rpmdb_paths:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        state = (path.as_posix(), st.st_ino, st.st_size, st.st_mtime_ns)
+        try:
+            wal = path.with_name(path.name + "-wal").stat()
+            return (*state, wal.st_ino, wal.st_size, wal.st_mtime_ns)
+        except OSError:
+            return state
+    return ()
+
+
+def get_metadata_state(metadata_cache: Path = METADATA_CACHE) -> list:
+    """get the timestamps of the repository metadata in the dnf5 cache"""
+    state = []
+    for repomd in sorted(metadata_cache.glob("*/repodata/repomd.xml")):
+        try:
+            state.append((repomd.parent.parent.name, repomd.stat().st_mtime_ns))
+        except OSError:
+            continue
+    return state
+
+
+def make_key(*args) -> str:
+    """make a snapshot key from a number of json serializable values"""
+    data = json.dumps([SNAPSHOT_VERSION, *args], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def _encode_field(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else ""
+    # the separators is not allowed in the field values, they are replaced by a space
+    return str(value).translate({0x1E: " ", 0x1F: " "})
+
+
+class PackageSnapshot:
+    """Versioned on-disk snapshot of the installed, available & updates package lists"""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH) -> None:
+        self.path = path
+        # the search index for the snapshot (yumex.backend.search_index), removed when the snapshot is changed
+        self.index_path = path.with_suffix(".index")
+        self.key: str | None = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._sections: dict[str, tuple[int, int, int]] = {}
+        self._cache: dict[str, list[dict[str, Any]]] = {}
+        # the prefetch threads save sections, while other threads read them
+        self._lock = threading.RLock()
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.key is not None
+
+    def load(self, key: str) -> bool:
+        """map the snapshot file, return False if it don't exist or is stale"""
+        with self._lock:
+            return self._load(key)
+
+    def _load(self, key: str) -> bool:
+        self.close()
+        try:
+            with self.path.open("rb") as f:
+                if f.readline().split() != [SNAPSHOT_MAGIC, str(SNAPSHOT_VERSION).encode()]:
+                    logger.debug(f"snapshot: wrong version in {self.path}")
+                    return self._stale()
+                header = json.loads(f.readline())
+                body_start = f.tell()
+                if header.get("key") != key:
+                    logger.debug("snapshot: key mismatch, snapshot is stale")
+                    return self._stale()
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            logger.debug(f"snapshot: failed to load {self.path} : {e}")
+            return self._stale()
+        self._sections = {name: (body_start + offset, length, count) for name, (offset, length, count) in header["sections"].items()}
+        self.key = key
+        logger.debug(f"snapshot: loaded {self.path} sections: {list(self._sections)}")
+        return True
+
+    def _stale(self) -> bool:
+        """remove a stale snapshot"""
+        self.invalidate()
+        return False
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap:
+                self._mmap.close()
+            self._mmap = None
+            self._sections = {}
+            self._cache = {}
+            self.key = None
+
+    def invalidate(self) -> None:
+        """forget the loaded snapshot and remove the file"""
+        with self._lock:
+            self.close()
+            self.path.unlink(missing_ok=True)
+            self.index_path.unlink(missing_ok=True)
+
+    def sections(self) -> list[str]:
+        with self._lock:
+            return list(self._sections) if self._mmap else list(self._cache)
+
+    def get(self, section: str) -> Optional[list[dict[str, Any]]]:
+        """get the packages in a section as dicts like the ones returned by list_fd"""
+        with self._lock:
+            return self._get(section)
+
+    def _get(self, section: str) -> Optional[list[dict[str, Any]]]:
+        if section in self._cache:
+            return self._cache[section]
+        if not self._mmap or section not in self._sections:
+            return None
+        offset, length, count = self._sections[section]
+        pkgs = []
+        if count:
+            text = self._mmap[offset : offset + length].decode("utf-8")
+            for record in text.split(RECORD_SEP):
+                name, evr, arch, repo_id, summary, size, installed = record.split(FIELD_SEP)
+                pkgs.append(
+                    {
+                        "name": name,
+                        "evr": evr,
+                        "arch": arch,
+                        "repo_id": repo_id,
+                        "summary": summary,
+                        "install_size": int(size),
+                        "is_installed": bool(installed),
+                    }
+                )
+        self._cache[section] = pkgs
+        return pkgs
+
+    def save(self, key: str, sections: dict[str, Iterable[dict[str, Any]]]) -> None:
+        """write a new snapshot, sections from the current snapshot with same key is kept
+
+        The search index is removed, if the indexed sections is changed
+        """
+        with self._lock:
+            self._save(key, sections)
+
+    def _save(self, key: str, sections: dict[str, Iterable[dict[str, Any]]]) -> None:
+        keep_index = self.key == key and INDEXED_SECTIONS.isdisjoint(sections)
+        if self.key == key:
+            merged = {name: self._get(name) for name in self.sections()}
+            merged.update(sections)
+            sections = merged
+        header = {"key": key, "sections": {}}
+        blocks = []
+        offset = 0
+        for name, pkgs in sections.items():
+            records = [FIELD_SEP.join(_encode_field(pkg[field]) for field in FIELDS) for pkg in pkgs]
+            block = RECORD_SEP.join(records).encode("utf-8")
+            header["sections"][name] = (offset, len(block), len(records))
+            blocks.append(block)
+            offset += len(block)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with tmp_path.open("wb") as f:
+            f.write(SNAPSHOT_MAGIC + b" " + str(SNAPSHOT_VERSION).encode() + b"\n")
+            f.write(json.dumps(header).encode() + b"\n")
+            for block in blocks:
+                f.write(block)
+        # replace the file atomically, a mapped old file stays valid until it is closed
+        os.replace(tmp_path, self.path)
+        if not keep_index:
+            self.index_path.unlink(missing_ok=True)
+        self._load(key)
+        logger.debug(f"snapshot: saved {self.path} sections: {list(sections)}")
@@ -5,6 +5,7 @@ import dbus
 
 from yumex.backend.dnf import YumexPackage
 from yumex.backend.dnf5daemon import PACKAGE_ATTRS, create_package
+from yumex.backend.dnf5daemon.client import get_dnfdaemon_bus
 from yumex.backend.dnf5daemon.filter import FilterUpdates
 
 DNFDAEMON_BUS_NAME = "org.rpm.dnf.v0"
@@ -19,7 +20,7 @@ IFACE_GROUP = "{}.comps.Group".format(DNFDAEMON_BUS_NAME)
 IFACE_ADVISORY = "{}.Advisory".format(DNFDAEMON_BUS_NAME)
 
 logger = logging.getLogger(__name__)
-SYSTEM_BUS = dbus.SystemBus()
+DNFDAEMON_BUS = get_dnfdaemon_bus()
 
 
 class Dnf5UpdateChecker:
@@ -31,10 +32,10 @@ class Dnf5UpdateChecker:
         self.session = self.open_session()
         if self.session:
             self.iface_rpm = dbus.Interface(
-                SYSTEM_BUS.get_object(DNFDAEMON_BUS_NAME, self.session), dbus_interface=IFACE_RPM
+                DNFDAEMON_BUS.get_object(DNFDAEMON_BUS_NAME, self.session), dbus_interface=IFACE_RPM
             )
             self.iface_repo = dbus.Interface(
-                SYSTEM_BUS.get_object(DNFDAEMON_BUS_NAME, self.session), dbus_interface=IFACE_REPO
+                DNFDAEMON_BUS.get_object(DNFDAEMON_BUS_NAME, self.session), dbus_interface=IFACE_REPO
             )
             return self
         else:
@@ -55,7 +56,7 @@ class Dnf5UpdateChecker:
         """Get a new session with dnf5daemon-server"""
         try:
             iface_session = dbus.Interface(
-                SYSTEM_BUS.get_object(DNFDAEMON_BUS_NAME, DNFDAEMON_OBJECT_PATH),
+                DNFDAEMON_BUS.get_object(DNFDAEMON_BUS_NAME, DNFDAEMON_OBJECT_PATH),
                 dbus_interface=IFACE_SESSION_MANAGER,
             )
             session = iface_session.open_session(dbus.Dictionary({}, signature=dbus.Signature("sv")))
@@ -68,7 +69,7 @@ class Dnf5UpdateChecker:
     def close_session(self, session):
         try:
             iface_session = dbus.Interface(
-                SYSTEM_BUS.get_object(DNFDAEMON_BUS_NAME, DNFDAEMON_OBJECT_PATH),
+                DNFDAEMON_BUS.get_object(DNFDAEMON_BUS_NAME, DNFDAEMON_OBJECT_PATH),
                 dbus_interface=IFACE_SESSION_MANAGER,
             )
             iface_session.close_session(session)
@@ -98,6 +99,26 @@ class Dnf5UpdateChecker:
             logger.debug(f"Options: {options}")
             return []
 
+    def get_packages_by_names(self, pkgs: list[YumexPackage]) -> list:
+        """Get a list of available packages for a list of packages, using a single call"""
+        try:
+            options = {
+                "package_attrs": dbus.Array(PACKAGE_ATTRS),
+                "scope": "available",
+                "patterns": dbus.Array(sorted({pkg.name for pkg in pkgs})),
+                "latest-limit": 10,
+                "with_src": False,
+                "arch": dbus.Array(sorted({pkg.arch for pkg in pkgs})),
+            }
+            res = self.iface_rpm.list(options)
+            if res is None:
+                logger.error("No packages found")
+                return []
+            return self.get_yumex_packages(res)
+        except dbus.DBusException as e:
+            logger.error(e)
+            return []
+
     def get_repo_priorities(self) -> dict[str, int]:
         """Get a list of repositories"""
         try:
@@ -128,7 +149,7 @@ class Dnf5UpdateChecker:
             }
             pkgs = self.get_yumex_packages(self.iface_rpm.list(options))
             repo_priorities = self.get_repo_priorities()
-            updates = FilterUpdates(repo_priorities, self.get_packages_by_name).get_updates(pkgs)
+            updates = FilterUpdates(repo_priorities, self.get_packages_by_name, self.get_packages_by_names).get_updates(pkgs)
             return updates
         except dbus.DBusException as e:
             logger.error(e)
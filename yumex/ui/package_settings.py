@@ -18,7 +18,7 @@ import logging
 from gi.repository import Adw, GObject, Gtk
 
 from yumex.constants import ROOTDIR
-from yumex.utils.enums import InfoType, PackageFilter, SortType
+from yumex.utils.enums import AdvisoryFilter, InfoType, PackageFilter, SortType
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +33,7 @@ class YumexPackageSettings(Gtk.Box):
     filter_search: Gtk.CheckButton = Gtk.Template.Child()
     sort_by: Adw.ComboRow = Gtk.Template.Child()
     info_type: Adw.ComboRow = Gtk.Template.Child()
+    advisory_filter: Adw.ComboRow = Gtk.Template.Child()
     installed_row: Adw.ActionRow = Gtk.Template.Child()
 
     def __init__(self, **kwargs):
@@ -69,6 +70,11 @@ class YumexPackageSettings(Gtk.Box):
         selected = self.info_type.get_selected()
         return list(InfoType)[selected]
 
+    def get_advisory_filter(self) -> AdvisoryFilter:
+        """get the current advisory filter"""
+        selected = self.advisory_filter.get_selected()
+        return list(AdvisoryFilter)[selected]
+
     def get_sort_attr(self) -> SortType:
         """get the current sort attribute"""
         selected = self.sort_by.get_selected()
@@ -78,6 +84,8 @@ class YumexPackageSettings(Gtk.Box):
         """handler for package filter changes"""
         pkg_filter: PackageFilter = PackageFilter(button.get_name())
         self.current_pkg_filter = pkg_filter
+        # the updates can be filtered by the advisories
+        self.advisory_filter.set_sensitive(pkg_filter == PackageFilter.UPDATES)
         if self.current_pkg_filter != self.previuos_pkg_filter:
             self.previuos_pkg_filter = pkg_filter
             logger.debug(f"SIGNAL: emit package-filter-changed: {pkg_filter}")
@@ -90,6 +98,13 @@ class YumexPackageSettings(Gtk.Box):
         logger.debug(f"SIGNAL: emit info-type-changed: {info_type}")
         self.emit("info-type-changed", info_type)
 
+    @Gtk.Template.Callback()
+    def on_advisory_filter_selected(self, widget, data):
+        """capture the Notify for the selected property is changed"""
+        advisory_filter = self.get_advisory_filter()
+        logger.debug(f"SIGNAL: emit advisory-filter-changed: {advisory_filter}")
+        self.emit("advisory-filter-changed", advisory_filter)
+
     @Gtk.Template.Callback()
     def on_sort_by_selected(self, widget, data):
         """capture the Notify for the selected property is changed"""
@@ -112,3 +127,8 @@ class YumexPackageSettings(Gtk.Box):
     def info_type_changed(self, info_type: InfoType):
         """signal emitted when a info type is changed"""
         pass
+
+    @GObject.Signal(arg_types=(str,))
+    def advisory_filter_changed(self, advisory_filter: AdvisoryFilter):
+        """signal emitted when the advisory filter is changed"""
+        pass
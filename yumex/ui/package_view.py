@@ -13,28 +13,43 @@
 #
 # Copyright (C) 2024 Tim Lauridsen
 import logging
+import time
+from functools import partial
 
-from gi.repository import Gio, GObject, Gtk
+from gi.repository import Gio, GLib, GObject, Gtk
 
 from yumex.backend.dnf import YumexPackage
 from yumex.backend.presenter import YumexPresenter
 from yumex.constants import APP_ID, ROOTDIR
 from yumex.ui import get_package_selection_tooltip
 from yumex.ui.dialogs import error_dialog
+from yumex.ui.package_info import ADVISORY_TYPES
 from yumex.ui.queue_view import YumexQueueView
 from yumex.utils import RunAsync, timed
-from yumex.utils.enums import PackageFilter, PackageState, PackageTodo, SortType
+from yumex.utils.columns import PackageColumns
+from yumex.utils.enums import AdvisoryFilter, PackageFilter, PackageState, PackageTodo, SortType
+from yumex.utils.scheduler import SearchScheduler
 from yumex.utils.storage import PackageStorage
 
 logger = logging.getLogger(__name__)
 
 
 CLEAN_STYLES = ["success", "error", "accent", "warning"]
+# rows above and below the selected package, there gets the package info prefetched
+INFO_PREFETCH_ROWS = 5
+# wait (ms) for the selection to settle, before the package info is prefetched
+INFO_PREFETCH_DELAY = 300
 
 
 @Gtk.Template(resource_path=f"{ROOTDIR}/ui/package_view.ui")
 class YumexPackageView(Gtk.ColumnView):
     __gtype_name__ = "YumexPackageView"
+    # emitted when the first packages is shown while loading, with the time since loading was started (ms)
+    # emitted when a search is started and when the result is shown (or the search is cancelled)
+    __gsignals__ = {
+        "first-row": (GObject.SignalFlags.RUN_FIRST, None, (float,)),
+        "search-busy": (GObject.SignalFlags.RUN_FIRST, None, (bool,)),
+    }
 
     names = Gtk.Template.Child("names")
     versions = Gtk.Template.Child("versions")
@@ -43,21 +58,36 @@ class YumexPackageView(Gtk.ColumnView):
     archs = Gtk.Template.Child()
     sizes = Gtk.Template.Child()
     descriptions = Gtk.Template.Child()
+    advisories = Gtk.Template.Child()
 
     selection: Gtk.SingleSelection = Gtk.Template.Child("selection")
 
     def __init__(self, presenter: YumexPresenter, qview: YumexQueueView, **kwargs):
         super().__init__(**kwargs)
         self.presenter = presenter
-        self.storage = PackageStorage()
+        self.storage = PackageStorage(columnar=True)
         self.queue_view = qview
         self.sort_attr = SortType.NAME
+        # the search results is shown in the ranked order, until a sort is picked
+        self.search_sorted = False
+        self.pkg_filter: PackageFilter | None = None
+        self.advisory_filter = AdvisoryFilter.ALL
         self.batch_selection = False
+        # id of the current package loading, chunks from older loadings is ignored
+        self.load_id = 0
+        self.streaming = False
+        self.load_started = 0.0
+        self._prefetch_source = 0
+        # the queued checkbox bindings for the rows shown, check_button -> (package, binding)
+        self._queued_bindings: dict[Gtk.CheckButton, tuple[YumexPackage, GObject.Binding]] = {}
+        self.search_scheduler = SearchScheduler(self.presenter.search, on_busy=partial(self.emit, "search-busy"), cancel=self.presenter.cancel_search)
         self.settings = Gio.Settings.new(APP_ID)
         self.setup()
 
     def setup(self):
         """Setup the properties, there will be set again on a reset"""
+        self.load_id += 1
+        self.streaming = False
         self.store = self.storage.clear()
         self.selection.set_model(self.store)
         self.last_position = -1
@@ -82,7 +112,7 @@ class YumexPackageView(Gtk.ColumnView):
         def set_completed(pkgs: list, error=False):
             self.presenter.set_window_sesitivity(True)
             if not error:
-                self.add_packages_to_store(pkgs)
+                self.add_packages_to_store(self.filter_advisories(pkgs))
                 self.presenter.progress.hide()
             else:
                 self.presenter.progress.hide()
@@ -90,8 +120,15 @@ class YumexPackageView(Gtk.ColumnView):
             # refresh the package description for the selected package in the view
             if len(self.store) > 0:
                 self.on_selection_changed(self.selection, 0, 0)
+            if not error and self.presenter.has_snapshot_data():
+                RunAsync(self.presenter.reconcile_snapshot, self.on_snapshot_reconciled)
 
         logger.debug(f"Loading packages : {pkg_filter}")
+        self.pkg_filter = pkg_filter
+        self.search_sorted = False
+        if self.presenter.can_stream_packages(pkg_filter):
+            self.stream_packages(pkg_filter)
+            return
 
         self.presenter.progress.set_title(_("Loading Packages"))
         self.presenter.progress.set_subtitle(_("This may take a little while"))
@@ -100,36 +137,155 @@ class YumexPackageView(Gtk.ColumnView):
         self.presenter.set_window_sesitivity(False)
         RunAsync(self.presenter.get_packages_by_filter, set_completed, pkg_filter)
 
+    def stream_packages(self, pkg_filter: PackageFilter):
+        """load the packages in the background and show them as they arrive"""
+
+        def stream(load_id: int) -> PackageColumns | None:
+            columns = None
+            for columns in self.presenter.stream_packages_by_filter(pkg_filter):
+                GLib.idle_add(self.on_packages_chunk, columns, load_id)
+            return columns
+
+        def completed(columns: PackageColumns | None, error=None):
+            if load_id != self.load_id:
+                return
+            self.streaming = False
+            if error:
+                error_dialog(self.get_root(), "Error in loading packages", str(error))
+                return
+            if columns is not None:
+                self.storage.show_rows(len(columns))
+            # show the queued packages and do a single sort, when all packages is loaded
+            self.storage.pin_packages(self.queue_view.get_all())
+            self.store = self.storage.sort_by(self.sort_attr)
+            logger.debug(f" --> loaded {len(self.store)} packages in {(time.perf_counter() - self.load_started) * 1000:.0f} ms")
+            if len(self.store) > 0:
+                self.on_selection_changed(self.selection, 0, 0)
+            if self.presenter.has_snapshot_data():
+                RunAsync(self.presenter.reconcile_snapshot, self.on_snapshot_reconciled)
+
+        self.load_id += 1
+        load_id = self.load_id
+        self.streaming = True
+        self.advisories.set_visible(False)
+        self.load_started = time.perf_counter()
+        self.store = self.storage.clear()
+        self.selection.set_model(self.store)
+        RunAsync(stream, completed, load_id)
+
+    def on_packages_chunk(self, columns: PackageColumns, load_id: int) -> bool:
+        """show the packages received since last chunk (called in the main thread)"""
+        if load_id == self.load_id and self.streaming:
+            n_rows = len(columns)
+            if self.store.columns is not columns:
+                self.storage.add_columns(columns, n_rows)
+                if n_rows > 0:
+                    elapsed = (time.perf_counter() - self.load_started) * 1000
+                    logger.debug(f" --> first packages shown after {elapsed:.0f} ms")
+                    self.emit("first-row", elapsed)
+            else:
+                self.storage.show_rows(n_rows)
+        return GLib.SOURCE_REMOVE
+
+    def on_snapshot_reconciled(self, changed: list[PackageFilter], error=None):
+        """reload the current packages in the background, if they has changed since the snapshot"""
+
+        def reloaded(pkgs: list, error=None):
+            if not error and pkg_filter == self.pkg_filter:
+                self.add_packages_to_store(self.filter_advisories(pkgs))
+
+        if error or not changed:
+            return
+        pkg_filter = self.pkg_filter
+        if pkg_filter in changed:
+            logger.debug(f"Reloading packages changed since the snapshot : {pkg_filter}")
+            RunAsync(self.presenter.get_packages_by_filter, reloaded, pkg_filter, True)
+
     # @timed
     def search(self, txt, options={}):
-        """search for packages and add them to store"""
+        """search for packages and add them to store
+
+        The searches runs in the background one at a time (see SearchScheduler), so only the
+        result of the newest search is decoded and shown
+        """
         if len(txt) > 2:
             logger.debug(f"search packages field: value: {txt}")
-            pkgs = self.presenter.get_packages(self.presenter.search(txt, options=options))
-            self.add_packages_to_store(pkgs)
+            self.load_id += 1
+            on_completed = partial(self.on_search_completed, load_id=self.load_id)
+            self.search_scheduler.request(txt, options, on_completed)
+
+    def on_search_completed(self, pkgs: list[YumexPackage] | None, error=None, load_id: int = 0):
+        if load_id != self.load_id or pkgs is None:
+            logger.debug("search result ignored, there is a newer search or loading")
+            return
+        if error:
+            error_dialog(self.get_root(), "Error in searching packages", str(error))
+            return
+        pkgs = list(self.presenter.get_packages(pkgs, visible=True))
+        ranked = not self.search_sorted
+        # a search extending the last query, only removes the packages there don't match anymore
+        if self.pkg_filter == PackageFilter.SEARCH and self.storage.retain(pkgs, ordered=ranked):
+            logger.debug(f"search result: kept {len(self.store)} packages")
+            return
+        self.pkg_filter = PackageFilter.SEARCH
+        self.add_packages_to_store(pkgs, sort=not ranked)
+
+    def cancel_search(self):
+        """cancel the search in progress, and ignore its result"""
+        self.load_id += 1
+        self.search_scheduler.cancel()
+        self.presenter.cancel_search()
 
     @timed
-    def add_packages_to_store(self, pkgs):
-        """adding packages to store"""
+    def add_packages_to_store(self, pkgs, sort: bool = True):
+        """adding packages to store, in the given order if not sort"""
         logger.debug("Adding packages to store")
+        # ignore chunks from a package loading in progress
+        self.load_id += 1
+        self.streaming = False
         # create a new store and add packages (big speed improvement)
         self.storage.clear()
         # for pkg in sorted(pkgs, key=lambda n: n.name.lower()):
 
-        for pkg in pkgs:
-            if qpkg := self.queue_view.find_by_nevra(pkg.nevra):
-                self.storage.add_package(qpkg)
-            else:
-                self.storage.add_package(pkg)
-        logger.debug(f" --> sorting by : {self.sort_attr}")
-        self.store = self.storage.sort_by(self.sort_attr)
+        if isinstance(pkgs, PackageColumns):
+            # the package objects is created by the model, when they are shown
+            self.storage.add_columns(pkgs)
+            self.storage.pin_packages(self.queue_view.get_all())
+        else:
+            self.storage.add_packages(self.queue_view.overlay(pkgs))
+        if sort:
+            logger.debug(f" --> sorting by : {self.sort_attr}")
+            self.store = self.storage.sort_by(self.sort_attr)
+        else:
+            self.store = self.storage.get_storage()
         self.selection.set_model(self.store)
-        logger.debug(f" --> number of packages : {len(list(pkgs))}")
+        self.advisories.set_visible(self.pkg_filter == PackageFilter.UPDATES)
+        logger.debug(f" --> number of packages : {len(self.store)}")
+
+    def filter_advisories(self, pkgs):
+        """only the updates with advisories matching the advisory filter"""
+        if self.pkg_filter != PackageFilter.UPDATES or self.advisory_filter == AdvisoryFilter.ALL:
+            return pkgs
+        return [pkg for pkg in pkgs if self.presenter.match_advisory(pkg, self.advisory_filter)]
+
+    def set_advisory_filter(self, advisory_filter: AdvisoryFilter):
+        """show the updates matching the advisory filter, using the already loaded updates"""
+        self.advisory_filter = advisory_filter
+        if self.pkg_filter == PackageFilter.UPDATES and not self.streaming:
+            pkgs = self.presenter.get_packages_by_filter(PackageFilter.UPDATES)
+            self.add_packages_to_store(self.filter_advisories(pkgs))
+            if len(self.store) > 0:
+                self.on_selection_changed(self.selection, 0, 0)
 
     def sort(self, sort_attr: SortType):
         """Sort the packages in the store"""
         logger.debug(f" --> sorting by : {sort_attr}")
         self.sort_attr = sort_attr
+        if self.pkg_filter == PackageFilter.SEARCH:
+            self.search_sorted = True
+        if self.streaming:
+            # the packages is sorted, when they are all loaded
+            return
         self.store = self.storage.sort_by(sort_attr)
 
     def set_styles(self, widget, pkg) -> None:
@@ -146,28 +302,24 @@ class YumexPackageView(Gtk.ColumnView):
         widget.set_css_classes(current_styles)
 
     def select_all(self, state: bool):
+        """queue or dequeue all packages in the view
+
+        The queued state is changed in the storage without notify::queued, so only the rows shown
+        get notified (else each package ripple through the bindings and on_queued_toggled), and
+        the queue is changed in one batch, with one depsolve.
+        """
         self.batch_selection = True
-        to_add = []
-        to_delete = []
-        for pkg in self.store:
-            if state:
-                if not pkg.queued:  # ty:ignore[unresolved-attribute]
-                    self._set_queued(pkg, True, to_add)
-            elif pkg.queued:  # ty:ignore[unresolved-attribute]
-                self._set_queued(pkg, False, to_delete)
+        changed = self.storage.set_queued(state)
+        to_add, to_delete = (changed, []) if state else ([], changed)
         if to_add:
             self.queue_view.add_packages(to_add)
         if to_delete:
             self.queue_view.remove_packages(to_delete)
-        self.refresh()
+        for pkg in {pkg for pkg, _binding in self._queued_bindings.values()}:
+            pkg.notify("queued")
         self.batch_selection = False
         return to_add, to_delete
 
-    def _set_queued(self, pkg, is_queued: bool, to_list: list):
-        pkg.queue_action = True
-        pkg.queued = is_queued
-        to_list.append(pkg)
-
     def toggle_selected(self):
         if len(self.store) > 0:
             pkg: YumexPackage = self.selection.get_selected_item()  # ty:ignore[invalid-assignment]
@@ -241,10 +393,29 @@ class YumexPackageView(Gtk.ColumnView):
                 logger.debug(f"SIGNAL: emit selection_changed: {pkg}")
                 self.emit("selection-changed", pkg)
                 self.last_selected = pkg
+                self.schedule_info_prefetch()
         else:
             self.emit("selection-changed", None)
             self.last_selected = None
 
+    def schedule_info_prefetch(self):
+        """prefetch the package info for the rows around the selection, when the selection has settled"""
+        if self._prefetch_source:
+            GLib.source_remove(self._prefetch_source)
+        self._prefetch_source = GLib.timeout_add(INFO_PREFETCH_DELAY, self.on_info_prefetch)
+
+    def on_info_prefetch(self) -> bool:
+        self._prefetch_source = 0
+        position = self.selection.get_selected()
+        if position == Gtk.INVALID_LIST_POSITION or position >= len(self.store):
+            return GLib.SOURCE_REMOVE
+        first = max(position - INFO_PREFETCH_ROWS, 0)
+        last = min(position + INFO_PREFETCH_ROWS + 1, len(self.store))
+        pkgs = [self.store[ndx] for ndx in range(first, last) if ndx != position]
+        if pkgs:
+            RunAsync(self.presenter.prefetch_package_info, None, pkgs)
+        return GLib.SOURCE_REMOVE
+
     # --------------------- Factory setup methods --------------------------------
 
     @Gtk.Template.Callback()
@@ -306,9 +477,29 @@ class YumexPackageView(Gtk.ColumnView):
         self.set_styles(label, pkg)
         label.set_text(pkg.description)  # Update Gtk.Label with data from model item
 
+    @Gtk.Template.Callback()
+    def on_advisory_bind(self, widget, item):
+        label = item.get_child()  # Get the Gtk.Label stored in the ListItem
+        pkg = item.get_item()  # get the model item, connected to current ListItem
+        self.set_styles(label, pkg)
+        if summary := self.presenter.get_advisory_summary(pkg):
+            text = ADVISORY_TYPES.get(summary.type, _("Undefined"))
+            if summary.severity:
+                text = f"{text} ({summary.severity})"
+            label.set_text(text)
+        else:
+            label.set_text("")
+
     @Gtk.Template.Callback()
     def on_queued_bind(self, widget, item):
         check_button = item.get_child()  # Get the Gtk.Checkbutton stored in the ListItem
         pkg = item.get_item()  # get the model item, connected to current ListItem
-        pkg.bind_property("queued", check_button, "active", GObject.BindingFlags.SYNC_CREATE)
+        binding = pkg.bind_property("queued", check_button, "active", GObject.BindingFlags.SYNC_CREATE)
+        self._queued_bindings[check_button] = (pkg, binding)
         check_button.set_active(pkg.queued)  # Update Gtk.Label with data from model item
+
+    @Gtk.Template.Callback()
+    def on_queued_unbind(self, widget, item):
+        """remove the binding, so the package don't change the checkbox when it is used for another row"""
+        if (bound := self._queued_bindings.pop(item.get_child(), None)) is not None:
+            bound[1].unbind()
@@ -14,14 +14,16 @@
 # Copyright (C) 2024 Tim Lauridsen
 
 import logging
+from functools import partial
+from typing import Iterable
 
 from gi.repository import GObject, Gtk
 
 from yumex.backend.dnf import YumexPackage
 from yumex.constants import ROOTDIR
 from yumex.ui import get_package_selection_tooltip
-from yumex.utils import RunAsync
 from yumex.utils.enums import PackageTodo, Page
+from yumex.utils.scheduler import DepsolveScheduler
 from yumex.utils.storage import PackageStorage
 
 logger = logging.getLogger(__name__)
@@ -30,7 +32,10 @@ logger = logging.getLogger(__name__)
 @Gtk.Template(resource_path=f"{ROOTDIR}/ui/queue_view.ui")
 class YumexQueueView(Gtk.ListView):
     __gtype_name__ = "YumexQueueView"
-    __gsignals__ = {"refresh": (GObject.SignalFlags.RUN_FIRST, None, ())}
+    __gsignals__ = {
+        "refresh": (GObject.SignalFlags.RUN_FIRST, None, ()),
+        "depsolve-busy": (GObject.SignalFlags.RUN_FIRST, None, (bool,)),
+    }
 
     selection = Gtk.Template.Child()
 
@@ -40,9 +45,17 @@ class YumexQueueView(Gtk.ListView):
         self.storage = PackageStorage()
         self.selection.set_model(self.storage.get_storage())
         self.working = False
+        # the queue changes is depsolved together, the deps is added by add_deps_to_queue
+        self.depsolver = DepsolveScheduler(
+            self.presenter.depsolve, self.get_queued, self.add_deps_to_queue, on_busy=partial(self.emit, "depsolve-busy")
+        )
 
     def reset(self):
+        self.depsolver.cancel()
+        # the installed packages has changed, so the cached depsolve results is stale
+        self.depsolver.clear_cache()
         self.selection.set_model(self.storage.clear())
+        self.presenter.set_queued_packages([])
         self.refresh_attention()
 
     def is_empty(self):
@@ -61,15 +74,17 @@ class YumexQueueView(Gtk.ListView):
     def add_packages(self, pkgs):
         """Add package to queue"""
         logger.debug(f"QueueView.add_packages: {len(pkgs)}")
+        added = {}
         for pkg in pkgs:
-            if pkg not in self.storage:
+            if pkg not in self.storage and pkg.nevra not in added:
                 pkg.queue_action = True
                 pkg.is_dep = False
                 pkg.queued = True
                 pkg.queue_action = False
-                self.storage.insert_sorted(pkg, self.sort_by_state)
+                added[pkg.nevra] = pkg
+        self.insert_packages(list(added.values()))
         self.working = True
-        RunAsync(self.presenter.depsolve, self.add_deps_to_queue, self.storage)
+        self.depsolver.schedule()
 
     def remove_package(self, pkg):
         self.remove_packages([pkg])
@@ -77,10 +92,11 @@ class YumexQueueView(Gtk.ListView):
     def remove_packages(self, pkgs):
         """Remove package from queue"""
         logger.debug(f"QueueView.remove_packages: {len(pkgs)}")
+        to_remove = set(pkgs)
         to_keep = []
         for store_pkg in self.storage:
             # check if this package should be kept in the queue
-            if store_pkg not in pkgs and not store_pkg.is_dep:
+            if not store_pkg.is_dep and store_pkg not in to_remove:
                 to_keep.append(store_pkg)
             else:  # reset properties for pkg to not keep in queue
                 store_pkg.queue_action = True
@@ -88,13 +104,14 @@ class YumexQueueView(Gtk.ListView):
                 store_pkg.queued = False
                 store_pkg.is_dep = False
                 store_pkg.queue_action = False
-        store = self.storage.clear()
+        # the kept packages is already in queue order
+        self.storage.replace(to_keep)
+        self.presenter.set_queued_packages(to_keep)
         if len(to_keep):  # check if there something in the queue
-            for pkg in to_keep:
-                self.storage.insert_sorted(pkg, self.sort_by_state)
             self.working = True
-            RunAsync(self.presenter.depsolve, self.add_deps_to_queue, store)
+            self.depsolver.schedule()
         else:
+            self.depsolver.cancel()
             self.add_deps_to_queue([])
 
     def add_deps_to_queue(self, deps, error=None):
@@ -102,21 +119,41 @@ class YumexQueueView(Gtk.ListView):
             logger.debug("QueueView.add_deps_to_queue: deps = None")
             return
         logger.debug(f"QueueView.add_deps_to_queue: deps found : {len(deps)}")
+        added = {}
         for dep in self.presenter.get_packages(deps):
-            if dep not in self.storage:  # new dep not in queue
+            if dep not in self.storage and dep.nevra not in added:  # new dep not in queue
                 dep.is_dep = True
                 dep.queue_action = True
                 dep.queued = True
-                self.storage.insert_sorted(dep, self.sort_by_state)
+                added[dep.nevra] = dep
+        self.insert_packages(list(added.values()))
         self.selection.set_model(self.storage.get_storage())
         # send refresh signal, to refresh the package view
         self.working = False
         self.emit("refresh")
         self.refresh_attention()
 
+    def insert_packages(self, pkgs: list[YumexPackage]) -> None:
+        """insert new packages in the queue order
+
+        A single package is inserted in place, more packages is merged with the queue
+        in one sort and the store is rebuild with a single splice
+        """
+        if len(pkgs) == 1:
+            self.storage.insert_sorted(pkgs[0], self.sort_by_state)
+        elif pkgs:
+            # sorted is stable, so the new packages is placed after the queued packages with same state
+            self.storage.replace(sorted([*self.storage, *pkgs], key=self.queue_order))
+        if pkgs:
+            self.presenter.set_queued_packages(self.storage)
+
     def clear_all(self):
         self.remove_packages(list(self.storage))
 
+    def get_all(self) -> list[YumexPackage]:
+        """get all packages in the queue, including the dependencies"""
+        return list(self.storage)
+
     def get_queued(self) -> list[YumexPackage]:
         return [pkg for pkg in self.storage if not pkg.is_dep]
 
@@ -124,9 +161,18 @@ class YumexQueueView(Gtk.ListView):
     def sort_by_state(a, b):
         return (a.state + a.action) > (b.state + b.action)
 
+    @staticmethod
+    def queue_order(pkg: YumexPackage) -> int:
+        """sort key for the queue order, the same order as sort_by_state"""
+        return pkg.state + pkg.action
+
     def find_by_nevra(self, nevra):
         return self.storage.find_by_nevra(nevra)
 
+    def overlay(self, pkgs: Iterable[YumexPackage]) -> list[YumexPackage]:
+        """use the queued package objects for packages in the queue"""
+        return self.storage.overlay(pkgs)
+
     @Gtk.Template.Callback()
     def on_queue_setup(self, widget, item):
         """setup ui for a list item"""
@@ -36,7 +36,8 @@ from yumex.ui.queue_view import YumexQueueView
 from yumex.ui.search_settings import YumexSearchSettings
 from yumex.ui.transaction_result import YumexTransactionResult
 from yumex.utils import BUILD_TYPE, RunAsync, get_distro_release
-from yumex.utils.enums import InfoType, PackageFilter, Page, SortType, TransactionCommand
+from yumex.utils.enums import AdvisoryFilter, InfoType, PackageFilter, Page, SortType, TransactionCommand
+from yumex.utils.progress import ProgressThrottle
 from yumex.utils.updater import sync_updates
 
 logger = logging.getLogger(__name__)
@@ -59,6 +60,7 @@ class YumexMainWindow(Adw.ApplicationWindow):
     search_button = Gtk.Template.Child()
     search_bar: Gtk.SearchBar = Gtk.Template.Child()
     search_entry: Gtk.SearchEntry = Gtk.Template.Child()
+    search_spinner: Adw.Spinner = Gtk.Template.Child()
     sidebar_button = Gtk.Template.Child("sidebar-button")
     package_paned = Gtk.Template.Child()
     update_info_box = Gtk.Template.Child()
@@ -81,6 +83,8 @@ class YumexMainWindow(Adw.ApplicationWindow):
         self._last_filter: PackageFilter | None = None
         self._resetting = False
         self.search_bar.connect_entry(self.search_entry)
+        # the keystrokes is debounced by the search entry
+        self.search_entry.set_search_delay(max(self.settings.get_int("search-delay"), 0))
 
         # save settings on windows close
         self.connect("unrealize", self.on_window_close)
@@ -121,7 +125,8 @@ class YumexMainWindow(Adw.ApplicationWindow):
         if BUILD_TYPE == "debug":
             self.add_css_class("devel")
 
-        self.progress = YumexProgress(self)
+        # the progress updates is shown at most once per frame
+        self.progress = ProgressThrottle(YumexProgress(self))
         self.setup_packages_and_queue()
         self.setup_flatpaks()
         self.popover = Gtk.PopoverMenu()
@@ -138,10 +143,12 @@ class YumexMainWindow(Adw.ApplicationWindow):
         # Setup queue page
         self.queue_view = YumexQueueView(self.presenter)
         self.queue_view.connect("refresh", self.on_queue_refresh)
+        self.queue_view.connect("depsolve-busy", self.on_depsolve_busy)
         self.content_queue.set_child(self.queue_view)
         # setup packages page
         self.package_view = YumexPackageView(self.presenter, self.queue_view)
         self.package_view.connect("selection-changed", self.on_package_selection_changed)
+        self.package_view.connect("search-busy", self.on_search_busy)
         self.content_packages.set_child(self.package_view)
         self.set_saved_setting()
         # setup package settings
@@ -149,6 +156,7 @@ class YumexMainWindow(Adw.ApplicationWindow):
         self.package_settings.connect("package-filter-changed", self.on_package_filter_changed)
         self.package_settings.connect("info-type-changed", self.on_info_type_changed)
         self.package_settings.connect("sort-attr-changed", self.on_sort_attr_changed)
+        self.package_settings.connect("advisory-filter-changed", self.on_advisory_filter_changed)
         self.sidebar.set_sidebar(self.package_settings)
         # setup package info
         self.package_info = YumexPackageInfo()
@@ -286,6 +294,8 @@ class YumexMainWindow(Adw.ApplicationWindow):
         if not refresh and self._last_selected_pkg and pkg == self._last_selected_pkg:
             return
         self._last_selected_pkg = pkg
+        if (pkg_info := self.presenter.get_cached_package_info(pkg, self.info_type)) is not None:
+            return completed(pkg_info)
         RunAsync(self.presenter.get_package_info, completed, pkg, self.info_type)
 
     def on_clear_queue(self, *args):
@@ -329,10 +339,20 @@ class YumexMainWindow(Adw.ApplicationWindow):
     def on_apply_actions_clicked(self, *_args):
         """handler for the apply button"""
 
+        depsolver = self.queue_view.depsolver
+        if depsolver.running:
+            # the apply action is disabled, while the queue is depsolved
+            logger.debug("Apply ignored, the queue is being depsolved")
+            return
+        # the transaction use the goal in the dnf5daemon session, so the queue depsolves is held
+        depsolver.hold()
         if queued := self.queue_view.get_queued():
             logger.debug(f"Execute the transaction on {len(queued)} packages")
             opts = TransactionOptions()
-            result = self._do_transaction(queued, opts)
+            try:
+                result = self._do_transaction(queued, opts)
+            finally:
+                depsolver.release()
             logger.debug(f"Transaction execution ended : {result}")
             if result:  # transaction completed without issues\
                 self.show_message(_("Transaction completed succesfully"), timeout=3)
@@ -340,6 +360,8 @@ class YumexMainWindow(Adw.ApplicationWindow):
                     self.on_action_reboot()
                 # reset everything
                 self.reset_all()
+        else:
+            depsolver.release()
 
     def reset_all(self):
         # reset everything
@@ -361,6 +383,7 @@ class YumexMainWindow(Adw.ApplicationWindow):
     def reset_search(self):
         # if self.package_settings.current_pkg_filter == PackageFilter.SEARCH:
         logger.debug("Reset search")
+        self.package_view.cancel_search()
         # GLib.idle_add(self.load_packages, self._last_filter)
         if self._last_filter:
             self.load_packages(self._last_filter)
@@ -388,6 +411,15 @@ class YumexMainWindow(Adw.ApplicationWindow):
             self.do_search(search_txt)
         return True
 
+    def on_depsolve_busy(self, widget, busy: bool):
+        """the transaction can't be applied, while the queue is being depsolved"""
+        if (app := self.get_application()) and (action := app.lookup_action("apply_actions")):
+            action.set_enabled(not busy)
+
+    def on_search_busy(self, widget, busy: bool):
+        """show the spinner in the search bar, while searching"""
+        self.search_spinner.set_visible(busy)
+
     @Gtk.Template.Callback()
     def on_search_settings(self, widget):
         options = self.search_settings.show_dialog(self)
@@ -628,6 +660,12 @@ class YumexMainWindow(Adw.ApplicationWindow):
         self.package_view.refresh()
         self.sidebar.set_show_sidebar(False)
 
+    def on_advisory_filter_changed(self, widget, advisory_filter: str):
+        advisory_filter = AdvisoryFilter(advisory_filter)
+        logger.debug(f"SIGNAL: advisory-filter-changed : {advisory_filter}")
+        self.package_view.set_advisory_filter(advisory_filter)
+        self.sidebar.set_show_sidebar(False)
+
     def set_needs_attention(self, page: Page, num: int):
         """set the page needs_attention state"""
         state = num > 0
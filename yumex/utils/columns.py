@@ -0,0 +1,271 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+import logging
+from array import array
+from typing import Any, Iterable, Iterator, Optional
+from weakref import WeakValueDictionary
+
+from yumex.backend.dnf import YumexPackage
+from yumex.utils.enums import PackageState, SortType
+
+logger = logging.getLogger(__name__)
+
+
+class PackageColumns:
+    """Columnar store for a list of packages
+
+    The strings (name, epoch, version, release, arch, repo) is interned in a shared
+    string table and stored as indexes in parallel arrays, together with the size
+    and the state. YumexPackage objects is only created for the rows there is requested
+    and only kept as long as they are in use, except for rows there has a shared package
+    object (like a cached package).
+
+    The queued column mark the rows queued in bulk (see PackageListModel.set_queued), the
+    queued package objects is kept alive by the queue, so a marked row without a package
+    object in use is not queued anymore.
+    """
+
+    def __init__(self) -> None:
+        self._strings: list[str] = [""]
+        self._string_index: dict[str, int] = {"": 0}
+        self.name = array("I")
+        self.epoch = array("I")
+        self.version = array("I")
+        self.release = array("I")
+        self.arch = array("I")
+        self.repo = array("I")
+        self.size = array("Q")
+        self.state = array("B")
+        self.queued = bytearray()
+        self.summary: list[str] = []
+        # rows with a package object owned by someone else
+        self._objects: dict[int, YumexPackage] = {}
+        # package objects created for rows, while they are in use
+        self._proxies: WeakValueDictionary[int, YumexPackage] = WeakValueDictionary()
+        self._nevra_index: Optional[dict[str, int]] = None
+        # rows in sort order for each SortType, cleared when rows is added
+        self._sorted_rows: dict[SortType, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def __iter__(self) -> Iterator[YumexPackage]:
+        for row in range(len(self)):
+            yield self.get_package(row)
+
+    def __getitem__(self, row: int) -> YumexPackage:
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(f"row {row} out of range")
+        return self.get_package(row)
+
+    def intern(self, value: str) -> int:
+        """get the index of a string in the string table"""
+        ndx = self._string_index.get(value)
+        if ndx is None:
+            ndx = len(self._strings)
+            self._strings.append(value)
+            self._string_index[value] = ndx
+        return ndx
+
+    def string(self, ndx: int) -> str:
+        return self._strings[ndx]
+
+    def append(
+        self,
+        name: str,
+        epoch: str,
+        version: str,
+        release: str,
+        arch: str,
+        repo: str,
+        summary: str,
+        size: int,
+        state: PackageState,
+    ) -> int:
+        """add a package row and return the row number"""
+        intern = self.intern
+        self.name.append(intern(name))
+        self.epoch.append(intern(str(epoch) if epoch else ""))
+        self.version.append(intern(version))
+        self.release.append(intern(release))
+        self.arch.append(intern(arch))
+        self.repo.append(intern(repo))
+        self.summary.append(summary)
+        self.size.append(int(size))
+        self.state.append(state)
+        self.queued.append(0)
+        row = len(self.name) - 1
+        self._sorted_rows = {}
+        if self._nevra_index is not None:
+            self._nevra_index.setdefault(self.nevra(row), row)
+        return row
+
+    def append_dict(self, pkg: dict[str, Any], state: Optional[PackageState] = None) -> int:
+        """add a package from a dnf5daemon list dict (see create_package)"""
+        evr = pkg["evr"]
+        if ":" in evr:
+            e, vr = evr.split(":")
+        else:
+            vr = evr
+            e = ""
+        v, r = vr.split("-", 1)
+        if state is None:
+            state = PackageState.INSTALLED if pkg["is_installed"] else PackageState.AVAILABLE
+        return self.append(
+            str(pkg["name"]),
+            e,
+            v,
+            r,
+            str(pkg["arch"]),
+            str(pkg["repo_id"]),
+            str(pkg["summary"]),
+            pkg["install_size"],
+            state,
+        )
+
+    def append_package(self, pkg: YumexPackage, keep: bool = False) -> int:
+        """add a package object, if keep is True the object is used for the row"""
+        row = self.append(pkg.name, pkg.epoch, pkg.version, pkg.release, pkg.arch, pkg.repo, pkg.description, pkg.size, pkg.state)
+        if keep:
+            self.set_package(row, pkg)
+        return row
+
+    @classmethod
+    def from_packages(cls, pkgs: Iterable[YumexPackage], keep: bool = False) -> "PackageColumns":
+        columns = cls()
+        for pkg in pkgs:
+            columns.append_package(pkg, keep=keep)
+        return columns
+
+    def extend(self, columns: "PackageColumns") -> None:
+        """add the rows from other columns, the package objects is shared"""
+        offset = len(self)
+        strings = array("I", map(self.intern, columns._strings))
+        for attr in ("name", "epoch", "version", "release", "arch", "repo"):
+            getattr(self, attr).extend(map(strings.__getitem__, getattr(columns, attr)))
+        self.size.extend(columns.size)
+        self.state.extend(columns.state)
+        self.queued.extend(columns.queued)
+        self.summary.extend(columns.summary)
+        for row, pkg in columns._objects.items():
+            self._objects[row + offset] = pkg
+        self._sorted_rows = {}
+        if self._nevra_index is not None:
+            for row in range(offset, len(self)):
+                self._nevra_index.setdefault(self.nevra(row), row)
+
+    def copy(self) -> "PackageColumns":
+        """copy the columns, the package objects is shared"""
+        columns = PackageColumns()
+        columns._strings = list(self._strings)
+        columns._string_index = dict(self._string_index)
+        for attr in ("name", "epoch", "version", "release", "arch", "repo", "size", "state"):
+            setattr(columns, attr, array(getattr(self, attr).typecode, getattr(self, attr)))
+        columns.queued = bytearray(self.queued)
+        columns.summary = list(self.summary)
+        columns._objects = dict(self._objects)
+        return columns
+
+    def evr(self, row: int) -> str:
+        """epoch:version-release"""
+        strings = self._strings
+        epoch = strings[self.epoch[row]]
+        if epoch:
+            return f"{epoch}:{strings[self.version[row]]}-{strings[self.release[row]]}"
+        return f"{strings[self.version[row]]}-{strings[self.release[row]]}"
+
+    def nevra(self, row: int) -> str:
+        """name-(epoch:)version-release.arch"""
+        return f"{self._strings[self.name[row]]}-{self.evr(row)}.{self._strings[self.arch[row]]}"
+
+    def find(self, nevra: str) -> Optional[int]:
+        """find the row of a package by nevra, the index is build on first use"""
+        if self._nevra_index is None:
+            index = {}
+            for row in range(len(self)):
+                index.setdefault(self.nevra(row), row)
+            self._nevra_index = index
+        return self._nevra_index.get(nevra)
+
+    def sorted_rows(self, attr: SortType) -> array:
+        """get the rows in sort order, the sort keys is only calculated on the first call"""
+        if (rows := self._sorted_rows.get(attr)) is None:
+            match attr:
+                case SortType.NAME:
+                    keys = self._string_keys(self.name, casefold=True)
+                case SortType.ARCH:
+                    keys = self._string_keys(self.arch)
+                case SortType.SIZE:
+                    keys = self.size
+                case SortType.REPO:
+                    keys = self._string_keys(self.repo)
+                case other:
+                    raise ValueError(f"Unknown sort type: {other}")
+            rows = array("I", sorted(range(len(self)), key=keys.__getitem__))
+            self._sorted_rows[attr] = rows
+        return rows
+
+    def _string_keys(self, column: array, casefold: bool = False) -> list[int]:
+        """get the sort rank of the strings in a column, so the rows can be sorted by integers"""
+        strings = self._strings
+        if casefold:
+            ranked = sorted(set(column), key=lambda ndx: strings[ndx].casefold())
+        else:
+            ranked = sorted(set(column), key=strings.__getitem__)
+        rank = dict(zip(ranked, range(len(ranked))))
+        return [rank[ndx] for ndx in column]
+
+    def set_package(self, row: int, pkg: YumexPackage) -> None:
+        """use a shared package object for a row"""
+        self._objects[row] = pkg
+        self.state[row] = pkg.state
+        self.queued[row] = pkg.queued
+
+    def packages(self) -> Iterator[tuple[int, YumexPackage]]:
+        """the rows with a package object in use, no package objects is created"""
+        yield from self._objects.items()
+        for row, pkg in list(self._proxies.items()):
+            if row not in self._objects:
+                yield row, pkg
+
+    def live_package(self, row: int) -> Optional[YumexPackage]:
+        """get the package object for a row, if it is in use (no package object is created)"""
+        if (pkg := self._objects.get(row)) is not None:
+            return pkg
+        return self._proxies.get(row)
+
+    def get_package(self, row: int) -> YumexPackage:
+        """get the package object for a row, it is created if not in use already"""
+        if (pkg := self.live_package(row)) is not None:
+            return pkg
+        # the queued package object is released by the queue, so the row is not queued
+        self.queued[row] = 0
+        strings = self._strings
+        pkg = YumexPackage(
+            name=strings[self.name[row]],
+            epoch=strings[self.epoch[row]],
+            version=strings[self.version[row]],
+            release=strings[self.release[row]],
+            arch=strings[self.arch[row]],
+            repo=strings[self.repo[row]],
+            description=self.summary[row],
+            size=self.size[row],
+            state=PackageState(self.state[row]),
+        )
+        self._proxies[row] = pkg
+        return pkg
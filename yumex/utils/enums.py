@@ -130,6 +130,13 @@ class PackageFilter(StrEnum):
     SEARCH = auto()
 
 
+# filter for the updates, by the advisories for the packages
+class AdvisoryFilter(StrEnum):
+    ALL = auto()
+    SECURITY = auto()
+    CRITICAL = auto()
+
+
 # ["description", "files", "update_info"]
 class InfoType(StrEnum):
     DESCRIPTION = auto()
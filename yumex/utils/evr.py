@@ -0,0 +1,168 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""RPM version comparison (rpmvercmp) for epoch:version-release strings
+
+A version is parsed once into a sort key, where comparing the keys gives the same result
+as rpmvercmp. The parsed keys is memoised, so the same evr string gives the same key object.
+"""
+
+import string
+from functools import lru_cache
+from typing import Iterable
+
+# max. number of memoised evr keys
+EVR_CACHE_SIZE = 2**17
+
+ALPHA = frozenset(string.ascii_letters)
+DIGITS = frozenset(string.digits)
+ALNUM = ALPHA | DIGITS
+
+# the order of the key elements, tilde sorts before the end of the version, caret after the end,
+# but before any other segment, and numeric segments is newer than alpha segments
+_TILDE = (0,)
+_END = (1,)
+_CARET = (2,)
+_ALPHA = 3
+_NUMERIC = 4
+
+EVRKey = tuple[int, tuple, tuple]
+
+
+def rpmvercmp(one: str, two: str) -> int:
+    """compare two version strings the same way as rpmvercmp in librpm
+
+    return 1 if one is newer, 0 if they are equal and -1 if two is newer
+    """
+    if one == two:
+        return 0
+    i = j = 0
+    len_one, len_two = len(one), len(two)
+    while i < len_one or j < len_two:
+        while i < len_one and one[i] not in ALNUM and one[i] not in "~^":
+            i += 1
+        while j < len_two and two[j] not in ALNUM and two[j] not in "~^":
+            j += 1
+        # a tilde sorts before everything else
+        if (i < len_one and one[i] == "~") or (j < len_two and two[j] == "~"):
+            if i >= len_one or one[i] != "~":
+                return 1
+            if j >= len_two or two[j] != "~":
+                return -1
+            i += 1
+            j += 1
+            continue
+        # a caret sorts after the end of the version, but before everything else
+        if (i < len_one and one[i] == "^") or (j < len_two and two[j] == "^"):
+            if i >= len_one:
+                return -1
+            if j >= len_two:
+                return 1
+            if one[i] != "^":
+                return 1
+            if two[j] != "^":
+                return -1
+            i += 1
+            j += 1
+            continue
+        if i >= len_one or j >= len_two:
+            break
+        chars = DIGITS if one[i] in DIGITS else ALPHA
+        start_one, start_two = i, j
+        while i < len_one and one[i] in chars:
+            i += 1
+        while j < len_two and two[j] in chars:
+            j += 1
+        seg_one, seg_two = one[start_one:i], two[start_two:j]
+        # segments of different types, the numeric segment is newer
+        if not seg_two:
+            return 1 if chars is DIGITS else -1
+        if chars is DIGITS:
+            seg_one, seg_two = seg_one.lstrip("0"), seg_two.lstrip("0")
+            if len(seg_one) != len(seg_two):
+                return 1 if len(seg_one) > len(seg_two) else -1
+        if seg_one != seg_two:
+            return 1 if seg_one > seg_two else -1
+    if i >= len_one and j >= len_two:
+        return 0
+    return 1 if i < len_one else -1
+
+
+@lru_cache(maxsize=EVR_CACHE_SIZE)
+def version_key(version: str) -> tuple:
+    """the sort key for a version or release, comparing keys is the same as rpmvercmp"""
+    key = []
+    ndx = 0
+    length = len(version)
+    while ndx < length:
+        char = version[ndx]
+        if char == "~":
+            key.append(_TILDE)
+            ndx += 1
+        elif char == "^":
+            key.append(_CARET)
+            ndx += 1
+        elif char in DIGITS:
+            start = ndx
+            while ndx < length and version[ndx] in DIGITS:
+                ndx += 1
+            key.append((_NUMERIC, int(version[start:ndx])))
+        elif char in ALPHA:
+            start = ndx
+            while ndx < length and version[ndx] in ALPHA:
+                ndx += 1
+            key.append((_ALPHA, version[start:ndx]))
+        else:
+            # separators is only splitting the segments
+            ndx += 1
+    key.append(_END)
+    return tuple(key)
+
+
+@lru_cache(maxsize=EVR_CACHE_SIZE)
+def evr_key(evr: str) -> EVRKey:
+    """the sort key for an [epoch:]version[-release] string, a missing epoch is 0"""
+    epoch, sep, version_release = evr.partition(":")
+    if not sep:
+        epoch, version_release = "0", evr
+    version, _, release = version_release.rpartition("-")
+    if not version:
+        version, release = release, ""
+    return int(epoch or 0), version_key(version), version_key(release)
+
+
+def compare_evr(one: str, two: str) -> int:
+    """compare two [epoch:]version[-release] strings
+
+    return 1 if one is newer, 0 if they are equal and -1 if two is newer
+    """
+    if one == two:
+        return 0
+    key_one, key_two = evr_key(one), evr_key(two)
+    return (key_one > key_two) - (key_one < key_two)
+
+
+def compare_many(pairs: Iterable[tuple[str, str]]) -> list[int]:
+    """compare a batch of (one, two) evr pairs, the same as compare_evr for each pair"""
+    key = evr_key
+    result = []
+    append = result.append
+    for one, two in pairs:
+        if one == two:
+            append(0)
+        else:
+            key_one, key_two = key(one), key(two)
+            append((key_one > key_two) - (key_one < key_two))
+    return result
@@ -0,0 +1,105 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""Coalesce the progress updates from the transaction signals"""
+
+import logging
+import threading
+from typing import Any
+
+from gi.repository import GLib
+
+logger = logging.getLogger(__name__)
+
+# the progress dialog is updated at most once per frame (ms)
+FRAME_TIME = 16
+
+
+class ProgressThrottle:
+    """Update the progress dialog at most once per frame
+
+    The transaction signals (download, rpm actions, flatpak progress) can come thousands of times
+    per second. set_progress and set_subtitle only record the newest value, and a GLib timeout
+    shows it in the progress dialog, so the values in between is never shown.
+    set_title, show and hide is passed on at once, set_title and hide(clear=True) drop the
+    recorded values, as the progress dialog clears the subtitle and progress for them.
+    The window progress dialog is wrapped in a ProgressThrottle, so all progress updates use it.
+
+    The values can be recorded from a thread (the flatpak transactions run in a thread),
+    the progress dialog is only updated from the main loop.
+    """
+
+    def __init__(self, progress: Any, interval: int = FRAME_TIME) -> None:
+        self._progress = progress
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._fraction: float | None = None
+        self._subtitle: str | None = None
+        self._source = 0
+        # the values recorded, and the updates of the progress dialog
+        self.recorded = 0
+        self.updates = 0
+
+    def show(self) -> None:
+        self._progress.show()
+
+    def hide(self, clear: bool = True) -> None:
+        if clear:
+            self._drop()
+        if self.recorded:
+            logger.debug(f"progress: {self.recorded} values recorded, {self.updates} updates shown")
+        self.recorded = 0
+        self.updates = 0
+        self._progress.hide(clear=clear)
+
+    def set_title(self, title: str) -> None:
+        self._drop()
+        self._progress.set_title(title)
+
+    def set_subtitle(self, subtitle: str) -> None:
+        with self._lock:
+            self._subtitle = subtitle
+            self._record()
+
+    def set_progress(self, fraction: float) -> None:
+        with self._lock:
+            self._fraction = fraction
+            self._record()
+
+    def _record(self) -> None:
+        self.recorded += 1
+        if not self._source:
+            self._source = GLib.timeout_add(self.interval, self._on_timeout)
+
+    def _drop(self) -> None:
+        with self._lock:
+            self._fraction = None
+            self._subtitle = None
+            if self._source:
+                GLib.source_remove(self._source)
+                self._source = 0
+
+    def _on_timeout(self) -> bool:
+        with self._lock:
+            self._source = 0
+            fraction, self._fraction = self._fraction, None
+            subtitle, self._subtitle = self._subtitle, None
+        if subtitle is not None:
+            self._progress.set_subtitle(subtitle)
+        if fraction is not None:
+            self._progress.set_progress(fraction)
+        if subtitle is not None or fraction is not None:
+            self.updates += 1
+        return GLib.SOURCE_REMOVE
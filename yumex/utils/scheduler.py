@@ -0,0 +1,328 @@
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+# Copyright (C) 2025 Tim Lauridsen
+
+"""Schedulers for the backend work started from the UI, they run on the main thread"""
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable
+
+from gi.repository import GLib
+
+from yumex.backend import SearchStats
+from yumex.backend.dnf import YumexPackage
+from yumex.utils import RunAsync
+from yumex.utils.enums import PackageTodo
+
+logger = logging.getLogger(__name__)
+
+# wait (ms) for more queue changes, before the queue is depsolved
+DEPSOLVE_DELAY = 150
+# number of cached depsolve results
+DEPSOLVE_CACHE_ENTRIES = 16
+
+
+@dataclass
+class SearchRequest:
+    txt: str
+    options: dict
+    # called with (result, error) on the main thread, None if the search is cancelled
+    callback: Callable[[Any, Any], None] | None
+    stats: SearchStats
+
+    def same_search(self, other: "SearchRequest") -> bool:
+        return self.txt == other.txt and self.options == other.options
+
+
+class SearchScheduler:
+    """Run the searches in the background, one search at a time
+
+    The keystrokes is debounced by the search entry (search-delay). A search requested while
+    a search is running, is started when the running search is completed, only the newest
+    requested search is kept, and the result of the running search is dropped.
+    The running search is cancelled, if the new search don't extend its query, because the
+    result can't be used to answer the new search (see YumexPackageBackend.search).
+
+    search is called in a thread as search(txt, options, stats), the stats is logged at debug level,
+    when the callback has shown the result (the time used by the callback is the model update)
+    """
+
+    def __init__(
+        self,
+        search: Callable[[str, dict, SearchStats], Any],
+        on_busy: Callable[[bool], None] | None = None,
+        cancel: Callable[[], None] | None = None,
+    ) -> None:
+        self._search = search
+        self._on_busy = on_busy or (lambda busy: None)
+        self._cancel = cancel
+        self._running: SearchRequest | None = None
+        self._pending: SearchRequest | None = None
+        self._busy = False
+        # the searches requested, and the searches started & dropped
+        self.requested = 0
+        self.started = 0
+        self.dropped = 0
+
+    @property
+    def busy(self) -> bool:
+        """True if a search is running, and the result will be shown"""
+        return self._busy
+
+    def _set_busy(self, busy: bool) -> None:
+        if busy != self._busy:
+            self._busy = busy
+            self._on_busy(busy)
+
+    def request(self, txt: str, options: dict, callback: Callable[[Any, Any], None]) -> None:
+        """request a search, the callback is called with the result, if it is not superseded by a newer search"""
+        self.requested += 1
+        request = SearchRequest(txt, dict(options), callback, SearchStats(txt))
+        running = self._running
+        if running is None:
+            self._start(request)
+            return
+        if request.same_search(running):
+            # the running search gives the result, the older callback is not used
+            running.callback = request.callback
+            self._pending = None
+            return
+        if self._pending is not None:
+            logger.debug(f"search({self._pending.txt}): coalesced with search({txt})")
+        self._pending = request
+        self._set_busy(True)
+        if self._cancel is not None and not txt.lower().startswith(running.txt.lower()):
+            logger.debug(f"search({running.txt}): cancelled by search({txt})")
+            self._cancel()
+
+    def cancel(self) -> None:
+        """drop the pending search and the result of the running search"""
+        self._pending = None
+        if self._running is not None:
+            self._running.callback = None
+        self._set_busy(False)
+
+    def _start(self, request: SearchRequest) -> None:
+        self._set_busy(True)
+        self._running = request
+        self.started += 1
+        stats = request.stats
+
+        def run_search():
+            t_start = time.perf_counter()
+            stats.queue_wait = (t_start - stats.requested) * 1000
+            result = self._search(request.txt, request.options, stats)
+            stats.search = (time.perf_counter() - t_start) * 1000
+            stats.packages = len(result) if result else 0
+            return result
+
+        RunAsync(run_search, partial(self._on_completed, request))
+
+    def _on_completed(self, request: SearchRequest, result: Any, error: Any = None) -> bool:
+        self._running = None
+        if (pending := self._pending) is not None:
+            self._pending = None
+            self.dropped += 1
+            logger.debug(f"search({request.txt}): result dropped, superseded by search({pending.txt})")
+            self._start(pending)
+            return False
+        self._set_busy(False)
+        if request.callback is None:
+            logger.debug(f"search({request.txt}): result dropped, the search is cancelled")
+            return False
+        t_start = time.perf_counter()
+        request.callback(result, error)
+        request.stats.model = (time.perf_counter() - t_start) * 1000
+        logger.debug(f"search latency: {request.stats}")
+        return False
+
+
+class DepsolveScheduler:
+    """Depsolve the queue in the background, the queue changes close together is resolved together
+
+    The depsolve is started delay ms after the last queue change, so ticking many packages
+    gives one depsolve. Only one depsolve is running at a time (they share the goal in the
+    dnf5daemon session), the result is dropped if the queue has changed since the depsolve
+    was started (generation counter). The results is cached by the (nevra, todo) of the
+    queued packages, so the depsolve is skipped for a queue already resolved.
+
+    A transaction use the same goal, so the depsolves is held while the transaction is built
+    and run (hold/release), a depsolve scheduled in the meantime is started by release.
+
+    depsolve is called in a thread with the queued packages from get_queue, on_result is
+    called with (deps, error) on the main thread, on_busy is called when busy is changed
+    """
+
+    def __init__(
+        self,
+        depsolve: Callable[[list[YumexPackage]], list[YumexPackage] | None],
+        get_queue: Callable[[], list[YumexPackage]],
+        on_result: Callable[[list[YumexPackage] | None, Any], None],
+        delay: int = DEPSOLVE_DELAY,
+        cache_entries: int = DEPSOLVE_CACHE_ENTRIES,
+        on_busy: Callable[[bool], None] | None = None,
+    ) -> None:
+        self._depsolve = depsolve
+        self._get_queue = get_queue
+        self._on_result = on_result
+        self._on_busy = on_busy or (lambda busy: None)
+        self.delay = delay
+        self.cache_entries = cache_entries
+        self._cache: OrderedDict[frozenset[tuple[str, PackageTodo]], list[YumexPackage]] = OrderedDict()
+        self._source = 0
+        self._running = False
+        self._busy = False
+        # the queue is changed, while a depsolve is running
+        self._pending = False
+        # None if not held, else True if a depsolve is scheduled while held
+        self._held: bool | None = None
+        self.generation = 0
+        # the queue changes, the depsolves and the results from the cache, and the dropped results
+        self.requests = 0
+        self.resolves = 0
+        self.cache_hits = 0
+        self.dropped = 0
+        # depsolve time (ms)
+        self.resolve_time = 0.0
+        self.last_resolve_time = 0.0
+
+    @property
+    def busy(self) -> bool:
+        """True if a depsolve is scheduled or running
+
+        A cancelled depsolve is still busy until it is completed, as the next depsolve can't
+        be started before (its result is dropped)
+        """
+        return bool(self._source) or self._running
+
+    @property
+    def running(self) -> bool:
+        """True if a depsolve is running"""
+        return self._running
+
+    @property
+    def held(self) -> bool:
+        return self._held is not None
+
+    def _update_busy(self) -> None:
+        if (busy := self.busy) != self._busy:
+            self._busy = busy
+            self._on_busy(busy)
+
+    def stats(self) -> dict[str, Any]:
+        """the depsolve counters and latency, for debugging"""
+        return {
+            "requests": self.requests,
+            "resolves": self.resolves,
+            "cache_hits": self.cache_hits,
+            "dropped": self.dropped,
+            "resolve_ms": round(self.resolve_time, 1),
+            "last_resolve_ms": round(self.last_resolve_time, 1),
+        }
+
+    def schedule(self) -> None:
+        """depsolve the queue, when there has been no more queue changes for delay ms"""
+        self.requests += 1
+        self.generation += 1
+        if self._held is not None:
+            self._held = True
+            return
+        if self._source:
+            GLib.source_remove(self._source)
+        self._source = GLib.timeout_add(self.delay, self._on_timeout)
+        self._update_busy()
+
+    def cancel(self) -> None:
+        """cancel the scheduled depsolve, and drop the result of the running depsolve"""
+        self.generation += 1
+        self._pending = False
+        if self._held is not None:
+            self._held = False
+        if self._source:
+            GLib.source_remove(self._source)
+            self._source = 0
+        self._update_busy()
+
+    def hold(self) -> None:
+        """don't depsolve until release is called, the scheduled depsolve is started by release
+
+        A running depsolve is not stopped, busy is True until it is completed, its result is
+        dropped and the queue is depsolved again by release
+        """
+        scheduled = self.busy
+        self.cancel()
+        self._held = scheduled
+
+    def release(self) -> None:
+        """start the depsolves again, and schedule the depsolve requested while held"""
+        scheduled, self._held = self._held, None
+        if scheduled:
+            self.schedule()
+
+    def clear_cache(self) -> None:
+        """the cached results is stale, when the installed packages is changed"""
+        self._cache.clear()
+
+    def _on_timeout(self) -> bool:
+        self._source = 0
+        if self._running:
+            # started when the running depsolve is completed
+            self._pending = True
+        else:
+            self._start()
+        self._update_busy()
+        return GLib.SOURCE_REMOVE
+
+    def _start(self) -> None:
+        pkgs = self._get_queue()
+        if not pkgs:
+            self._on_result([], None)
+            return
+        key = frozenset((pkg.nevra, pkg.todo) for pkg in pkgs)
+        if (deps := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            self.cache_hits += 1
+            logger.debug(f"depsolve: {len(pkgs)} packages resolved from cache, {self.stats()}")
+            self._on_result(deps, None)
+            return
+        self._running = True
+        RunAsync(self._depsolve, partial(self._on_completed, key, self.generation, time.perf_counter()), pkgs)
+
+    def _on_completed(self, key, generation: int, t_start: float, deps: list[YumexPackage] | None, error: Any = None) -> bool:
+        self._running = False
+        self.resolves += 1
+        self.last_resolve_time = (time.perf_counter() - t_start) * 1000
+        self.resolve_time += self.last_resolve_time
+        # the result of a depsolve started before a queue change or a cancel is not cached,
+        # the session can be reset since it was started
+        if error is None and deps is not None and generation == self.generation:
+            self._cache[key] = deps
+            if len(self._cache) > self.cache_entries:
+                self._cache.popitem(last=False)
+        logger.debug(f"depsolve: {len(key)} packages resolved in {self.last_resolve_time:.0f} ms, {self.stats()}")
+        if self._pending:
+            self._pending = False
+            self.dropped += 1
+            self._start()
+        elif generation != self.generation:
+            # the queue is changed, the new depsolve is scheduled (or the depsolve is cancelled)
+            self.dropped += 1
+        else:
+            self._on_result(deps, error)
+        self._update_busy()
+        return False
@@ -1,20 +1,189 @@
-from typing import Optional, Callable
+from array import array
+from typing import Iterable, Iterator, Optional, Callable
 import logging
 
-from gi.repository import Gio
+from gi.repository import Gio, GObject
 
 from yumex.backend.dnf import YumexPackage
+from yumex.utils.columns import PackageColumns
 from yumex.utils.enums import SortType
 
 logger = logging.getLogger(__name__)
 
 
+class PackageListModel(GObject.Object, Gio.ListModel):
+    """A Gio.ListModel with the packages from a PackageColumns store
+
+    The model is a list of rows in the columns, so sorting only changes the row order.
+    The YumexPackage objects is created, when the view request an item (when it is shown)
+    """
+
+    __gtype_name__ = "YumexPackageListModel"
+
+    def __init__(self, columns: Optional[PackageColumns] = None) -> None:
+        super().__init__()
+        self._columns: PackageColumns = PackageColumns()
+        self._rows = array("I")
+        # the columns is owned by someone else (the package cache)
+        self._shared = False
+        # rows in the columns is removed from the model, so not all rows is shown
+        self._removed = False
+        if columns is not None:
+            self.set_columns(columns)
+
+    @property
+    def columns(self) -> PackageColumns:
+        return self._columns
+
+    def do_get_item_type(self) -> GObject.GType:
+        return YumexPackage.__gtype__
+
+    def do_get_n_items(self) -> int:
+        return len(self._rows)
+
+    def do_get_item(self, position: int) -> Optional[YumexPackage]:
+        if position < len(self._rows):
+            return self._columns.get_package(self._rows[position])
+        return None
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __iter__(self) -> Iterator[YumexPackage]:
+        get_package = self._columns.get_package
+        for row in self._rows:
+            yield get_package(row)
+
+    def __getitem__(self, position: int) -> YumexPackage:
+        return self._columns.get_package(self._rows[position])
+
+    def set_columns(self, columns: PackageColumns, n_rows: Optional[int] = None) -> None:
+        """show the rows in the columns, only the first n_rows if the columns is still loading"""
+        removed = len(self._rows)
+        self._columns = columns
+        self._shared = True
+        self._removed = False
+        self._rows = array("I", range(len(columns) if n_rows is None else n_rows))
+        self.items_changed(0, removed, len(self._rows))
+
+    def show_rows(self, n_rows: int) -> None:
+        """show the rows added to the columns since last time, up to n_rows"""
+        position = len(self._rows)
+        if n_rows > position:
+            self._rows.extend(range(position, n_rows))
+            self.items_changed(position, 0, n_rows - position)
+
+    def _own_columns(self) -> PackageColumns:
+        """copy shared columns before they are changed"""
+        if self._shared:
+            self._columns = self._columns.copy()
+            self._shared = False
+        return self._columns
+
+    def append(self, pkg: YumexPackage) -> None:
+        row = self._own_columns().append_package(pkg, keep=True)
+        self._rows.append(row)
+        self.items_changed(len(self._rows) - 1, 0, 1)
+
+    def insert_sorted(self, pkg: YumexPackage, sort_fn: Callable[[YumexPackage, YumexPackage], bool]) -> None:
+        """insert a package before the first package there sort after it (sort_fn(item, pkg) > 0)
+
+        The rows must be sorted by sort_fn, the position is found by a binary search, so only the
+        package objects for the compared rows is created
+        """
+        columns = self._own_columns()
+        rows = self._rows
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            if sort_fn(columns.get_package(rows[middle]), pkg) > 0:
+                high = middle
+            else:
+                low = middle + 1
+        position = low
+        row = columns.append_package(pkg, keep=True)
+        rows.insert(position, row)
+        self.items_changed(position, 0, 1)
+
+    def remove_range(self, position: int, n_items: int) -> None:
+        """remove n_items rows from the model, starting at position (the rows is kept in the columns)"""
+        del self._rows[position : position + n_items]
+        self._removed = True
+        self.items_changed(position, n_items, 0)
+
+    def sort_by(self, attr: SortType) -> None:
+        """show the rows in the sort order from the columns (all rows in the columns is shown, if no rows is removed)"""
+        removed = len(self._rows)
+        rows = self._columns.sorted_rows(attr)
+        if self._removed:
+            shown = set(self._rows)
+            rows = (row for row in rows if row in shown)
+        self._rows = array("I", rows)
+        self.items_changed(0, removed, len(self._rows))
+
+    def set_queued(self, state: bool) -> list[YumexPackage]:
+        """set the queued state of the packages shown without notify::queued, return the changed packages
+
+        The state is kept in the queued column, so the package objects is only created for the rows
+        queued (the queue keeps them), and no package objects is created to dequeue.
+        """
+        columns = self._columns
+        queued = columns.queued
+        changed = []
+        if state:
+            for row in self._rows:
+                if queued[row] and (pkg := columns.live_package(row)) is not None and pkg.queued:
+                    continue
+                pkg = columns.get_package(row)
+                queued[row] = 1
+                if pkg.set_queued_silent(True):
+                    changed.append(pkg)
+        else:
+            shown = set(self._rows) if self._removed or len(self._rows) < len(columns) else None
+            for row, pkg in columns.packages():
+                if (shown is None or row in shown) and pkg.set_queued_silent(False):
+                    changed.append(pkg)
+            if shown is None:
+                queued[:] = bytes(len(queued))
+            else:
+                for row in shown:
+                    queued[row] = 0
+        return changed
+
+    def find(self, nevra: str) -> Optional[int]:
+        """get the row of a package in the columns"""
+        return self._columns.find(nevra)
+
+    def find_by_nevra(self, nevra: str) -> Optional[YumexPackage]:
+        row = self._columns.find(nevra)
+        return self._columns.get_package(row) if row is not None else None
+
+    def pin(self, pkg: YumexPackage) -> bool:
+        """show the given package object, instead of the one in the columns with same nevra"""
+        row = self._columns.find(pkg.nevra)
+        if row is None:
+            return False
+        self._columns.set_package(row, pkg)
+        return True
+
+
 class PackageStorage:
-    """A wrapper for a Gio.ListStore with YumexPackage objects"""
+    """A wrapper for a Gio.ListStore with YumexPackage objects
 
-    def __init__(self):
-        self._store: Gio.ListStore[YumexPackage]
-        self._index: dict = {}
+    In columnar mode a PackageListModel is used instead of the Gio.ListStore, for big
+    package lists from the backend (see PackageColumns)
+    """
+
+    def __init__(self, columnar: bool = False):
+        self._store: Gio.ListStore[YumexPackage] | PackageListModel
+        # nevra -> package object
+        self._index: dict[str, YumexPackage] = {}
+        # nevra -> position in the store, build when needed
+        self._positions: Optional[dict[str, int]] = None
+        # the packages in the order they was added, and the sort order for each SortType
+        self._packages: list[YumexPackage] = []
+        self._sorted: dict[SortType, list[int]] = {}
+        self._columnar = columnar
         self.clear()
 
     def __iter__(self):
@@ -24,53 +193,170 @@ class PackageStorage:
         return len(self._store)
 
     def __contains__(self, item):
-        return item.nevra in self._index
+        if item.nevra in self._index:
+            return True
+        return self._columnar and self._store.find(item.nevra) is not None
 
-    def get_storage(self) -> Gio.ListStore:
+    def get_storage(self) -> Gio.ListStore | PackageListModel:
         return self._store
 
-    def clear(self) -> Gio.ListStore:
-        self._store = Gio.ListStore.new(YumexPackage)
+    def clear(self) -> Gio.ListStore | PackageListModel:
+        if self._columnar:
+            self._store = PackageListModel()
+        else:
+            self._store = Gio.ListStore.new(YumexPackage)
         self._index = {}
+        self._positions = {}
+        self._packages = []
+        self._sorted = {}
         return self._store
 
+    def add_columns(self, columns: PackageColumns, n_rows: Optional[int] = None) -> None:
+        """show the packages in a columnar package list, replaces the current packages
+
+        n_rows is used while the columns is still loading, see show_rows
+        """
+        if not self._columnar:
+            raise ValueError("Columnar package lists is only supported in columnar mode")
+        self._store.set_columns(columns, n_rows)
+        self._index = {}
+        self._positions = None
+
+    def show_rows(self, n_rows: int) -> None:
+        """show the packages added to the columns, while they is loading"""
+        self._store.show_rows(n_rows)
+        self._positions = None
+
+    def pin_packages(self, packages: list[YumexPackage]) -> None:
+        """use the given package objects for the packages in storage with same nevra"""
+        if self._columnar:
+            for package in packages:
+                self._store.pin(package)
+
+    def overlay(self, packages: Iterable[YumexPackage]) -> list[YumexPackage]:
+        """replace the packages with the package objects in storage with same nevra"""
+        index = self._index
+        return [index.get(package.nevra, package) for package in packages]
+
     def add_packages(self, packages: list[YumexPackage]) -> None:
         for package in packages:
             self.add_package(package)
 
     def add_package(self, package: YumexPackage) -> None:
         if isinstance(package, YumexPackage):
-            if package.nevra in self._index:
+            nevra = package.nevra
+            if nevra in self._index:
                 logger.debug(f"Package {package} already exists in storage")
             else:
+                if self._positions is not None:
+                    self._positions[nevra] = len(self._store)
                 self._store.append(package)
-                self._index[package.nevra] = 1
+                self._index[nevra] = package
+                self._packages.append(package)
+                self._sorted = {}
         else:
             raise ValueError(f"Can't add {package} to package storage")
 
+    def retain(self, packages: list[YumexPackage], ordered: bool = False) -> bool:
+        """keep only the given packages in storage, the order of the packages is not changed
+
+        The packages not kept is removed in runs from the end, so the view only get an
+        items_changed for each run of removed packages, instead of a reload of all packages.
+        return False if some of the packages is not in storage (they must be added as new packages),
+        or if ordered and the packages is not in the same order in storage
+        """
+        keep = {package.nevra for package in packages}
+        if not keep.issubset(self._index):
+            return False
+        kept = [package.nevra in keep for package in self._store]
+        if ordered and [package.nevra for package, is_kept in zip(self._store, kept) if is_kept] != [package.nevra for package in packages]:
+            return False
+        position = len(kept)
+        while position > 0:
+            if kept[position - 1]:
+                position -= 1
+                continue
+            end = position
+            while position > 0 and not kept[position - 1]:
+                position -= 1
+            if self._columnar:
+                self._store.remove_range(position, end - position)
+            else:
+                self._store.splice(position, end - position, [])
+        self._index = {nevra: package for nevra, package in self._index.items() if nevra in keep}
+        self._packages = [package for package in self._packages if package.nevra in keep]
+        self._sorted = {}
+        self._positions = None
+        return True
+
+    def replace(self, packages: list[YumexPackage]) -> Gio.ListStore:
+        """replace the packages in storage with the given packages (in that order)
+
+        The store is changed with a single splice, so the view only get one items_changed,
+        instead of one for each package. The packages must have unique nevra's.
+        """
+        if self._columnar:
+            raise ValueError("Replacing the packages is not supported in columnar mode")
+        self._index = {package.nevra: package for package in packages}
+        self._packages = list(packages)
+        self._sorted = {}
+        self._positions = None
+        self._store.splice(0, len(self._store), self._packages)
+        return self._store
+
     def insert_sorted(self, package: YumexPackage, sort_fn: Callable[[YumexPackage, YumexPackage], bool]) -> None:
         if isinstance(package, YumexPackage):
             if package.nevra in self._index:
                 logger.debug(f"Package {package} already exists in storage")
             else:
                 self._store.insert_sorted(package, sort_fn)
-                self._index[package.nevra] = 1
+                self._index[package.nevra] = package
+                self._packages.append(package)
+                self._sorted = {}
+                # the positions after the new package is changed
+                self._positions = None
         else:
             raise ValueError(f"Can't add {package} to package storage")
 
-    def sort_by(self, attr: SortType) -> Gio.ListStore:
-        match attr:
-            case SortType.NAME:
-                self._store.sort(lambda a, b: a.name.lower() > b.name.lower())
-            case SortType.ARCH:
-                self._store.sort(lambda a, b: a.arch > b.arch)
-            case SortType.SIZE:
-                self._store.sort(lambda a, b: a.size > b.size)
-            case SortType.REPO:
-                self._store.sort(lambda a, b: a.repo > b.repo)
-            case other:
-                raise ValueError(f"Unknown sort type: {other}")
+    def set_queued(self, state: bool) -> list[YumexPackage]:
+        """queue or dequeue all packages in storage without notify::queued, return the changed packages"""
+        if self._columnar:
+            return self._store.set_queued(state)
+        return [package for package in self._store if package.set_queued_silent(state)]
+
+    def sort_by(self, attr: SortType) -> Gio.ListStore | PackageListModel:
+        """sort the packages, the sort keys is only calculated on the first sort by a SortType"""
+        self._positions = None
+        if self._columnar:
+            self._store.sort_by(attr)
+            return self._store
+        if (order := self._sorted.get(attr)) is None:
+            match attr:
+                case SortType.NAME:
+                    keys = [pkg.name.casefold() for pkg in self._packages]
+                case SortType.ARCH:
+                    keys = [pkg.arch for pkg in self._packages]
+                case SortType.SIZE:
+                    keys = [pkg.size for pkg in self._packages]
+                case SortType.REPO:
+                    keys = [pkg.repo for pkg in self._packages]
+                case other:
+                    raise ValueError(f"Unknown sort type: {other}")
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._sorted[attr] = order
+        packages = self._packages
+        self._store.splice(0, len(self._store), [packages[ndx] for ndx in order])
         return self._store
 
     def find_by_nevra(self, nevra: str) -> Optional[YumexPackage]:
-        return next((pkg for pkg in self._store if pkg.nevra == nevra), None)
+        if (pkg := self._index.get(nevra)) is not None:
+            return pkg
+        if self._columnar:
+            return self._store.find_by_nevra(nevra)
+        return None
+
+    def get_position(self, nevra: str) -> Optional[int]:
+        """get the position of a package in the store"""
+        if self._positions is None:
+            self._positions = {pkg.nevra: ndx for ndx, pkg in enumerate(self._store)}
+        return self._positions.get(nevra)